@@ -19,4 +19,6 @@ public class ScrapedProductDto
     public string? CategoryName { get; set; }
 
     public string? CategoryNmae { get; set; }
+
+    public string? BrandName { get; set; }
 }
\ No newline at end of file
@@ -4,21 +4,38 @@ import os
 import re
 import sqlite3
 import time
+from typing import Any
+from urllib.parse import parse_qs, urljoin, urlsplit
+
+if __package__ in (None, ""):
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.deadlines import CrawlBudget
+from common.exporters import Exporter
+from common.identity import canonical_product_id
+from common.logs import configure_logging, rate_limit, sample
+from common.parsing import JSON_LD_REGION, extract_json_ld_products
+
+# Helpers shared through the pipeline module; still importable from here.
+from common.pipeline import (
+    NextLinkPagination,
+    ScrapePipeline,
+    create_directory_if_not_exists,
+    download_image,  # noqa: F401
+    get_num_workers,
+    sanitize_filename,
+)
+from common.rawarchive import RawPageWriter
+from common.tracing import JobTrace
 
-from concurrent.futures import ThreadPoolExecutor
-import concurrent.futures
-from typing import List, Dict, Any, Optional
-
-import requests
-from bs4 import BeautifulSoup
-
-MAX_FILE_LENGTH = 100
 DEFAULT_DB_PATH = os.path.join(os.path.dirname(__file__), "db", "amazon_products.db")
 DEFAULT_IMAGE_DIR = os.path.join(os.path.dirname(__file__), "images")
 DEFAULT_HEADERS_PATH = os.path.join(os.path.dirname(__file__), "..", "headers.json")
-DEFAULT_BASE_URL = (
-    "https://www.amazon.eg/s?i=electronics&rh={}&fs=true&page={}&language=en&"
-)
+# A browse node's search listing, relative to the site root.
+BROWSE_NODE_PATH = "/s?i=electronics&rh={}&fs=true&page={}&language=en&"
+DEFAULT_BASE_URL = "https://www.amazon.eg" + BROWSE_NODE_PATH
 
 DEFAULT_CATEGORIES = [
     {"n%3A21833212031": "cpu"},
@@ -27,35 +44,109 @@ DEFAULT_CATEGORIES = [
     # {"n%3A21832907031": "laptop"},
 ]
 
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
+# Elements materialized by the partial parser: result cards, pagination and
+# the empty-results banner; everything else on the page is skipped.
+PAGE_REGIONS = [
+    ("div", "data-component-type", "s-search-result"),
+    ("a", "class", "s-pagination-next"),
+    ("div", "class", "s-no-results"),
+    JSON_LD_REGION,
+]
+# Regions of a product detail page used by the targeted price refresh.
+PRODUCT_PAGE_REGIONS = [
+    ("span", "id", "productTitle"),
+    ("div", "id", "corePriceDisplay_desktop_feature_div"),
+    ("div", "id", "corePrice_feature_div"),
+    ("img", "id", "landingImage"),
+    ("input", "id", "ASIN"),
+    JSON_LD_REGION,
+]
+
+# Category discovery starts from the electronics department, whose
+# "Department" refinements list its browse nodes; each node's own page lists
+# its children and the result count.
+CATEGORY_TREE_URL = "https://www.amazon.eg/s?i=electronics&language=en"
+CATEGORY_TREE_REGIONS = [
+    ("div", "id", "departments"),
+    ("span", "data-component-type", "s-result-info-bar"),
+]
+# Sitemap crawling: the sitemap index listed in robots.txt; products are /dp/ pages.
+SITEMAP_INDEX_URL = "https://www.amazon.eg/sitemap.xml"
+_NODE_PATTERN = re.compile(r"n:(\d+)")
+_RESULT_COUNT_PATTERN = re.compile(r"([\d,]+)\s+results")
+
+# Per-product messages are sampled; per-product warnings rate limited.
+PRODUCT_LOG_EVERY = 50
+MISSING_FIELD_LOGS_PER_SECOND = 5
+
 log = logging.getLogger(__name__)
 
 
-def get_num_workers(max_workers: Optional[int] = None) -> int:
-    """Determines the number of workers for ThreadPoolExecutor."""
-    if max_workers and max_workers > 0:
-        return max_workers
-    try:
-        # Use all available cores if not specified
-        cpus = os.cpu_count()
-        return cpus if cpus else 1
-    except NotImplementedError:
-        log.warning("Could not detect number of CPUs, defaulting to 1 worker.")
-        return 1
+def has_no_results(soup) -> bool:
+    no_results_element = soup.find("div", class_="s-no-results")
+    return bool(
+        no_results_element
+        and "No results for" in no_results_element.get_text(strip=True)
+    )
+
+
+def browse_node(href: str) -> str | None:
+    """The (URL-encoded) browse node an `rh=n:...` link refines to, e.g. 'n%3A21832907031'."""
+    refinements = parse_qs(urlsplit(href).query).get("rh")
+    nodes = _NODE_PATTERN.findall(refinements[0]) if refinements else []
+    return f"n%3A{nodes[-1]}" if nodes else None
+
+
+def extract_category_links(soup, page_url: str) -> list[dict[str, Any]]:
+    """
+    Browse nodes listed under the page's "Department" refinements. Each one's
+    page lists its own children, so all are marked departments.
+    """
+    departments = soup.find("div", id="departments")
+    if departments is None:
+        return []
+    links = []
+    for link in departments.find_all("a", href=True):
+        node = browse_node(link["href"])
+        name = link.get_text(" ", strip=True)
+        if node and name:
+            links.append(
+                {
+                    "name": name,
+                    "node": node,
+                    "url_template": urljoin(
+                        page_url, BROWSE_NODE_PATH.format(node, "{}")
+                    ),
+                    "department": True,
+                }
+            )
+    return links
+
+
+def is_product_entry(url: str, has_image: bool = False) -> bool:
+    """Whether a sitemap URL is a product page."""
+    return "/dp/" in urlsplit(url).path
+
+
+def extract_result_count(soup) -> int | None:
+    """The listing's result count ("1-48 of over 3,000 results for ..."), a lower bound."""
+    info_bar = soup.find("span", attrs={"data-component-type": "s-result-info-bar"})
+    match = (
+        _RESULT_COUNT_PATTERN.search(info_bar.get_text(" ", strip=True))
+        if info_bar
+        else None
+    )
+    return int(match.group(1).replace(",", "")) if match else None
 
 
-def sanitize_filename(filename: str) -> str:
-    """Removes illegal characters from a filename and truncates it."""
-    # Remove characters that are illegal chars from filenames
-    sanitized = re.sub(r'[\\/*?:"<>|]', "", filename)
-    # Replace multiple spaces/newlines with a single underscore
-    sanitized = re.sub(r"\s+", "_", sanitized)
-    return sanitized[: MAX_FILE_LENGTH - 5]  # reserve space for image extensions
+PAGINATION = NextLinkPagination(
+    next_link=lambda soup: soup.find("a", class_="s-pagination-next"),
+    disabled_class="s-pagination-disabled",
+    stop_when=has_no_results,
+)
 
 
-def load_headers(headers_path: str) -> Dict[str, str]:
+def load_headers(headers_path: str) -> dict[str, str]:
     """Loads headers from a JSON file."""
     try:
         with open(headers_path) as header_file:
@@ -78,18 +169,7 @@ def load_headers(headers_path: str) -> Dict[str, str]:
         return {}
 
 
-def create_directory_if_not_exists(dir_path: str):
-    """Creates a directory if it doesn't exist."""
-    if not os.path.exists(dir_path):
-        try:
-            os.makedirs(dir_path)
-            log.info(f"Created directory: {dir_path}")
-        except OSError as e:
-            log.error(f"Failed to create directory {dir_path}: {e}")
-            raise
-
-
-def insert_products_into_db(product_list: List[Dict[str, Any]], db_path: str):
+def insert_products_into_db(product_list: list[dict[str, Any]], db_path: str):
     """Inserts a list of product dictionaries into the SQLite database."""
     if not product_list:
         log.info("No products to insert into the database.")
@@ -155,42 +235,250 @@ def insert_products_into_db(product_list: List[Dict[str, Any]], db_path: str):
             log.info(f"Database connection closed for {db_path}")
 
 
-def download_image(image_url: str, image_path: str, timeout: int = 20):
-    """Downloads an image from a URL and saves it to a path."""
+def clean_product_url(link: str) -> str:
+    """Makes a product link absolute and strips tracking parameters."""
+    if "/sspa/click" in link:
+        # Sponsored slots link through a click tracker; the product is in `url`.
+        target = parse_qs(urlsplit(link).query).get("url")
+        if target:
+            link = target[0]
+    if link.startswith("/"):
+        link = "https://www.amazon.eg" + link
+    link = link.split("/ref=")[0]
+    return link.split("?")[0]
+
+
+def extract_price(element) -> str:
+    """The first `a-price` inside `element`, as "1299.00", or "N/A"."""
+    price_div = element.find("span", class_="a-price")
+    if not price_div:
+        return "N/A"
+    whole_price = price_div.find("span", class_="a-price-whole")
+    fraction_price = price_div.find("span", class_="a-price-fraction")
+    if whole_price:
+        price = whole_price.text.strip().replace(",", "")
+        if fraction_price:
+            price += fraction_price.text.strip()
+        return price
+    price_text_span = price_div.find("span", class_="a-offscreen")
+    return price_text_span.text.strip() if price_text_span else "N/A"
+
+
+def extract_product_fields(
+    div,
+) -> tuple[str, str, str, str | None, str | None]:
+    """Extracts (title, price, link, image_url, asin) from a search result card."""
+    title, price, link, image_url = "N/A", "N/A", "N/A", None
+
+    # Title
+    title_element = div.find("h2")
+    if title_element:
+        title_span = title_element.find("span", class_="a-text-normal")
+        if title_span:
+            title = title_span.text.strip()
+        else:
+            title = title_element.text.strip()
+    if title == "N/A":
+        log.warning(
+            "Title not found in product div.",
+            extra=rate_limit(MISSING_FIELD_LOGS_PER_SECOND),
+        )
+
+    # Price
+    price = extract_price(div)
+    if price == "N/A":
+        log.info(
+            "Price not found for product '%.30s...'",
+            title,
+            extra=rate_limit(MISSING_FIELD_LOGS_PER_SECOND),
+        )
+
+    # Link
+    link_element = div.find("a", class_="a-link-normal", href=True)
+    if link_element and link_element["href"].startswith("/"):
+        link = clean_product_url(link_element["href"])
+    if link == "N/A":
+        log.warning(
+            "Link not found for product '%.30s...'",
+            title,
+            extra=rate_limit(MISSING_FIELD_LOGS_PER_SECOND),
+        )
+
+    # Image
+    image_element = div.find("img", class_="s-image")
+    if image_element and "src" in image_element.attrs:
+        image_url = image_element["src"]
     if not image_url:
         log.warning(
-            f"Skipping download for empty image URL (intended path: {image_path})"
+            "Image URL not found for product '%.30s...'",
+            title,
+            extra=rate_limit(MISSING_FIELD_LOGS_PER_SECOND),
         )
-        return
-    try:
-        if os.path.exists(image_path):
-            return
+
+    return title, price, link, image_url, div.get("data-asin") or None
+
+
+def build_product_record(
+    title: str,
+    price: str,
+    link: str,
+    image_url: str | None,
+    image_dir: str,
+    category_name: str,
+    asin: str | None = None,
+) -> dict[str, Any]:
+    """Builds the standardized product record returned to the service."""
+    sanitized_title = sanitize_filename(title)
+    image_filename = f"{sanitized_title}.jpg"
+    return {
+        "product_title": title,
+        "product_url": link,
+        "product_id": canonical_product_id("Amazon", link, asin),
+        "product_image_url": image_url,
+        "product_image_local_path": os.path.join(image_dir, image_filename),
+        "platform": "Amazon",
+        "price": price,
+        "category": category_name,
+    }
+
+
+def extract_page(soup, category_name: str, image_dir: str) -> list[dict[str, Any]]:
+    """Extracts product records from a search results page, JSON-LD first."""
+    structured_products = extract_json_ld_products(soup)
+    if structured_products:
+        log.debug("Using %d JSON-LD products.", len(structured_products))
+        product_fields = [
+            (
+                p["title"],
+                p["price"],
+                clean_product_url(p["url"]),
+                p["image_url"],
+                p["sku"],
+            )
+            for p in structured_products
+        ]
+    else:
+        product_fields = [
+            extract_product_fields(div)
+            for div in soup.find_all("div", {"data-component-type": "s-search-result"})
+        ]
+
+    if not product_fields:
+        log.warning(
+            f"Could not find product divs with 'data-component-type' for {category_name}. Checking layout."
+        )
+
+    products = []
+    for title, price, link, image_url, asin in product_fields:
+        if title != "N/A" and link != "N/A":
+            log.info(
+                "Found: %.50s... | Price: %s",
+                title,
+                price,
+                extra=sample(PRODUCT_LOG_EVERY),
+            )
+            products.append(
+                build_product_record(
+                    title, price, link, image_url, image_dir, category_name, asin
+                )
+            )
         else:
-            response = requests.get(image_url, timeout=timeout, stream=True)
-            response.raise_for_status()
-            with open(image_path, "wb") as file:
-                for chunk in response.iter_content(chunk_size=8192):
-                    file.write(chunk)
-
-    except requests.exceptions.RequestException as e:
-        log.warning(f"Failed to download image {image_url}: {e}")
-    except IOError as e:
-        log.error(f"Failed to write image to {image_path}: {e}")
-    except Exception as e:
-        log.error(f"An unexpected error occurred downloading {image_url}: {e}")
+            log.warning(
+                "Skipping product due to missing title or link.",
+                extra=rate_limit(MISSING_FIELD_LOGS_PER_SECOND),
+            )
+    return products
+
+
+def extract_product_page(
+    soup, product_url: str, category_name: str, image_dir: str = DEFAULT_IMAGE_DIR
+) -> dict[str, Any] | None:
+    """
+    Extracts the record of one product detail page (for a targeted price
+    refresh), JSON-LD first; None when the page shows no price.
+    """
+    structured_products = extract_json_ld_products(soup)
+    if structured_products:
+        p = structured_products[0]
+        return build_product_record(
+            p["title"],
+            p["price"],
+            product_url,
+            p["image_url"],
+            image_dir,
+            category_name,
+            p["sku"],
+        )
+
+    title_element = soup.find("span", id="productTitle")
+    price = extract_price(soup)
+    if not title_element or price == "N/A":
+        log.warning(f"No title or price on product page {product_url}.")
+        return None
+    image_element = soup.find("img", id="landingImage")
+    asin_element = soup.find("input", id="ASIN")
+    return build_product_record(
+        title_element.text.strip(),
+        price,
+        product_url,
+        image_element.get("src") if image_element else None,
+        image_dir,
+        category_name,
+        asin_element.get("value") if asin_element else None,
+    )
+
+
+def build_pipeline(
+    image_dir: str = DEFAULT_IMAGE_DIR,
+    max_workers: int | None = None,
+    req_timeout: int = 20,
+    max_retries: int = 5,
+    retry_delay: float = 0.5,
+    partial_parse: bool = True,
+    trace: JobTrace | None = None,
+    download_images: bool = True,
+    headers: dict[str, str] | None = None,
+    raw_archive: RawPageWriter | None = None,
+    budget: CrawlBudget | None = None,
+    exporter: Exporter | None = None,
+) -> ScrapePipeline:
+    """Builds the Amazon pipeline; headers default to the shared headers file."""
+    return ScrapePipeline(
+        "Amazon",
+        PAGE_REGIONS,
+        lambda soup, category_name: extract_page(soup, category_name, image_dir),
+        PAGINATION,
+        headers=headers if headers is not None else load_headers(DEFAULT_HEADERS_PATH),
+        max_workers=max_workers,
+        req_timeout=req_timeout,
+        max_retries=max_retries,
+        retry_delay=retry_delay,
+        partial_parse=partial_parse,
+        download_images=download_images,
+        trace=trace,
+        raw_archive=raw_archive,
+        budget=budget,
+        on_batch=exporter.on_batch if exporter is not None else None,
+    )
 
 
 def scrape_categories(
-    categories: List[Dict[str, str]],
-    headers: Dict[str, str],
+    categories: list[dict[str, str]],
+    headers: dict[str, str],
     db_path: str = DEFAULT_DB_PATH,
     image_dir: str = DEFAULT_IMAGE_DIR,
     base_url: str = DEFAULT_BASE_URL,
-    max_workers: Optional[int] = None,
+    max_workers: int | None = None,
     req_timeout: int = 20,
     max_retries: int = 5,
     retry_delay: float = 0.5,
-) -> List[Dict[str, Any]]:
+    partial_parse: bool = True,
+    trace: JobTrace | None = None,
+    raw_archive: RawPageWriter | None = None,
+    budget: CrawlBudget | None = None,
+    download_images: bool = True,
+    exporter: Exporter | None = None,
+) -> list[dict[str, Any]]:
     """
     Scrapes Amazon product listings for given categories.
 
@@ -204,14 +492,16 @@ def scrape_categories(
         req_timeout: Timeout in seconds for HTTP requests.
         max_retries: Maximum number of retries for failed HTTP requests.
         retry_delay: Delay in seconds between retries.
+        partial_parse: Only materialize result cards and pagination instead of the whole page.
+        trace: Optional job trace receiving fetch/parse/extract/image download spans.
+        raw_archive: Optional writer keeping each fetched listing page for re-extraction.
+        budget: Optional job/category deadlines, page limit and hedged fetches.
+        download_images: Download product images; off for quick price snapshots.
+        exporter: Optional exporter receiving each page's products as they arrive; the caller closes it.
 
     Returns:
         A list of dictionaries, each containing details of a scraped product.
     """
-    scraped_products: List[Dict[str, Any]] = []
-    num_workers = get_num_workers(max_workers)
-    log.info(f"Using {num_workers} workers for concurrent tasks.")
-
     create_directory_if_not_exists(image_dir)
     log.info(f"Ensured image directory exists: {image_dir}")
 
@@ -219,200 +509,25 @@ def scrape_categories(
         log.error("No headers provided. Scraping will likely fail. Aborting.")
         return []
 
-    with ThreadPoolExecutor(max_workers=num_workers) as executor:
-        futures = []
-
-        for category_dict in categories:
-            for category_id, category_name in category_dict.items():
-                log.info(f"Processing category: {category_name} (ID: {category_id})")
-                page = 1
-                while True:
-                    url = base_url.format(category_id, page)
-                    log.info(f"Scraping URL: {url} (Page: {page})")
-
-                    response = None
-                    for attempt in range(max_retries):
-                        try:
-                            response = requests.get(
-                                url, headers=headers, timeout=req_timeout
-                            )
-                            response.raise_for_status()
-                            log.debug(
-                                f"Successfully fetched {url} (status: {response.status_code})"
-                            )
-                            break
-                        except requests.exceptions.Timeout:
-                            log.warning(
-                                f"Request timed out for {url} (Attempt {attempt + 1}/{max_retries})"
-                            )
-                        except requests.exceptions.RequestException as e:
-                            log.warning(
-                                f"Request failed for {url} (Attempt {attempt + 1}/{max_retries}): {e}"
-                            )
-
-                        if attempt < max_retries - 1:
-                            time.sleep(retry_delay * (attempt + 1))
-                        else:
-                            log.error(
-                                f"Max retries reached for {url}. Skipping this page."
-                            )
-                            response = None
-                            break
-
-                    if response is None:
-                        break
-
-                    soup = BeautifulSoup(response.content, "html.parser")
-
-                    no_results_element = soup.find("div", class_="s-no-results")
-                    if (
-                        no_results_element
-                        and "No results for" in no_results_element.get_text(strip=True)
-                    ):
-                        log.info(
-                            f"No more results found for category '{category_name}' on page {page}."
-                        )
-                        break
-
-                    product_divs = soup.find_all(
-                        "div", {"data-component-type": "s-search-result"}
-                    )
-
-                    if not product_divs:
-                        log.warning(
-                            f"Could not find product divs with 'data-component-type' on page {page} for {category_name}. Checking layout."
-                        )
-
-                        next_page_link = soup.find("a", class_="s-pagination-next")
-                        if (
-                            not next_page_link
-                            or "s-pagination-disabled"
-                            in next_page_link.get("class", [])
-                        ):
-                            log.info(
-                                f"Reached end of results (or empty page with no next button) for {category_name} on page {page}."
-                            )
-                            break
-                        else:
-                            log.warning(
-                                f"No product divs found, but 'next page' exists. Layout might have changed. Skipping page {page}."
-                            )
-                            page += 1
-                            continue  # continue to the next page
-
-                    log.info(
-                        f"Found {len(product_divs)} potential products on page {page}."
-                    )
-
-                    for div in product_divs:
-                        title, price, link, image_url = "N/A", "N/A", "N/A", None
-
-                        # Title
-                        title_element = div.find("h2")
-                        if title_element:
-                            title_span = title_element.find(
-                                "span", class_="a-text-normal"
-                            )
-                            if title_span:
-                                title = title_span.text.strip()
-                            else:
-                                title = title_element.text.strip()
-                        if title == "N/A":
-                            log.warning("Title not found in product div.")
-
-                        # Price
-                        price_div = div.find("span", class_="a-price")
-                        if price_div:
-                            whole_price = price_div.find("span", class_="a-price-whole")
-                            fraction_price = price_div.find(
-                                "span", class_="a-price-fraction"
-                            )
-                            if whole_price:
-                                price = whole_price.text.strip().replace(",", "")
-                                if fraction_price:
-                                    price += fraction_price.text.strip()
-                            else:
-                                price_text_span = price_div.find(
-                                    "span", class_="a-offscreen"
-                                )
-                                if price_text_span:
-                                    price = price_text_span.text.strip()
-                        if price == "N/A":
-                            log.info(f"Price not found for product '{title[:30]}...'")
-
-                        # Link
-                        link_element = div.find("a", class_="a-link-normal", href=True)
-                        if link_element and link_element["href"].startswith("/"):
-                            link = "https://www.amazon.eg" + link_element["href"]
-
-                            # Clean up URL parameters
-                            link = link.split("/ref=")[0]
-                            link = link.split("?")[0]
-                        if link == "N/A":
-                            log.warning(f"Link not found for product '{title[:30]}...'")
-
-                        # Image
-                        image_element = div.find("img", class_="s-image")
-                        if image_element and "src" in image_element.attrs:
-                            image_url = image_element["src"]
-                        if not image_url:
-                            log.warning(
-                                f"Image URL not found for product '{title[:30]}...'"
-                            )
-
-                        if title != "N/A" and link != "N/A":
-                            log.info(f"Found: {title[:50]}... | Price: {price}")
-                            sanitized_title = sanitize_filename(title)
-                            image_filename = f"{sanitized_title}.jpg"
-                            image_path = os.path.join(image_dir, image_filename)
-
-                            # Standardized product data structure
-                            product_data = {
-                                "product_title": title,
-                                "product_url": link,
-                                "product_image_url": image_url,
-                                "product_image_local_path": image_path,
-                                "platform": "Amazon",
-                                "price": price,
-                                "category": category_name,
-                            }
-                            scraped_products.append(product_data)
-
-                            if image_url:
-                                futures.append(
-                                    executor.submit(
-                                        download_image,
-                                        image_url,
-                                        image_path,
-                                        req_timeout,
-                                    )
-                                )
-                        else:
-                            log.warning(
-                                "Skipping product due to missing title or link."
-                            )
-
-                    next_page_link = soup.find("a", class_="s-pagination-next")
-                    if (
-                        not next_page_link
-                        or "s-pagination-disabled" in next_page_link.get("class", [])
-                    ):
-                        log.info(
-                            f"No 'next page' button found or it's disabled. End of results for {category_name}."
-                        )
-                        break
-                    else:
-                        page += 1
-                        # time.sleep(0.5)
-
-            log.info(f"Finished processing category: {category_name}")
-
-    # Wait for all downloads to complete
-    for future in concurrent.futures.as_completed(futures):
-        try:
-            future.result()
-        except Exception as exc:
-            log.error(f"Image download generated an exception: {exc}")
+    pipeline = build_pipeline(
+        image_dir,
+        max_workers,
+        req_timeout,
+        max_retries,
+        retry_delay,
+        partial_parse,
+        trace,
+        download_images,
+        headers=headers,
+        raw_archive=raw_archive,
+        budget=budget,
+        exporter=exporter,
+    )
+    scraped_products = pipeline.run(
+        (category_name, base_url.format(category_id, "{}"))
+        for category_dict in categories
+        for category_id, category_name in category_dict.items()
+    )
 
     log.info(
         f"Scraping complete. Found {len(scraped_products)} products across all categories."
@@ -439,6 +554,7 @@ def scrape_categories(
 
 
 if __name__ == "__main__":
+    configure_logging()
     log.info("Running Amazon scraper script directly...")
 
     CONFIG_HEADERS_PATH = os.path.join(os.path.dirname(__file__), "..", "headers.json")
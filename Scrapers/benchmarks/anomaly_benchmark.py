@@ -0,0 +1,103 @@
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import time
+from typing import Any
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.anomalies import PriceAnomalyFilter
+
+log = logging.getLogger(__name__)
+
+
+def build_batch(
+    size: int, categories: int, history_rate: float, anomaly_rate: float
+) -> tuple[list[dict[str, Any]], dict[tuple[str, str], float], set[int]]:
+    """
+    Priced records with a log-normal spread per category, a last known price
+    for part of them, and injected errors: accessory prices on a product
+    card, "1" placeholders and extra-digit prices.
+    """
+    rng = random.Random(0)  # noqa: S311
+    medians = [rng.uniform(200, 40000) for _ in range(categories)]
+    records, history, injected = [], {}, set()
+    for i in range(size):
+        category = i % categories
+        price = medians[category] * rng.lognormvariate(0, 0.5)
+        url = f"https://www.jumia.com.eg/product-{i}.html"
+        known = rng.random() < history_rate
+        if known:
+            history[("Jumia", url)] = round(price * rng.uniform(0.8, 1.2), 2)
+        if rng.random() < anomaly_rate:
+            kind = rng.choice(["accessory", "placeholder", "extra_digit"])
+            if kind == "accessory" and not known:
+                price = price / 60
+            elif kind == "placeholder":
+                price = 1
+            elif kind == "extra_digit" and known:
+                price = price * 10
+            else:
+                kind = None
+            if kind:
+                injected.add(i)
+        records.append(
+            {
+                "product_title": f"Product {i}",
+                "product_price": f"EGP {price:,.2f}",
+                "product_url": url,
+                "platform": "Jumia",
+                "category": f"category-{category}",
+            }
+        )
+    return records, history, injected
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure the vectorized price anomaly check on a large batch."
+    )
+    parser.add_argument("--records", type=int, default=100_000)
+    parser.add_argument("--categories", type=int, default=40)
+    parser.add_argument("--history-rate", type=float, default=0.7)
+    parser.add_argument("--anomaly-rate", type=float, default=0.01)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    records, history, injected = build_batch(
+        args.records, args.categories, args.history_rate, args.anomaly_rate
+    )
+    numeric = [
+        {**record, "product_price": float(record["product_price"][4:].replace(",", ""))}
+        for record in records
+    ]
+    anomaly_filter = PriceAnomalyFilter(db_path=os.devnull)
+
+    for name, batch in (("price text", records), ("numeric prices", numeric)):
+        durations = []
+        for _ in range(args.repeats):
+            start = time.perf_counter()
+            anomalies = anomaly_filter.check(batch, history)
+            durations.append(time.perf_counter() - start)
+        flagged = {i for i, anomaly in enumerate(anomalies) if anomaly is not None}
+        reasons: dict[str, int] = {}
+        for i in flagged:
+            reasons[anomalies[i]["reason"]] = reasons.get(anomalies[i]["reason"], 0) + 1
+        log.info(
+            f"{name:<15} {len(batch)} records: median {statistics.median(durations) * 1000:.1f} ms, "
+            f"flagged {len(flagged)} {reasons}"
+        )
+    caught = len(flagged & injected)
+    log.info(
+        f"Injected {len(injected)} errors: caught {caught} ({caught / len(injected):.0%}), "
+        f"false positives {len(flagged - injected)} ({len(flagged - injected) / len(records):.2%} of records)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+import argparse
+import logging
+import os
+import random
+import sys
+import time
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.brands import BrandTagger, get_brand_tagger
+
+log = logging.getLogger(__name__)
+
+WORDS = [
+    "Laptop", "Smartphone", "Smart TV", "Monitor", "Wireless", "Headphones", "Tablet",
+    "Gaming", "Core i7", "16GB RAM", "512GB SSD", "4K UHD", "Black", "Silver", "Pro",
+    "Bluetooth", "Charger", "USB-C", "Cable", "Portable", "Speaker", "Camera",
+]  # fmt: skip
+
+
+def synthetic_titles(brands: list[str], count: int, seed: int = 0) -> list[str]:
+    """Titles of 6-14 words, the brand usually first and sometimes missing."""
+    rng = random.Random(seed)  # noqa: S311
+    titles = []
+    for index in range(count):
+        words = [rng.choice(WORDS) for _ in range(rng.randint(5, 13))]
+        roll = rng.random()
+        if roll < 0.7:
+            words.insert(0, rng.choice(brands))
+        elif roll < 0.9:
+            words.insert(rng.randint(1, len(words)), rng.choice(brands).upper())
+        words.append(f"Model {index}")
+        titles.append(" ".join(words))
+    return titles
+
+
+def naive_extract(brands: list[str], title: str) -> str | None:
+    """Baseline: scans the title once per brand."""
+    text = title.casefold()
+    best = None
+    for brand in brands:
+        key = brand.casefold()
+        start = text.find(key)
+        while start != -1:
+            end = start + len(key)
+            if (start == 0 or not text[start - 1].isalnum()) and (
+                end == len(text) or not text[end].isalnum()
+            ):
+                if (
+                    best is None
+                    or start < best[0]
+                    or (start == best[0] and end > best[1])
+                ):
+                    best = (start, end, brand)
+                break
+            start = text.find(key, start + 1)
+    return best[2] if best else None
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure brand tagging throughput over synthetic product titles."
+    )
+    parser.add_argument("--titles", type=int, default=100_000)
+    parser.add_argument(
+        "--baseline-titles",
+        type=int,
+        default=10_000,
+        help="Titles to run the per-brand baseline on (0 to skip).",
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    start = time.perf_counter()
+    tagger: BrandTagger = get_brand_tagger()
+    build_ms = (time.perf_counter() - start) * 1000
+    log.info(f"Compiled {len(tagger.brands)} brands in {build_ms:.1f} ms")
+
+    titles = synthetic_titles(tagger.brands, args.titles, args.seed)
+    products = [{"product_title": title} for title in titles]
+
+    start = time.perf_counter()
+    tagged = tagger.tag(products)
+    elapsed = time.perf_counter() - start
+    log.info(
+        f"Aho-Corasick: {len(titles)} titles in {elapsed:.2f}s "
+        f"({len(titles) / elapsed:,.0f} titles/s), {tagged} tagged"
+    )
+
+    if args.baseline_titles:
+        sample = titles[: args.baseline_titles]
+        start = time.perf_counter()
+        mismatches = sum(
+            naive_extract(tagger.brands, title) != product["brand"]
+            for title, product in zip(sample, products)
+        )
+        baseline = time.perf_counter() - start
+        log.info(
+            f"Per-brand scan: {len(sample)} titles in {baseline:.2f}s "
+            f"({len(sample) / baseline:,.0f} titles/s), "
+            f"{len(titles) / elapsed / (len(sample) / baseline):.1f}x slower, "
+            f"{mismatches} disagreements"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.tail_latency_benchmark import start_tail_server
+from common import events as job_events
+from common.events import JobEvents, format_sse
+from common.tracing import JobTrace
+from jumia import jumia_scraper
+
+log = logging.getLogger(__name__)
+
+
+def crawl(base_url: str, args, events: JobEvents | None) -> int:
+    pipeline = jumia_scraper.build_pipeline(
+        download_images=False, trace=JobTrace("bench", events)
+    )
+    records = pipeline.run(
+        [
+            (f"bench_{i}", f"{base_url}/bench_{i}/?page={{}}")
+            for i in range(args.categories)
+        ]
+    )
+    if events is not None:
+        events.publish(job_events.FINISHED, products=len(records))
+    return len(records)
+
+
+async def fast_subscriber(events: JobEvents, seen: dict[str, int]):
+    """Formats every event as SSE, products included, like a dashboard client."""
+    async for event in events.subscribe():
+        if event is None:
+            continue
+        seen["bytes"] += len(format_sse(event))
+        seen["events"] += 1
+        if event["type"] == job_events.PRODUCTS:
+            seen["products"] += len(event["records"])
+        if event["type"] == job_events.GAP:
+            seen["missed"] += event["missed"]
+
+
+async def stalled_subscriber(events: JobEvents, seen: dict[str, int]):
+    """Reads a little, then stops reading (a client that hangs mid-stream)."""
+    async for event in events.subscribe():
+        if event is None:
+            continue
+        seen["events"] += 1
+        await asyncio.sleep(0.5)
+
+
+async def run_mode(base_url: str, args, mode: str):
+    events = None if mode == "no events" else JobEvents(args.max_events)
+    seen = {"events": 0, "products": 0, "missed": 0, "bytes": 0}
+    subscribers = []
+    if mode in ("fast subscriber", "both"):
+        subscribers.append(asyncio.create_task(fast_subscriber(events, seen)))
+    if mode in ("stalled subscriber", "both"):
+        subscribers.append(asyncio.create_task(stalled_subscriber(events, {**seen})))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    products = await asyncio.to_thread(crawl, base_url, args, events)
+    seconds = time.perf_counter() - start
+    for task in subscribers:
+        task.cancel()
+    await asyncio.gather(*subscribers, return_exceptions=True)
+    return seconds, products, seen
+
+
+async def run(base_url: str, args):
+    log.info(
+        f"{'mode':<20} {'seconds':>8} {'products':>9} {'events':>7} "
+        f"{'streamed':>9} {'missed':>7} {'MB':>6}"
+    )
+    for mode in (
+        "no events",
+        "no subscriber",
+        "fast subscriber",
+        "stalled subscriber",
+        "both",
+    ):
+        durations = []
+        for _ in range(args.repeats):
+            seconds, products, seen = await run_mode(base_url, args, mode)
+            durations.append(seconds)
+        log.info(
+            f"{mode:<20} {min(durations):>8.2f} {products:>9} {seen['events']:>7} "
+            f"{seen['products']:>9} {seen['missed']:>7} {seen['bytes'] / 1e6:>6.1f}"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure crawl time with fast, stalled and no progress event subscribers."
+    )
+    parser.add_argument("--categories", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.005)
+    parser.add_argument("--max-events", type=int, default=2000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    for noisy in ("common", "jumia"):
+        logging.getLogger(noisy).setLevel(logging.ERROR)
+    server = start_tail_server(args.pages, args.latency, 0.0, 0.0)
+    asyncio.run(run(f"http://127.0.0.1:{server.server_address[1]}", args))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from typing import Any
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.exporters import open_exporter
+
+log = logging.getLogger(__name__)
+
+# (name, file name); the format and compression follow the extension.
+STREAMING_TARGETS = [
+    ("csv", "export.csv"),
+    ("csv+gzip", "export.csv.gz"),
+    ("ndjson", "export.ndjson"),
+    ("ndjson+zstd", "export.ndjson.zst"),
+    ("parquet", "export.parquet"),
+]
+
+
+def batches(rows: int, per_page: int = 48) -> Iterator[list[dict[str, Any]]]:
+    """
+    Product records in page-sized batches, as the pipeline hands them out.
+    They carry their brand, so the exporters are timed on writing alone
+    (brand_benchmark measures tagging).
+    """
+    for start in range(0, rows, per_page):
+        yield [
+            {
+                "product_title": f"Samsung Smartphone Model {i} 8GB RAM 256GB",
+                "brand": "Samsung",
+                "product_price": f"{i * 100:,}.00",
+                "product_url": f"https://www.jumia.com.eg/product-{i}-{i * 7}.html",
+                "product_id": f"jumia:{i}",
+                "product_image_url": f"https://eg.jumia.is/p/{i}.jpg",
+                "product_image_local_path": f"images/Samsung_Smartphone_Model_{i}.jpg",
+                "platform": "Jumia",
+                "category": "Mobile Phones",
+            }
+            for i in range(start, min(start + per_page, rows))
+        ]
+
+
+def stream_export(path: str, rows: int):
+    with open_exporter(path) as exporter:
+        for batch in batches(rows):
+            exporter.on_batch("bench", batch)
+
+
+def dataframe_export(path: str, rows: int):
+    """The old path: collect the whole run, build a DataFrame, write it at once."""
+    import pandas as pd
+
+    data = [record for batch in batches(rows) for record in batch]
+    frame = pd.DataFrame(data)
+    try:
+        frame.to_excel(path + ".xlsx", index=False, engine="openpyxl")
+    except ImportError:
+        # openpyxl missing: the same collect-then-write path, to CSV.
+        frame.to_csv(path + ".csv", index=False)
+
+
+def measure(export: Callable[[str, int], None], path: str, rows: int) -> dict:
+    start = time.perf_counter()
+    export(path, rows)
+    seconds = time.perf_counter() - start
+    tracemalloc.start()
+    export(path, rows)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    size = sum(
+        os.path.getsize(os.path.join(os.path.dirname(path), name))
+        for name in os.listdir(os.path.dirname(path))
+        if name.startswith(os.path.basename(path))
+    )
+    return {"seconds": seconds, "peak_mb": peak / 2**20, "size_mb": size / 2**20}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Compare the streaming CSV/NDJSON/Parquet exporters with collecting a "
+            "run and writing it through a pandas DataFrame."
+        )
+    )
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("common").setLevel(logging.WARNING)
+    try:
+        import openpyxl  # noqa: F401
+
+        baseline = "dataframe xlsx"
+    except ImportError:
+        baseline = "dataframe csv"
+
+    log.info(f"{args.rows} records")
+    log.info(f"{'target':<16} {'seconds':>8} {'peak MB':>8} {'file MB':>8}")
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {
+            baseline: measure(dataframe_export, os.path.join(tmp, "frame"), args.rows)
+        }
+        for name, file_name in STREAMING_TARGETS:
+            results[name] = measure(
+                stream_export, os.path.join(tmp, file_name), args.rows
+            )
+    for name, result in results.items():
+        log.info(
+            f"{name:<16} {result['seconds']:>8.2f} {result['peak_mb']:>8.1f} "
+            f"{result['size_mb']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
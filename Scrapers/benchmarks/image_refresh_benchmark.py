@@ -0,0 +1,146 @@
+import argparse
+import hashlib
+import logging
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.imagemanifest import ImageManifest
+from common.pipeline import download_image
+
+log = logging.getLogger(__name__)
+
+
+class ImageServer:
+    """Serves versioned images with ETag/Last-Modified and honours conditional GETs."""
+
+    def __init__(self, images: int, image_kb: int):
+        self.versions = [0] * images
+        self.image_kb = image_kb
+        self.bytes_sent = 0
+        self.responses: dict[int, int] = {}
+        self._lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                index = int(self.path.strip("/").split(".")[0])
+                version = server.versions[index]
+                etag = f'"{index}-{version}"'
+                if self.headers.get("If-None-Match") == etag:
+                    server.respond(self, 304, etag, version, b"")
+                    return
+                body = server.image(index, version)
+                server.respond(self, 200, etag, version, body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def image(self, index: int, version: int) -> bytes:
+        seed = hashlib.sha256(f"{index}:{version}".encode()).digest()
+        return seed * (self.image_kb * 1024 // len(seed))
+
+    def respond(self, handler, status: int, etag: str, version: int, body: bytes):
+        handler.send_response(status)
+        handler.send_header("ETag", etag)
+        handler.send_header(
+            "Last-Modified", formatdate(1_700_000_000 + version, usegmt=True)
+        )
+        handler.send_header("Content-Type", "image/jpeg")
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+        with self._lock:
+            self.bytes_sent += len(body)
+            self.responses[status] = self.responses.get(status, 0) + 1
+
+    def reset_counters(self):
+        with self._lock:
+            self.bytes_sent = 0
+            self.responses = {}
+
+
+def crawl(
+    server: ImageServer, image_dir: str, manifest: ImageManifest | None, workers: int
+):
+    urls: list[str] = [
+        f"{server.base_url}/{i}.jpg" for i in range(len(server.versions))
+    ]
+    server.reset_counters()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(
+            executor.map(
+                lambda url: download_image(
+                    url,
+                    os.path.join(image_dir, url.rsplit("/", 1)[-1]),
+                    manifest=manifest,
+                ),
+                urls,
+            )
+        )
+    return time.perf_counter() - start, server.bytes_sent, dict(server.responses)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare a manifest revalidation pass with a cold image download."
+    )
+    parser.add_argument("--images", type=int, default=2000)
+    parser.add_argument("--image-kb", type=int, default=40)
+    parser.add_argument("--change-rate", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=8)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    server = ImageServer(args.images, args.image_kb)
+    rng = random.Random(0)  # noqa: S311
+
+    with tempfile.TemporaryDirectory() as tmp:
+        image_dir = os.path.join(tmp, "images")
+        os.makedirs(image_dir)
+        # Max age 0: every image already on disk is revalidated.
+        manifest = ImageManifest(os.path.join(tmp, "manifest.db"), max_age_seconds=0)
+
+        results = [("cold", crawl(server, image_dir, manifest, args.workers))]
+        for index in rng.sample(
+            range(args.images), int(args.images * args.change_rate)
+        ):
+            server.versions[index] += 1
+        results.append(("revalidate", crawl(server, image_dir, manifest, args.workers)))
+        shutil.rmtree(image_dir)
+        os.makedirs(image_dir)
+        results.append(("wipe", crawl(server, image_dir, None, args.workers)))
+
+        changed = sum(1 for version in server.versions if version)
+        log.info(
+            f"{args.images} images of {args.image_kb} KB, {changed} changed before the refresh"
+        )
+        log.info(f"{'pass':<11} {'seconds':>8} {'MB sent':>8} {'200':>6} {'304':>6}")
+        cold_bytes = results[0][1][1]
+        for name, (seconds, sent, responses) in results:
+            log.info(
+                f"{name:<11} {seconds:>8.2f} {sent / 1e6:>8.1f} {responses.get(200, 0):>6} "
+                f"{responses.get(304, 0):>6}  ({sent / cold_bytes:.0%} of cold)"
+            )
+        log.info(f"Manifest: {manifest.stats()}")
+    server.httpd.shutdown()
+
+
+if __name__ == "__main__":
+    main()
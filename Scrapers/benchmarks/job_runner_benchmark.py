@@ -0,0 +1,128 @@
+import argparse
+import asyncio
+import importlib.util
+import logging
+import os
+import sys
+import tempfile
+import time
+
+import httpx
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.tail_latency_benchmark import percentile, start_tail_server
+from common.deadlines import CrawlBudget
+from common.events import JobEvents
+from common.tracing import JobTrace
+from jumia import jumia_scraper
+
+log = logging.getLogger(__name__)
+
+SCRAPERS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def load_service():
+    spec = importlib.util.spec_from_file_location(
+        "scraper_service", os.path.join(SCRAPERS_DIR, "scraper-service.py")
+    )
+    service = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(service)
+    return service
+
+
+def crawl_job(service, base_url: str, categories: int, events: JobEvents | None = None):
+    """A Jumia crawl against the local server, cancellable like a service job."""
+    budget = CrawlBudget()
+    service.running_budgets.add(budget)
+    try:
+        pipeline = jumia_scraper.build_pipeline(
+            download_images=False, budget=budget, trace=JobTrace("bench", events)
+        )
+        records = pipeline.run(
+            [
+                (f"bench_{i}", f"{base_url}/bench_{i}/?page={{}}")
+                for i in range(categories)
+            ]
+        )
+        return {"products": len(records)}
+    finally:
+        service.running_budgets.discard(budget)
+
+
+async def poll_status(client: httpx.AsyncClient, requests: int) -> list[float]:
+    latencies = []
+    for _ in range(requests):
+        start = time.perf_counter()
+        response = await client.get("/scrapers/status")
+        latencies.append(time.perf_counter() - start)
+        response.raise_for_status()
+        await asyncio.sleep(0.005)
+    return latencies
+
+
+def report(name: str, latencies: list[float]):
+    log.info(
+        f"{name:<22} p50 {percentile(latencies, 50) * 1000:>6.2f} ms  "
+        f"p99 {percentile(latencies, 99) * 1000:>6.2f} ms  "
+        f"max {max(latencies) * 1000:>6.2f} ms"
+    )
+
+
+async def run(args, service, base_url: str):
+    transport = httpx.ASGITransport(app=service.app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://service"
+    ) as client:
+        async with service.app.router.lifespan_context(service.app):
+            report("idle", await poll_status(client, args.requests))
+
+            # One job per scraper; beyond --max-concurrent they queue.
+            jobs = [
+                service.job_runner.submit(
+                    key, key, crawl_job, service, base_url, args.categories
+                )
+                for key in list(service.scraper_statuses)
+            ]
+            await asyncio.sleep(0.2)
+            log.info(f"Statuses under load: {service.scraper_statuses}")
+            report(
+                f"{len(jobs)} jobs submitted", await poll_status(client, args.requests)
+            )
+
+            drain_start = time.perf_counter()
+        drain_seconds = time.perf_counter() - drain_start
+    log.info(
+        f"Shutdown drained in {drain_seconds:.2f}s: "
+        + ", ".join(f"{job.status} {job.counts}" for job in jobs)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure /scrapers/status latency while jobs crawl, and shutdown drain time."
+    )
+    parser.add_argument("--max-concurrent", type=int, default=2)
+    parser.add_argument("--categories", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--requests", type=int, default=300)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    server = start_tail_server(args.pages, args.latency, 0.0, 0.0)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["JOBS_DB"] = os.path.join(tmp, "jobs.db")
+        os.environ["MAX_CONCURRENT_JOBS"] = str(args.max_concurrent)
+        service = load_service()
+        logging.getLogger().setLevel(logging.WARNING)
+        log.setLevel(logging.INFO)
+        asyncio.run(run(args, service, base_url))
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,213 @@
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Any
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_marketplace import (
+    DRIFTED,
+    IMAGE,
+    LISTING,
+    PLATFORMS,
+    TRUNCATED,
+    FaultProfile,
+    MockMarketplace,
+    category_urls,
+)
+from common.memory import current_rss_mb, peak_rss_mb
+
+log = logging.getLogger(__name__)
+
+MEMORY_SAMPLE_SECONDS = 0.25
+CURVE_POINTS = 8
+
+
+def build_pipeline(platform: str, image_dir: str, download_images: bool):
+    from common.tracing import JobTrace
+
+    trace = JobTrace(platform)
+    if platform == "amazon":
+        from amazon import amazon_scraper
+
+        pipeline = amazon_scraper.build_pipeline(
+            image_dir=image_dir,
+            download_images=download_images,
+            trace=trace,
+            headers={},
+        )
+    elif platform == "jumia":
+        from jumia import jumia_scraper
+
+        pipeline = jumia_scraper.build_pipeline(
+            image_dir=image_dir, download_images=download_images, trace=trace
+        )
+    else:
+        from twoB import twoB_scraper
+
+        pipeline = twoB_scraper.build_pipeline(
+            image_dir=image_dir, download_images=download_images, trace=trace
+        )
+    return pipeline, trace
+
+
+def crawl(platform: str, base_url: str, categories: int, download_images: bool):
+    """Runs in a fresh interpreter so its memory curve belongs to this scraper alone."""
+    logging.getLogger().setLevel(logging.CRITICAL)
+    samples: list[list[float]] = []
+    done = threading.Event()
+    start = time.perf_counter()
+
+    def sample_memory():
+        while not done.is_set():
+            samples.append([round(time.perf_counter() - start, 2), current_rss_mb()])
+            done.wait(MEMORY_SAMPLE_SECONDS)
+
+    threading.Thread(target=sample_memory, daemon=True).start()
+    with tempfile.TemporaryDirectory() as image_dir:
+        pipeline, trace = build_pipeline(platform, image_dir, download_images)
+        products = pipeline.run(category_urls(base_url, platform, categories))
+    seconds = time.perf_counter() - start
+    done.set()
+    breakdown = trace.breakdown()
+    sys.stdout.write(
+        json.dumps(
+            {
+                "seconds": seconds,
+                "products": len(products),
+                "fetches": breakdown["stages"].get("fetch", {}).get("count", 0),
+                "counters": breakdown["counters"],
+                "peak_rss_mb": peak_rss_mb(),
+                "samples": samples,
+            }
+        )
+        + "\n"
+    )
+
+
+def memory_curve(samples: list[list[float]]) -> str:
+    """RSS at evenly spaced points of the run: "48@0s 61@3s ..."."""
+    if not samples:
+        return "-"
+    step = max(1, len(samples) // CURVE_POINTS)
+    points = [*samples[::step][:CURVE_POINTS], samples[-1]]
+    return " ".join(f"{rss:.0f}@{t:.0f}s" for t, rss in points)
+
+
+def run_platform(marketplace: MockMarketplace, platform: str, args) -> dict[str, Any]:
+    since = marketplace.elapsed()
+    completed = subprocess.run(  # noqa: S603 - this script, fixed arguments
+        [
+            sys.executable,
+            os.path.abspath(__file__),
+            "--crawl",
+            platform,
+            "--base-url",
+            marketplace.base_url,
+            "--categories",
+            str(args.categories),
+        ]
+        + (["--images"] if args.images else []),
+        capture_output=True,
+        text=True,
+        check=True,
+        env={**os.environ, "IMAGE_MANIFEST_DB": os.path.join(args.tmp, "manifest.db")},
+    )
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    until = marketplace.elapsed()
+    result["served"] = marketplace.summary(platform, since)
+    result["recovery"] = marketplace.recovery_times(platform, since, until)
+    result["cut_short"] = marketplace.categories_cut_short(platform)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Run the scrapers against a synthetic marketplace at scale with injected "
+            "faults; report throughput, error recovery and memory."
+        )
+    )
+    parser.add_argument("--platforms", default=",".join(PLATFORMS))
+    parser.add_argument("--categories", type=int, default=4)
+    parser.add_argument(
+        "--products", type=int, default=480, help="Per category, at scale 1."
+    )
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--latency", type=float, default=0.02)
+    parser.add_argument("--burst-every", type=float, default=8.0)
+    parser.add_argument("--burst-seconds", type=float, default=1.5)
+    parser.add_argument("--truncate-rate", type=float, default=0.02)
+    parser.add_argument("--drift-rate", type=float, default=0.02)
+    parser.add_argument("--no-padding", action="store_true")
+    parser.add_argument("--images", action="store_true", help="Download images too.")
+    parser.add_argument("--crawl", help=argparse.SUPPRESS)
+    parser.add_argument("--base-url", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.crawl:
+        crawl(args.crawl, args.base_url, args.categories, args.images)
+        return
+
+    products = int(args.products * args.scale)
+    faults = FaultProfile(
+        latency=args.latency,
+        burst_every=args.burst_every,
+        burst_seconds=args.burst_seconds,
+        truncate_rate=args.truncate_rate,
+        drift_rate=args.drift_rate,
+    )
+    marketplace = MockMarketplace(
+        args.categories, products, faults, padding=not args.no_padding
+    ).start()
+    log.info(
+        f"Catalog: {args.categories} categories x {products} products per platform "
+        f"(scale {args.scale:g}). Faults: {args.burst_seconds:g}s 429/503 bursts every "
+        f"{args.burst_every:g}s, {args.truncate_rate:.0%} truncated, "
+        f"{args.drift_rate:.0%} drifted pages."
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        args.tmp = tmp
+        for platform in args.platforms.split(","):
+            result = run_platform(marketplace, platform, args)
+            served = result["served"]
+            expected = marketplace.expected_products(platform)
+            errors = sum(v for k, v in served.items() if k.isdigit())
+            recovery = result["recovery"]
+            log.info(
+                f"{platform}: {result['products']}/{expected} products "
+                f"({result['products'] / expected:.1%}) in {result['seconds']:.1f}s, "
+                f"{result['products'] / result['seconds']:.0f} products/s, "
+                f"{result['fetches'] / result['seconds']:.1f} pages/s, "
+                f"{result['cut_short']}/{args.categories} categories cut short"
+            )
+            log.info(
+                f"  served: {served.get(LISTING, 0)} pages, {served.get(TRUNCATED, 0)} truncated, "
+                f"{served.get(DRIFTED, 0)} drifted, {served.get(IMAGE, 0)} images, "
+                f"{errors} throttled (429 {served.get('429', 0)}, 503 {served.get('503', 0)})"
+            )
+            if recovery:
+                log.info(
+                    f"  recovery after {len(recovery)} bursts: median "
+                    f"{statistics.median(recovery):.2f}s, max {max(recovery):.2f}s"
+                )
+            log.info(f"  counters: {result['counters']}")
+            log.info(
+                f"  memory: peak {result['peak_rss_mb']:.0f} MB, curve "
+                f"{memory_curve(result['samples'])}"
+            )
+    marketplace.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+import argparse
+import logging
+import os
+import re
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon import amazon_scraper
+from benchmarks.sample_pages import first_product_index, listing_page
+from common.logs import configure_logging, log_context, stop_logging
+from common.parsing import parse_document
+
+log = logging.getLogger(__name__)
+
+# (name, configure_logging arguments); None leaves logging off.
+MODES = [
+    ("off", None),
+    ("sync", {"use_queue": False, "sampling": False}),
+    ("queue", {"use_queue": True, "sampling": False}),
+    ("queue+sampling", {"use_queue": True, "sampling": True}),
+    (
+        "queue+sampling+json",
+        {"use_queue": True, "sampling": True, "log_format": "json"},
+    ),
+]
+
+
+def build_soups(args) -> list:
+    """Parsed listing pages; every `broken_every`th one lost its product links."""
+    soups = []
+    for page in range(1, args.pages + 1):
+        html = listing_page(
+            "amazon",
+            page,
+            args.products,
+            start_index=first_product_index("/bench_0/", page, args.products),
+            bulk=False,
+        )
+        if args.broken_every and page % args.broken_every == 0:
+            html = re.sub(r'<a class="a-link-normal"[^>]*>', "<a>", html)
+        soups.append(parse_document(html.encode("utf-8"), amazon_scraper.PAGE_REGIONS))
+    return soups
+
+
+def run_mode(options, soups: list, args, path: str) -> dict[str, float]:
+    """Extracts every page on `args.threads` threads, as the pipeline does."""
+    with open(path, "w") as sink:
+        if options is None:
+            logging.getLogger().setLevel(logging.CRITICAL)
+        else:
+            configure_logging(level="INFO", stream=sink, **options)
+
+        def extract(page: int):
+            with log_context(job="bench", category="bench_0", page=page):
+                return len(amazon_scraper.extract_page(soups[page], "bench_0", "."))
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.threads) as executor:
+            products = sum(executor.map(extract, range(len(soups))))
+        hot_path = time.perf_counter() - start
+        stop_logging()
+        total = time.perf_counter() - start
+    lines = sum(1 for _ in open(path))
+    return {"hot_path": hot_path, "total": total, "lines": lines, "products": products}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Measure what logging costs the extraction hot path: off, synchronous, "
+            "queued, queued with sampling and queued JSON."
+        )
+    )
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--products", type=int, default=48)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument(
+        "--broken-every",
+        type=int,
+        default=10,
+        help="Every Nth page has no product links, so it logs a warning per product.",
+    )
+    args = parser.parse_args()
+
+    soups = build_soups(args)
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, options in MODES:
+            results[name] = run_mode(options, soups, args, os.path.join(tmp, name))
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s", force=True)
+    baseline = results["off"]["hot_path"]
+    log.info(
+        f"{args.pages} pages x {args.products} products on {args.threads} threads; "
+        f"every {args.broken_every}th page without links."
+    )
+    log.info(
+        f"{'mode':<20} {'hot path ms':>12} {'overhead':>9} {'with flush ms':>14} {'lines':>7}"
+    )
+    for name, result in results.items():
+        log.info(
+            f"{name:<20} {result['hot_path'] * 1000:>12.0f} "
+            f"{result['hot_path'] / baseline - 1:>9.0%} {result['total'] * 1000:>14.0f} "
+            f"{result['lines']:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
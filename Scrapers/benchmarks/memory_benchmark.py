@@ -0,0 +1,184 @@
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.sample_pages import first_product_index, listing_page
+from common.deadlines import CrawlBudget
+from common.memory import peak_rss_mb
+
+log = logging.getLogger(__name__)
+
+IMAGE_BYTES = os.urandom(30 * 1024)
+
+
+def start_server(pages: int, latency: float, image_latency: float):
+    """Full-size Jumia listing pages whose product images are served by the same host."""
+    cache = {}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            if parsed.path.endswith(".jpg"):
+                time.sleep(image_latency)
+                body, content_type = IMAGE_BYTES, "image/jpeg"
+            else:
+                page = int(parse_qs(parsed.query).get("page", ["1"])[0])
+                products = 48 if page <= pages else 0
+                key = (parsed.path, page, products)
+                with lock:
+                    if key not in cache:
+                        html = listing_page(
+                            "jumia",
+                            page,
+                            products=products,
+                            start_index=first_product_index(parsed.path, page),
+                            has_next=page < pages,
+                        )
+                        origin = f"http://127.0.0.1:{self.server.server_address[1]}"
+                        cache[key] = html.replace("https://eg.jumia.is", origin).encode(
+                            "utf-8"
+                        )
+                    body = cache[key]
+                content_type = "text/html; charset=utf-8"
+                time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def crawl(
+    base_url: str,
+    categories: int,
+    limit_mb: float,
+    image_dir: str,
+    full_parse: bool,
+    trace_allocations: bool,
+):
+    """Runs in a fresh interpreter so ru_maxrss belongs to this mode alone."""
+    from jumia import jumia_scraper
+
+    logging.getLogger().setLevel(logging.ERROR)
+    budget = (
+        CrawlBudget(memory_limit_mb=limit_mb, trace_allocations=trace_allocations)
+        if limit_mb
+        else None
+    )
+    pipeline = jumia_scraper.build_pipeline(
+        image_dir=image_dir, partial_parse=not full_parse, budget=budget
+    )
+    start = time.perf_counter()
+    products = pipeline.run(
+        (f"bench_{i}", f"{base_url}/bench_{i}/?page={{}}") for i in range(categories)
+    )
+    result = {
+        "seconds": time.perf_counter() - start,
+        "products": len(products),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    if budget is not None:
+        result.update(budget.memory.stop())
+    sys.stdout.write(json.dumps(result) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare peak memory of a default and a memory-bounded crawl."
+    )
+    parser.add_argument("--categories", type=int, default=4)
+    parser.add_argument("--pages", type=int, default=25)
+    parser.add_argument("--latency", type=float, default=0.01)
+    parser.add_argument("--image-latency", type=float, default=0.05)
+    parser.add_argument("--limit-mb", type=float, default=60)
+    parser.add_argument(
+        "--full-parse", action="store_true", help="Build the whole parse tree."
+    )
+    parser.add_argument("--crawl", help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--trace-allocations", action="store_true", help=argparse.SUPPRESS
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if args.crawl:
+        with tempfile.TemporaryDirectory() as image_dir:
+            # Keep the benchmark's images out of the real image manifest.
+            os.environ["IMAGE_MANIFEST_DB"] = os.path.join(image_dir, "manifest.db")
+            crawl(
+                args.crawl,
+                args.categories,
+                args.limit_mb,
+                image_dir,
+                args.full_parse,
+                args.trace_allocations,
+            )
+        return
+
+    server = start_server(args.pages, args.latency, args.image_latency)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    log.info(
+        f"{args.categories} categories x {args.pages} full-size pages, "
+        f"{args.categories * args.pages * 48} images"
+    )
+    log.info(
+        f"{'mode':<9} {'seconds':>8} {'products':>9} {'peak RSS':>9} {'peak traced':>12} {'drains':>7}"
+    )
+    modes = (
+        ("default", 0, []),
+        ("bounded", args.limit_mb, []),
+        ("traced", args.limit_mb, ["--trace-allocations"]),
+    )
+    for name, limit, extra in modes:
+        output = subprocess.run(  # noqa: S603 - this script, fixed arguments
+            [
+                sys.executable,
+                os.path.abspath(__file__),
+                "--crawl",
+                base_url,
+                "--categories",
+                str(args.categories),
+                "--limit-mb",
+                str(limit),
+            ]
+            + extra
+            + (["--full-parse"] if args.full_parse else []),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        traced = (
+            f"{result['peak_traced_mb']:.0f} MB"
+            if result.get("peak_traced_mb") is not None
+            else "-"
+        )
+        log.info(
+            f"{name:<9} {result['seconds']:>8.2f} {result['products']:>9} "
+            f"{result['peak_rss_mb']:>6.0f} MB {traced:>12} {result.get('drains', '-'):>7}"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,549 @@
+import argparse
+import gzip
+import logging
+import math
+import os
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.sample_pages import (
+    NOUNS,
+    amazon_departments,
+    jumia_flyout,
+    jumia_sidebar,
+    listing_page,
+    navigation_page,
+    page_padding,
+    product_page,
+    twob_menu,
+)
+
+log = logging.getLogger(__name__)
+
+PLATFORMS = ("amazon", "jumia", "2b")
+PER_PAGE = {"amazon": 48, "jumia": 48, "2b": 24}
+# Query parameter each platform pages with.
+PAGE_PARAM = {"amazon": "page", "jumia": "page", "2b": "p"}
+# Image hosts in the sample cards, served by the marketplace instead.
+IMAGE_HOSTS = {
+    "amazon": "https://m.media-amazon.com/images/I/",
+    "jumia": "https://eg.jumia.is/p/",
+    "2b": "https://2b.com.eg/media/",
+}
+# Layout drift: the card markup each scraper keys on, renamed.
+DRIFT = {
+    "amazon": ('data-component-type="s-search-result"', 'data-component-type="s-card"'),
+    "jumia": ('class="prd _fb col c-prd"', 'class="product-card"'),
+    "2b": ('class="item product product-item"', 'class="item product-tile"'),
+}
+
+# Amazon listings are also served as browse-node searches, /s?rh=n:<base + n>.
+AMAZON_NODE_BASE = 21900000000
+SITEMAP_NS = "http://www.sitemaps.org/schemas/sitemap/0.9"
+IMAGE_NS = "http://www.google.com/schemas/sitemap-image/1.1"
+# The protocol's cap on URLs per sitemap file.
+SITEMAP_URLS_PER_FILE = 50000
+BASE_LASTMOD = "2026-01-01"
+
+# Request kinds and injected faults, as recorded in the request log.
+NAVIGATION = "navigation"
+SITEMAP = "sitemap"
+LISTING = "listing"
+PRODUCT = "product"
+IMAGE = "image"
+TRUNCATED = "truncated"
+DRIFTED = "drifted"
+
+
+def category_urls(
+    base_url: str, platform: str, categories: int
+) -> list[tuple[str, str]]:
+    """(category, url_template) pairs of a marketplace, for a scraper pipeline's `run`."""
+    return [
+        (f"cat_{i}", f"{base_url}/{platform}/cat_{i}/?{PAGE_PARAM[platform]}={{}}")
+        for i in range(categories)
+    ]
+
+
+class FaultProfile:
+    """
+    What can go wrong at the marketplace.
+
+    - Listing and image latency are log-normal around their medians.
+    - Every `burst_every` seconds, for `burst_seconds`, a `burst_rate` share of
+      requests is answered with 429 (with Retry-After) or 503.
+    - A `truncate_rate` share of listing pages is cut off mid-document.
+    - A `drift_rate` share of listing pages uses renamed card markup.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.02,
+        latency_sigma: float = 0.6,
+        image_latency: float = 0.01,
+        burst_every: float = 0.0,
+        burst_seconds: float = 2.0,
+        burst_rate: float = 1.0,
+        truncate_rate: float = 0.0,
+        drift_rate: float = 0.0,
+    ):
+        self.latency = latency
+        self.latency_sigma = latency_sigma
+        self.image_latency = image_latency
+        self.burst_every = burst_every
+        self.burst_seconds = burst_seconds
+        self.burst_rate = burst_rate
+        self.truncate_rate = truncate_rate
+        self.drift_rate = drift_rate
+
+    def in_burst(self, elapsed: float) -> bool:
+        if self.burst_every <= 0:
+            return False
+        return elapsed % self.burst_every >= self.burst_every - self.burst_seconds
+
+    def bursts(self, until: float) -> list[tuple[float, float]]:
+        """(start, end) of the bursts before `until`, in seconds since the server started."""
+        if self.burst_every <= 0:
+            return []
+        windows = []
+        end = self.burst_every
+        while end - self.burst_seconds < until:
+            windows.append((end - self.burst_seconds, end))
+            end += self.burst_every
+        return windows
+
+
+class MockMarketplace:
+    """
+    A local Amazon/Jumia/2B lookalike with a catalog of any size.
+
+    Listings live at `/<platform>/cat_<n>/?page=<p>` (`?p=` for 2B) and hold
+    `products_per_category` products each, with product pages at
+    `/<platform>/product/<n>` and images at `/img/<platform>/<n>.jpg`. Pages are generated on request, so the
+    catalog costs no memory; `padding` adds the header/script bulk of a real
+    page. Every request is logged with its time, kind and status.
+
+    `/<platform>/` is a home page with the category navigation: the first
+    `departments` categories are departments and the others are spread
+    under them, named from `category_names` (editable, to simulate renames).
+    Amazon and Jumia list a department's children on its first listing page,
+    2B's menu holds the whole tree. Listings show their result count.
+
+    `/<platform>/sitemap.xml` is a sitemap index over gzipped product
+    sitemaps (`product_loc` URLs, up to 50,000 per file) and a plain one of
+    category pages; `touch_products` moves products' `<lastmod>`.
+    """
+
+    def __init__(
+        self,
+        categories: int,
+        products_per_category: int,
+        faults: FaultProfile | None = None,
+        padding: bool = True,
+        image_kb: int = 20,
+        seed: int = 0,
+        departments: int = 2,
+    ):
+        self.categories = categories
+        self.departments = max(1, min(departments, categories))
+        self.category_names = {
+            n: f"{NOUNS[n % len(NOUNS)]} {n}" for n in range(categories)
+        }
+        self.products_per_category = products_per_category
+        self.faults = faults or FaultProfile()
+        self.padding = page_padding(seed) if padding else ""
+        self.image = os.urandom(image_kb * 1024)
+        self.seed = seed
+        self.requests: list[tuple[float, str, str, int]] = []
+        self.lastmods: dict[tuple[str, int], str] = {}
+        self._sitemaps: dict[tuple[str, str], bytes] = {}
+        self.last_pages: dict[tuple[str, int], int] = {}
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)  # noqa: S311
+        self.started_at = time.monotonic()
+        marketplace = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                marketplace.handle(self)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.httpd.daemon_threads = True
+        self.base_url = f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def start(self) -> "MockMarketplace":
+        self.started_at = time.monotonic()
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+
+    def pages(self, platform: str) -> int:
+        return math.ceil(self.products_per_category / PER_PAGE[platform])
+
+    def expected_products(self, platform: str) -> int:
+        return self.categories * self.products_per_category
+
+    def category_urls(self, platform: str) -> list[tuple[str, str]]:
+        return category_urls(self.base_url, platform, self.categories)
+
+    def product_urls(self, platform: str, count: int) -> list[str]:
+        """Product page URLs of `count` products spread over the catalog."""
+        total = self.categories * self.products_per_category
+        step = max(1, total // max(1, count))
+        return [
+            f"{self.base_url}/{platform}/product/{index}"
+            for index in range(1, total + 1, step)
+        ][:count]
+
+    def category_href(self, platform: str, category: int) -> str:
+        if platform == "amazon":
+            return f"/s?i=electronics&rh=n%3A{AMAZON_NODE_BASE + category}&language=en"
+        return f"/{platform}/cat_{category}/"
+
+    def _links(self, platform: str, categories: range) -> list[tuple[str, str]]:
+        return [
+            (self.category_names[n], self.category_href(platform, n))
+            for n in categories
+            if n in self.category_names
+        ]
+
+    def _children(self, department: int) -> range:
+        return range(self.departments + department, self.categories, self.departments)
+
+    def navigation(self, platform: str) -> str:
+        """The home page's category menu."""
+        departments = range(self.departments)
+        if platform == "amazon":
+            return amazon_departments(self._links(platform, departments))
+        if platform == "jumia":
+            return jumia_flyout(self._links(platform, departments))
+        return twob_menu(
+            [
+                (name, href, self._links(platform, self._children(n)))
+                for n, (name, href) in zip(
+                    departments, self._links(platform, departments)
+                )
+            ]
+        )
+
+    def department_navigation(self, platform: str, category: int) -> str:
+        """The subcategory list of a department's listing page."""
+        if category >= self.departments:
+            return ""
+        children = self._links(platform, self._children(category))
+        if platform == "amazon":
+            return amazon_departments(children)
+        if platform == "jumia":
+            return jumia_sidebar(children)
+        return ""
+
+    def product_loc(self, platform: str, index: int) -> str:
+        """A product page URL shaped like the platform's, served as `/<platform>/product/<n>`."""
+        if platform == "amazon":
+            return f"{self.base_url}/amazon/product/{index}/dp/B0{index:08d}"
+        return f"{self.base_url}/{platform}/product/{index}/p-{index}.html"
+
+    def touch_products(self, platform: str, indexes: list[int], lastmod: str):
+        with self._lock:
+            for index in indexes:
+                self.lastmods[(platform, index)] = lastmod
+            self._sitemaps = {
+                key: body for key, body in self._sitemaps.items() if key[0] != platform
+            }
+
+    def _sitemap_files(self) -> int:
+        return math.ceil(
+            self.categories * self.products_per_category / SITEMAP_URLS_PER_FILE
+        )
+
+    def _file_products(self, number: int) -> range:
+        total = self.categories * self.products_per_category
+        return range(
+            number * SITEMAP_URLS_PER_FILE + 1,
+            min(total, (number + 1) * SITEMAP_URLS_PER_FILE) + 1,
+        )
+
+    def _file_lastmod(self, platform: str, number: int) -> str:
+        products = self._file_products(number)
+        return max(
+            [BASE_LASTMOD]
+            + [
+                lastmod
+                for (key, index), lastmod in self.lastmods.items()
+                if key == platform and index in products
+            ]
+        )
+
+    def sitemap(self, platform: str, name: str) -> bytes | None:
+        """The body of a sitemap file, built on first request."""
+        with self._lock:
+            cached = self._sitemaps.get((platform, name))
+        if cached is not None:
+            return cached
+        if name == "sitemap.xml":
+            entries = [
+                f"<sitemap><loc>{self.base_url}/{platform}/sitemap-{n}.xml.gz</loc>"
+                f"<lastmod>{self._file_lastmod(platform, n)}</lastmod></sitemap>"
+                for n in range(self._sitemap_files())
+            ] + [
+                f"<sitemap><loc>{self.base_url}/{platform}/sitemap-pages.xml</loc></sitemap>"
+            ]
+            body = (
+                f'<?xml version="1.0" encoding="UTF-8"?><sitemapindex xmlns="{SITEMAP_NS}">'
+                f"{''.join(entries)}</sitemapindex>"
+            ).encode()
+        elif name == "sitemap-pages.xml":
+            pages = "".join(
+                f"<url><loc>{self.base_url}{self.category_href(platform, n)}</loc></url>".replace(
+                    "&", "&amp;"
+                )
+                for n in range(self.categories)
+            )
+            body = (
+                f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="{SITEMAP_NS}">'
+                f"{pages}</urlset>"
+            ).encode()
+        elif name.startswith("sitemap-") and name.endswith(".xml.gz"):
+            number = int(name[len("sitemap-") : -len(".xml.gz")])
+            with self._lock:
+                lastmods = dict(self.lastmods)
+            urls = "".join(
+                f"<url><loc>{self.product_loc(platform, index)}</loc>"
+                f"<lastmod>{lastmods.get((platform, index), BASE_LASTMOD)}</lastmod>"
+                f"<image:image><image:loc>{IMAGE_HOSTS[platform]}{index}.jpg</image:loc></image:image></url>"
+                for index in self._file_products(number)
+            )
+            body = gzip.compress(
+                (
+                    f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="{SITEMAP_NS}" '
+                    f'xmlns:image="{IMAGE_NS}">{urls}</urlset>'
+                ).encode(),
+                compresslevel=6,
+            )
+        else:
+            return None
+        with self._lock:
+            self._sitemaps[(platform, name)] = body
+        return body
+
+    def elapsed(self) -> float:
+        return time.monotonic() - self.started_at
+
+    def _record(self, platform: str, kind: str, status: int):
+        with self._lock:
+            self.requests.append((self.elapsed(), platform, kind, status))
+
+    def _sleep(self, median: float):
+        with self._lock:
+            delay = median * self._rng.lognormvariate(0, self.faults.latency_sigma)
+        time.sleep(delay)
+
+    def handle(self, handler: BaseHTTPRequestHandler):
+        parsed = urlparse(handler.path)
+        parts = parsed.path.strip("/").split("/")
+        query = parse_qs(parsed.query)
+        node = query.get("rh", [""])[0].rsplit("n:", 1)[-1]
+        if parts == ["s"] and node.isdigit():
+            parts = ["amazon", f"cat_{int(node) - AMAZON_NODE_BASE}"]
+        is_image = parts[0] == "img"
+        platform = (parts[1] if len(parts) > 1 else "") if is_image else parts[0]
+        if platform not in PLATFORMS:
+            self._send(handler, 404, b"", "text/plain")
+            return
+        kind = IMAGE if is_image else LISTING if len(parts) > 1 else NAVIGATION
+
+        with self._lock:
+            roll = self._rng.random()
+        if self.faults.in_burst(self.elapsed()) and roll < self.faults.burst_rate:
+            status = 429 if roll < self.faults.burst_rate / 2 else 503
+            self._record(platform, kind, status)
+            self._send(handler, status, b"", "text/plain", {"Retry-After": "1"})
+            return
+
+        if is_image:
+            self._sleep(self.faults.image_latency)
+            self._record(platform, IMAGE, 200)
+            self._send(handler, 200, self.image, "image/jpeg")
+            return
+
+        self._sleep(self.faults.latency)
+        if kind == NAVIGATION:
+            html = navigation_page(platform, self.navigation(platform))
+            self._record(platform, NAVIGATION, 200)
+            self._send(handler, 200, html.encode(), "text/html; charset=utf-8")
+            return
+        if len(parts) == 2 and parts[1].startswith("sitemap"):
+            body = self.sitemap(platform, parts[1])
+            status = 200 if body is not None else 404
+            self._record(platform, SITEMAP, status)
+            self._send(
+                handler,
+                status,
+                body or b"",
+                "application/gzip" if parts[1].endswith(".gz") else "application/xml",
+            )
+            return
+        if parts[1] == PRODUCT and len(parts) > 2:
+            html = product_page(platform, int(parts[2]), self.seed, bulk=False)
+            if self.padding:
+                html = html.replace(
+                    "<header></header>", f"<header>{self.padding}</header>", 1
+                )
+            self._record(platform, PRODUCT, 200)
+            self._send(handler, 200, html.encode(), "text/html; charset=utf-8")
+            return
+        page = int(query.get(PAGE_PARAM[platform], ["1"])[0])
+        category = int(parts[1].split("_")[-1]) if len(parts) > 1 else 0
+        body, fault = self.listing(platform, category, page)
+        self._record(platform, fault or LISTING, 200)
+        with self._lock:
+            key = (platform, category)
+            self.last_pages[key] = max(page, self.last_pages.get(key, 0))
+        self._send(handler, 200, body, "text/html; charset=utf-8")
+
+    def listing(
+        self, platform: str, category: int, page: int
+    ) -> tuple[bytes, str | None]:
+        per_page = PER_PAGE[platform]
+        start = (page - 1) * per_page
+        products = max(0, min(per_page, self.products_per_category - start))
+        html = listing_page(
+            platform,
+            page,
+            products=products,
+            seed=self.seed + category,
+            start_index=category * self.products_per_category + start,
+            bulk=False,
+            has_next=start + products < self.products_per_category,
+            total=self.products_per_category,
+            navigation=(
+                self.department_navigation(platform, category) if page == 1 else ""
+            ),
+        )
+        if self.padding:
+            html = html.replace(
+                "<header></header>", f"<header>{self.padding}</header>", 1
+            )
+        html = html.replace(IMAGE_HOSTS[platform], f"{self.base_url}/img/{platform}/")
+
+        fault = None
+        with self._lock:
+            drift = self._rng.random() < self.faults.drift_rate
+            truncate = self._rng.random() < self.faults.truncate_rate
+            cut = self._rng.uniform(0.3, 0.9)
+        if drift:
+            html = html.replace(*DRIFT[platform])
+            fault = DRIFTED
+        body = html.encode()
+        if truncate:
+            body = body[: int(len(body) * cut)]
+            fault = TRUNCATED
+        return body, fault
+
+    def _send(
+        self,
+        handler: BaseHTTPRequestHandler,
+        status: int,
+        body: bytes,
+        content_type: str,
+        headers: dict[str, str] | None = None,
+    ):
+        try:
+            handler.send_response(status)
+            handler.send_header("Content-Type", content_type)
+            handler.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                handler.send_header(name, value)
+            handler.end_headers()
+            handler.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def summary(self, platform: str, since: float = 0.0) -> dict[str, Any]:
+        """Request counts by kind and status for `platform` since `since` seconds."""
+        counts: dict[str, int] = {}
+        with self._lock:
+            requests = [r for r in self.requests if r[1] == platform and r[0] >= since]
+        for _, _, kind, status in requests:
+            key = kind if status == 200 else str(status)
+            counts[key] = counts.get(key, 0) + 1
+        return counts
+
+    def categories_cut_short(self, platform: str) -> int:
+        """Categories whose crawl stopped before their last listing page."""
+        with self._lock:
+            return sum(
+                self.last_pages.get((platform, category), 0) < self.pages(platform)
+                for category in range(self.categories)
+            )
+
+    def recovery_times(self, platform: str, since: float, until: float) -> list[float]:
+        """
+        For each burst that ended between `since` and `until`: seconds from its
+        end to the platform's next successful listing page.
+        """
+        with self._lock:
+            served = [
+                r[0]
+                for r in self.requests
+                if r[1] == platform and r[2] != IMAGE and r[3] == 200 and r[0] >= since
+            ]
+        times = []
+        for _, end in self.faults.bursts(until):
+            if end < since or end > until:
+                continue
+            after = [t for t in served if t >= end]
+            if after:
+                times.append(after[0] - end)
+        return times
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve a synthetic Amazon/Jumia/2B marketplace with injected faults."
+    )
+    parser.add_argument("--categories", type=int, default=10)
+    parser.add_argument("--products", type=int, default=1000, help="Per category.")
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--burst-every", type=float, default=0.0)
+    parser.add_argument("--burst-seconds", type=float, default=2.0)
+    parser.add_argument("--truncate-rate", type=float, default=0.0)
+    parser.add_argument("--drift-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    marketplace = MockMarketplace(
+        args.categories,
+        args.products,
+        FaultProfile(
+            latency=args.latency,
+            burst_every=args.burst_every,
+            burst_seconds=args.burst_seconds,
+            truncate_rate=args.truncate_rate,
+            drift_rate=args.drift_rate,
+        ),
+    ).start()
+    for platform in PLATFORMS:
+        log.info(f"{platform}: {marketplace.category_urls(platform)[0][1]}")
+    try:
+        while True:
+            time.sleep(60)
+    except KeyboardInterrupt:
+        marketplace.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+import argparse
+import logging
+import os
+import sys
+import time
+import tracemalloc
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from amazon import amazon_scraper
+from benchmarks.sample_pages import listing_page
+from common.parsing import parse_document
+from jumia import jumia_scraper
+from twoB import twoB_scraper
+
+log = logging.getLogger(__name__)
+
+PLATFORM_REGIONS = {
+    "amazon": (
+        amazon_scraper.PAGE_REGIONS,
+        ("div", {"data-component-type": "s-search-result"}),
+    ),
+    "jumia": (jumia_scraper.PAGE_REGIONS, ("article", {"class": "prd _fb col c-prd"})),
+    "2b": (twoB_scraper.PAGE_REGIONS, ("li", {"class": "item product product-item"})),
+}
+
+
+def measure(content: bytes, platform: str, partial: bool, repeats: int) -> dict:
+    """Times parse + container lookup and records the tracemalloc peak of one parse."""
+    regions, (tag, attrs) = PLATFORM_REGIONS[platform]
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        soup = parse_document(content, regions, partial=partial)
+        containers = soup.find_all(tag, attrs)
+    elapsed_ms = (time.perf_counter() - start) * 1000 / repeats
+
+    tracemalloc.start()
+    soup = parse_document(content, regions, partial=partial)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"ms": elapsed_ms, "peak_kb": peak / 1024, "containers": len(containers)}
+
+
+def load_pages(args) -> list[tuple[str, str, bytes]]:
+    pages = []
+    for spec in args.html:
+        platform, _, path = spec.partition(":")
+        with open(path, "rb") as page_file:
+            pages.append((platform, os.path.basename(path), page_file.read()))
+    if not pages:
+        for platform in PLATFORM_REGIONS:
+            body = listing_page(platform, products=args.products).encode("utf-8")
+            pages.append((platform, "synthetic", body))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compare full vs partial parsing of listing pages."
+    )
+    parser.add_argument(
+        "--html",
+        action="append",
+        default=[],
+        metavar="PLATFORM:PATH",
+        help="Saved listing page to benchmark (amazon, jumia or 2b). Repeatable.",
+    )
+    parser.add_argument("--products", type=int, default=48)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    log.info(
+        f"{'platform':<8} {'page':<16} {'size KB':>8} {'full ms':>9} {'partial ms':>11} "
+        f"{'speedup':>8} {'full peak KB':>13} {'partial peak KB':>16} {'items':>6}"
+    )
+    for platform, name, content in load_pages(args):
+        full = measure(content, platform, partial=False, repeats=args.repeats)
+        partial = measure(content, platform, partial=True, repeats=args.repeats)
+        if full["containers"] != partial["containers"]:
+            log.warning(
+                f"{platform}/{name}: partial parse found {partial['containers']} containers, full parse {full['containers']}"
+            )
+        log.info(
+            f"{platform:<8} {name[:16]:<16} {len(content) / 1024:>8.0f} {full['ms']:>9.1f} "
+            f"{partial['ms']:>11.1f} {full['ms'] / partial['ms']:>7.1f}x "
+            f"{full['peak_kb']:>13.0f} {partial['peak_kb']:>16.0f} {partial['containers']:>6}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import argparse
+import datetime
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Any
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common.pricedrops import DEFAULT_RULES, PriceDropDetector
+
+log = logging.getLogger(__name__)
+
+START_DAY = datetime.datetime(2025, 1, 1, 9, tzinfo=datetime.UTC)
+
+
+def synthetic_history(
+    products: int, days: int, change_rate: float, seed: int = 0
+) -> list[list[dict[str, Any]]]:
+    """One full crawl per day; each product's price moves on `change_rate` of days."""
+    rng = random.Random(seed)  # noqa: S311
+    prices = [round(rng.uniform(500, 60000), 2) for _ in range(products)]
+    history = []
+    for _ in range(days):
+        crawl = []
+        for index in range(products):
+            if rng.random() < change_rate:
+                prices[index] = round(prices[index] * rng.uniform(0.75, 1.15), 2)
+            crawl.append(
+                {
+                    "platform": "Jumia",
+                    "product_url": f"https://example.test/product/{index}",
+                    "product_title": f"Product {index}",
+                    "product_price": f"EGP {prices[index]:,.2f}",
+                }
+            )
+        history.append(crawl)
+    return history
+
+
+def batches(records: list[dict[str, Any]], size: int):
+    for start in range(0, len(records), size):
+        yield records[start : start + size]
+
+
+def run_incremental(history, batch_size: int, window_days: int, db_path: str):
+    detector = PriceDropDetector(db_path, window_days=window_days)
+    events = 0
+    start = time.perf_counter()
+    for day, crawl in enumerate(history):
+        observed_at = START_DAY + datetime.timedelta(days=day)
+        for batch in batches(crawl, batch_size):
+            events += len(detector.process(batch, observed_at))
+    elapsed = time.perf_counter() - start
+    log.info(f"incremental state writes: {detector.state_writes}")
+    return elapsed, events
+
+
+def run_rescan(history, batch_size: int, window_days: int, db_path: str):
+    """Baseline: after each batch, rebuilds every product's state from the full history."""
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE history (product_url TEXT, day INTEGER, price REAL)")
+    events = 0
+    start = time.perf_counter()
+    for day, crawl in enumerate(history):
+        for batch in batches(crawl, batch_size):
+            state: dict[str, tuple[int, float, float]] = {}
+            for url, seen_day, price in conn.execute(
+                "SELECT product_url, day, price FROM history WHERE day > ? ORDER BY day",
+                (day - window_days,),
+            ):
+                _, _, low = state.get(url, (None, None, price))
+                state[url] = (seen_day, price, min(low, price))
+
+            rows = []
+            for record in batch:
+                price = float(record["product_price"][4:].replace(",", ""))
+                _, last_price, window_min = state.get(
+                    record["product_url"], (None, None, None)
+                )
+                events += sum(
+                    rule.matches(price, last_price, window_min)
+                    for rule in DEFAULT_RULES
+                )
+                rows.append((record["product_url"], day, price))
+            with conn:
+                conn.executemany("INSERT INTO history VALUES (?, ?, ?)", rows)
+    elapsed = time.perf_counter() - start
+    conn.close()
+    return elapsed, events
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Replay synthetic price history through the drop detector."
+    )
+    parser.add_argument("--products", type=int, default=5000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--change-rate", type=float, default=0.1)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--window-days", type=int, default=30)
+    parser.add_argument(
+        "--skip-rescan", action="store_true", help="Only run the incremental detector."
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    logging.getLogger("common.pricedrops").setLevel(logging.WARNING)
+    history = synthetic_history(args.products, args.days, args.change_rate)
+    observations = args.products * args.days
+    log.info(
+        f"Replaying {args.days} days x {args.products} products "
+        f"({observations} observations, batches of {args.batch_size})"
+    )
+
+    with tempfile.TemporaryDirectory() as tmp:
+        incremental, incremental_events = run_incremental(
+            history, args.batch_size, args.window_days, os.path.join(tmp, "drops.db")
+        )
+        log.info(
+            f"incremental: {incremental:7.2f}s {observations / incremental:>9.0f} obs/s "
+            f"{incremental_events} events"
+        )
+        if args.skip_rescan:
+            return
+        rescan, rescan_events = run_rescan(
+            history, args.batch_size, args.window_days, os.path.join(tmp, "rescan.db")
+        )
+        log.info(
+            f"rescan:      {rescan:7.2f}s {observations / rescan:>9.0f} obs/s "
+            f"{rescan_events} events"
+        )
+    log.info(f"Speedup: {rescan / incremental:.1f}x")
+    if rescan_events != incremental_events:
+        log.warning("Event counts differ between the two strategies.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import parse_qs, urlparse
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.sample_pages import first_product_index, listing_page
+from common.workqueue import WorkQueue, build_shards
+
+log = logging.getLogger(__name__)
+
+SCRAPERS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKER_SCRIPT = os.path.join(SCRAPERS_DIR, "scraper-worker.py")
+
+
+def start_listing_server(pages_per_category: int, latency: float, bulk: bool):
+    """Serves synthetic Jumia listing pages on localhost with a fixed response delay."""
+    cache = {}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            page = int(parse_qs(parsed.query).get("page", ["1"])[0])
+            products = 48 if page <= pages_per_category else 0
+            key = (parsed.path, page, products)
+            with lock:
+                if key not in cache:
+                    cache[key] = listing_page(
+                        "jumia",
+                        page,
+                        products=products,
+                        start_index=first_product_index(parsed.path, page),
+                        bulk=bulk,
+                        has_next=page < pages_per_category,
+                    ).encode("utf-8")
+                body = cache[key]
+            time.sleep(latency)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def run_workers(
+    queue_db: str, workers: int, base_url: str, args
+) -> tuple[float, dict[str, Any], int]:
+    queue = WorkQueue(queue_db)
+    plan = {
+        "categories": [
+            {"id": f"bench_{i}", "url_template": f"{base_url}/bench_{i}/?page={{}}"}
+            for i in range(args.categories)
+        ],
+        # Estimates as the planner would produce them after a previous crawl.
+        "estimates": {
+            f"bench_{i}": {"pages": args.pages} for i in range(args.categories)
+        },
+    }
+    run_id = queue.publish_run(
+        "jumia", build_shards(plan, args.pages_per_shard), args.pages_per_shard
+    )
+
+    start = time.perf_counter()
+    processes = [
+        subprocess.Popen(  # noqa: S603 - the worker script, fixed arguments
+            [
+                sys.executable,
+                WORKER_SCRIPT,
+                "--queue-db",
+                queue_db,
+                "--worker-id",
+                f"bench-{index}",
+                "--no-images",
+                "--exit-when-idle",
+            ],
+            cwd=SCRAPERS_DIR,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.wait()
+    elapsed = time.perf_counter() - start
+
+    status = queue.run_status(run_id)
+    records, _ = queue.drain_results(run_id, limit=1_000_000)
+    return elapsed, status, len(records)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure crawl throughput against the number of queue workers."
+    )
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--categories", type=int, default=16)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--pages-per-shard", type=int, default=5)
+    parser.add_argument(
+        "--latency", type=float, default=0.15, help="Seconds per listing response."
+    )
+    parser.add_argument("--bulk", action="store_true", help="Serve full-size pages.")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    server = start_listing_server(args.pages, args.latency, args.bulk)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    baseline = None
+    log.info(
+        f"{'workers':>7} {'seconds':>8} {'pages/s':>8} {'speedup':>8} {'products':>9} {'shards':>24}"
+    )
+    for workers in args.workers:
+        with tempfile.TemporaryDirectory() as tmp:
+            elapsed, status, records = run_workers(
+                os.path.join(tmp, "queue.db"), workers, base_url, args
+            )
+        pages_per_second = status["pages"] / elapsed
+        baseline = baseline or pages_per_second
+        log.info(
+            f"{workers:>7} {elapsed:>8.2f} {pages_per_second:>8.1f} "
+            f"{pages_per_second / baseline:>7.2f}x {records:>9} {status['shards']!s:>24}"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.sample_pages import listing_page
+from common.rawarchive import RawPageWriter, reextract
+
+log = logging.getLogger(__name__)
+
+PLUGIN_KEYS = {"jumia": "jumia", "amazon": "amazon", "twob": "2b"}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure raw HTML archiving cost and offline re-extraction speed."
+    )
+    parser.add_argument("--platform", choices=list(PLUGIN_KEYS), default="jumia")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument(
+        "--no-bulk", action="store_true", help="Serve pages without navigation bulk."
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    for noisy in ("common", "amazon", "jumia", "twoB"):
+        logging.getLogger(noisy).setLevel(logging.WARNING)
+
+    bodies = [
+        listing_page(
+            args.platform, page, start_index=page * 48, bulk=not args.no_bulk
+        ).encode("utf-8")
+        for page in range(1, args.pages + 1)
+    ]
+
+    with tempfile.TemporaryDirectory() as root:
+        writer = RawPageWriter(root, PLUGIN_KEYS[args.platform], run_id="bench")
+        start = time.perf_counter()
+        for page, body in enumerate(bodies, start=1):
+            writer.append("bench", page, f"https://example.test/?page={page}", body)
+        written = time.perf_counter() - start
+        writer.close()
+        log.info(
+            f"Archived {writer.pages} pages: {writer.raw_bytes / 1e6:.1f} MB -> "
+            f"{writer.stored_bytes / 1e6:.1f} MB "
+            f"({writer.raw_bytes / writer.stored_bytes:.1f}x), "
+            f"{written / writer.pages * 1000:.2f} ms per page"
+        )
+
+        log.info(f"{'workers':>7} {'seconds':>8} {'pages/s':>8} {'products':>9}")
+        for workers in args.workers:
+            start = time.perf_counter()
+            products = reextract("bench", root, workers)
+            elapsed = time.perf_counter() - start
+            log.info(
+                f"{workers:>7} {elapsed:>8.2f} {args.pages / elapsed:>8.1f} {len(products):>9}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import argparse
+import importlib
+import logging
+import os
+import sys
+import time
+from typing import Any
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.load_harness import build_pipeline
+from benchmarks.mock_marketplace import PLATFORMS, FaultProfile, MockMarketplace
+from common.refresh import ProductRefresher
+from common.tracing import JobTrace
+
+log = logging.getLogger(__name__)
+
+MODULES = {
+    "amazon": "amazon.amazon_scraper",
+    "jumia": "jumia.jumia_scraper",
+    "2b": "twoB.twoB_scraper",
+}
+
+
+def full_crawl(marketplace: MockMarketplace, platform: str, tmp: str) -> dict[str, Any]:
+    pipeline, _ = build_pipeline(platform, tmp, download_images=False)
+    start = time.perf_counter()
+    records = pipeline.run(marketplace.category_urls(platform))
+    return {"seconds": time.perf_counter() - start, "products": len(records)}
+
+
+def refresh(
+    marketplace: MockMarketplace, platform: str, args, tmp: str
+) -> dict[str, Any]:
+    items = [
+        {"product_url": url, "platform": platform, "category": "watched"}
+        for url in marketplace.product_urls(platform, args.watched)
+    ]
+    trace = JobTrace("refresh")
+    refresher = ProductRefresher(
+        lambda key: importlib.import_module(MODULES[key]),
+        args.concurrency,
+        args.per_platform,
+        trace,
+        pipeline_options={
+            platform: {
+                "image_dir": tmp,
+                **({"headers": {}} if platform == "amazon" else {}),
+            }
+        },
+    )
+    start = time.perf_counter()
+    records = refresher.refresh(items)
+    seconds = time.perf_counter() - start
+    correct = sum(
+        float(str(record.get("product_price") or record.get("price")).replace(",", ""))
+        == int(record["product_url"].rsplit("/", 1)[-1]) * 100
+        for record in records
+    )
+    return {
+        "seconds": seconds,
+        "products": len(records),
+        "correct": correct,
+        "counters": trace.breakdown()["counters"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Compare refreshing watched products from their product pages with a "
+            "full listing crawl of their categories."
+        )
+    )
+    parser.add_argument("--platforms", default=",".join(PLATFORMS))
+    parser.add_argument("--categories", type=int, default=4)
+    parser.add_argument("--products", type=int, default=2400, help="Per category.")
+    parser.add_argument("--watched", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--per-platform", type=int, default=6)
+    parser.add_argument("--no-padding", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    for noisy in ("common", "amazon", "jumia", "twoB"):
+        logging.getLogger(noisy).setLevel(logging.ERROR)
+    marketplace = MockMarketplace(
+        args.categories,
+        args.products,
+        FaultProfile(latency=args.latency),
+        padding=not args.no_padding,
+    ).start()
+    log.info(
+        f"Catalog: {args.categories} categories x {args.products} products per platform, "
+        f"{args.watched} watched, {args.latency * 1000:.0f} ms median latency."
+    )
+    tmp = os.path.join(
+        os.path.dirname(os.path.abspath(__file__)), "..", "data", "refresh"
+    )
+    for platform in args.platforms.split(","):
+        crawl = full_crawl(marketplace, platform, tmp)
+        watched = refresh(marketplace, platform, args, tmp)
+        log.info(
+            f"{platform}: full crawl {crawl['seconds']:.1f}s for {crawl['products']} products; "
+            f"refresh {watched['seconds']:.1f}s for {watched['products']} watched "
+            f"({watched['correct']} correct prices, "
+            f"{watched['seconds'] / crawl['seconds']:.0%} of the crawl) {watched['counters']}"
+        )
+    marketplace.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,249 @@
+import random
+import re
+
+# Synthetic listing pages shaped like the real Amazon, Jumia and 2B markup the
+# scrapers target, padded with the kind of header/script/navigation bulk that
+# makes up most of a real page.
+
+BRANDS = ["Samsung", "Apple", "XIAOMI", "Lenovo", "HP", "Dell", "Oppo", "Realme"]
+NOUNS = ["Laptop", "Smartphone", "Smart TV", "Monitor", "Headphones", "Tablet"]
+
+
+def _title(rng: random.Random, index: int) -> str:
+    return (
+        f"{rng.choice(BRANDS)} {rng.choice(NOUNS)} Model {index} "
+        f"{rng.choice(['8GB', '16GB', '32GB'])} RAM {rng.choice(['256GB', '512GB', '1TB'])}"
+    )
+
+
+def _page_bulk(rng: random.Random, nav_links: int = 1500, script_kb: int = 150) -> str:
+    script = "var cfg = {" + ",".join(
+        f'"k{i}": "{rng.random()}"' for i in range(script_kb * 40)
+    )
+    nav = "".join(
+        f'<li class="menu-item"><a href="/c/{i}" class="nav-link">Category {i}</a></li>'
+        for i in range(nav_links)
+    )
+    return f"<script>{script}}};</script><nav><ul>{nav}</ul></nav>"
+
+
+def amazon_card(rng: random.Random, index: int) -> str:
+    title = _title(rng, index)
+    asin = f"B0{index:08d}"
+    return (
+        f'<div data-component-type="s-search-result" data-asin="{asin}" class="s-result-item">'
+        f'<div class="a-section"><img class="s-image" src="https://m.media-amazon.com/images/I/{asin}.jpg"/>'
+        f'<h2 class="a-size-mini"><a class="a-link-normal" href="/dp/{asin}/ref=sr_1_{index}?keywords=x">'
+        f'<span class="a-size-medium a-text-normal">{title}</span></a></h2>'
+        f'<span class="a-price"><span class="a-offscreen">EGP{index * 100}.00</span>'
+        f'<span class="a-price-whole">{index * 100:,}</span><span class="a-price-fraction">00</span></span>'
+        f"</div></div>"
+    )
+
+
+def jumia_card(rng: random.Random, index: int) -> str:
+    title = _title(rng, index)
+    return (
+        f'<article class="prd _fb col c-prd"><a class="core" href="/product-{index}-{index * 7}.html">'
+        f'<div class="img-c"><img class="img" data-src="https://eg.jumia.is/p/{index}.jpg" src="data:,"/></div>'
+        f'<div class="info"><h3 class="name">{title}</h3><div class="prc">EGP {index * 100:,}.00</div></div>'
+        f"</a></article>"
+    )
+
+
+def twob_card(rng: random.Random, index: int) -> str:
+    title = _title(rng, index)
+    return (
+        f'<li class="item product product-item"><div class="product-item-info">'
+        f'<img class="product-image-photo" src="https://2b.com.eg/media/{index}.jpg"/>'
+        f'<strong><a class="product-item-link" href="https://2b.com.eg/en/item-{index}.html">{title}</a></strong>'
+        f'<span class="special-price"><span class="price">{index * 100:,}.00\xa0EGP</span></span>'
+        f"</div></li>"
+    )
+
+
+CARD_BUILDERS = {"amazon": amazon_card, "jumia": jumia_card, "2b": twob_card}
+GRID_WRAPPERS = {
+    "amazon": ('<div class="s-main-slot s-result-list">', "</div>"),
+    "jumia": ('<div class="-paxs row _no-g _4cl-3cm-shs">', "</div>"),
+    "2b": ('<ol class="products list items product-items">', "</ol>"),
+}
+PAGINATION = {
+    "amazon": '<a class="s-pagination-item s-pagination-next" href="?page={next}">Next</a>',
+    "jumia": '<div class="pg-w"><a class="pg" aria-label="Next Page" href="?page={next}">&gt;</a></div>',
+    "2b": '<div class="pages"><li class="item pages-item-next"><a class="action next" href="?p={next}">Next</a></li></div>',
+}
+
+
+RESULT_COUNT = {
+    "amazon": (
+        '<span data-component-type="s-result-info-bar"><div class="a-section s-breadcrumb">'
+        "<span>1-48 of over {total:,} results for</span></div></span>"
+    ),
+    "jumia": '<p class="-gy5 -phs">{total:,} products found</p>',
+    "2b": (
+        '<p class="toolbar-amount" id="toolbar-amount">Items <span class="toolbar-number">1</span>'
+        '-<span class="toolbar-number">24</span> of <span class="toolbar-number">{total}</span></p>'
+    ),
+}
+
+# (name, href) links of a navigation menu, as each platform renders them.
+Links = list[tuple[str, str]]
+
+
+def amazon_departments(links: Links) -> str:
+    return (
+        '<div id="departments"><ul>'
+        + "".join(
+            f'<li><span class="a-list-item"><a class="a-link-normal s-navigation-item" href="{href}">'
+            f'<span class="a-size-base a-color-base">{name}</span></a></span></li>'
+            for name, href in links
+        )
+        + "</ul></div>"
+    )
+
+
+def jumia_flyout(links: Links) -> str:
+    return (
+        '<div class="flyout-w"><div class="flyout">'
+        + "".join(
+            f'<a class="itm" href="{href}"><span class="text">{name}</span></a>'
+            for name, href in links
+        )
+        + "</div></div>"
+    )
+
+
+def jumia_sidebar(links: Links) -> str:
+    return (
+        '<article class="col8 -pvs"><h2>Category</h2>'
+        + "".join(
+            f'<a class="-db -pvs -phxl -hov-bg-gy05" href="{href}">{name}</a>'
+            for name, href in links
+        )
+        + "</article>"
+    )
+
+
+def twob_menu(departments: list[tuple[str, str, Links]]) -> str:
+    """A Magento mega-menu of (name, href, children) departments."""
+    return (
+        '<nav class="navigation"><ul>'
+        + "".join(
+            f'<li class="level0 category-item"><a href="{href}" class="level-top"><span>{name}</span></a>'
+            '<ul class="level0 submenu">'
+            + "".join(
+                f'<li class="level1 category-item"><a href="{child_href}"><span>{child}</span></a></li>'
+                for child, child_href in children
+            )
+            + "</ul></li>"
+            for name, href, children in departments
+        )
+        + "</ul></nav>"
+    )
+
+
+def navigation_page(platform: str, navigation: str) -> str:
+    """A home page carrying only the navigation markup."""
+    return (
+        f"<!DOCTYPE html><html><head><title>{platform}</title></head>"
+        f"<body><header></header>{navigation}<footer></footer></body></html>"
+    )
+
+
+def page_padding(seed: int = 0) -> str:
+    """The header/script/navigation bulk of a full-size page, for reuse across pages."""
+    return _page_bulk(random.Random(seed))  # noqa: S311
+
+
+def first_product_index(path: str, page: int, per_page: int = 48) -> int:
+    """
+    Product numbering for a served `/bench_<n>/?page=<p>` listing, distinct
+    per category and page so a crawl never sees the same product twice.
+    """
+    match = re.search(r"bench_(\d+)", path)
+    category = int(match.group(1)) if match else 0
+    return (category * 10000 + page) * per_page
+
+
+def listing_page(
+    platform: str,
+    page: int = 1,
+    products: int = 48,
+    seed: int = 0,
+    start_index: int = 0,
+    bulk: bool = True,
+    has_next: bool = True,
+    total: int | None = None,
+    navigation: str = "",
+) -> str:
+    """
+    Builds one listing page for `platform` with `products` product cards;
+    `has_next` adds the link to the next page, `total` the listing's result
+    count and `navigation` a category menu.
+    """
+    rng = random.Random(seed * 1000003 + page)  # noqa: S311
+    builder = CARD_BUILDERS[platform]
+    opener, closer = GRID_WRAPPERS[platform]
+    cards: list[str] = [builder(rng, start_index + i + 1) for i in range(products)]
+    head = _page_bulk(rng) if bulk else ""
+    footer = _page_bulk(rng, nav_links=300, script_kb=20) if bulk else ""
+    return (
+        f"<!DOCTYPE html><html><head><title>{platform} page {page}</title>{head}</head>"
+        f"<body><header>{footer}</header>{navigation}"
+        f"{RESULT_COUNT[platform].format(total=total) if total is not None else ''}"
+        f"{opener}{''.join(cards)}{closer}"
+        f"{PAGINATION[platform].format(next=page + 1) if has_next else ''}"
+        f"<footer>{footer}</footer></body></html>"
+    )
+
+
+PRODUCT_DETAILS = {
+    "amazon": (
+        '<div id="centerCol"><h1 id="title"><span id="productTitle" class="a-size-large">'
+        "  {title}  </span></h1>"
+        '<div id="corePriceDisplay_desktop_feature_div"><span class="a-price">'
+        '<span class="a-offscreen">EGP{price:,}.00</span><span class="a-price-whole">{price:,}'
+        '<span class="a-price-decimal">.</span></span>'
+        '<span class="a-price-fraction">00</span></span></div>'
+        '<div id="imgTagWrapperId"><img id="landingImage" src="https://m.media-amazon.com/images/I/{sku}.jpg"/></div>'
+        '<input type="hidden" id="ASIN" name="ASIN" value="{sku}"/></div>'
+    ),
+    "jumia": (
+        '<div class="-fw -fh"><h1 class="-fs20 -pts -pbxs">{title}</h1>'
+        '<div class="-hr -mtxs -pvs"><span class="-b -ubpt -tal -fs24 -prxs">EGP {price:,}.00</span></div>'
+        '<img class="-fw -fh" data-src="https://eg.jumia.is/p/{sku}.jpg" src="data:,"/>'
+        '<form><input type="hidden" name="sku" value="{sku}"/></form></div>'
+    ),
+    "2b": (
+        '<div class="product-info-main"><h1 class="page-title"><span class="base" itemprop="name">'
+        "{title}</span></h1>"
+        '<div class="product-info-price"><span class="price-container">'
+        '<span data-price-type="finalPrice" class="price-wrapper" data-price-amount="{price}">'
+        '<span class="price">{price:,}.00\xa0EGP</span></span></span></div>'
+        '<div class="product attribute sku"><div class="value" itemprop="sku">{sku}</div></div>'
+        '<img class="gallery-placeholder__image" src="https://2b.com.eg/media/{sku}.jpg"/></div>'
+    ),
+}
+
+
+def product_page(
+    platform: str, index: int, seed: int = 0, bulk: bool = True, price: int = 0
+) -> str:
+    """
+    Builds the product detail page of product `index`, priced like its
+    listing card unless `price` is given.
+    """
+    rng = random.Random(seed * 1000003 + index)  # noqa: S311
+    details = PRODUCT_DETAILS[platform].format(
+        title=_title(rng, index),
+        price=price or index * 100,
+        sku=f"B0{index:08d}" if platform == "amazon" else f"SKU{index}",
+    )
+    head = _page_bulk(rng) if bulk else ""
+    footer = _page_bulk(rng, nav_links=300, script_kb=20) if bulk else ""
+    return (
+        f"<!DOCTYPE html><html><head><title>{platform} product {index}</title>{head}</head>"
+        f"<body><header>{footer}</header><main>{details}</main>"
+        f"<footer>{footer}</footer></body></html>"
+    )
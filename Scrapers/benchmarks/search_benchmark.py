@@ -0,0 +1,149 @@
+import argparse
+import logging
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from typing import Any
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.brand_benchmark import WORDS, synthetic_titles
+from common.brands import get_brand_tagger
+from common.search import ProductIndex
+
+log = logging.getLogger(__name__)
+
+PLATFORMS = ["Amazon", "Jumia", "2B"]
+CATEGORIES = ["laptops", "mobiles", "tvs", "headphones", "tablets", "monitors"]
+
+
+def synthetic_listings(count: int, seed: int = 0) -> list[dict[str, Any]]:
+    rng = random.Random(seed)  # noqa: S311
+    tagger = get_brand_tagger()
+    titles = synthetic_titles(tagger.brands, count, seed)
+    return [
+        {
+            "platform": rng.choice(PLATFORMS),
+            "category": rng.choice(CATEGORIES),
+            "product_url": f"https://example.test/product/{index}",
+            "product_title": title,
+            "product_price": f"EGP {rng.uniform(200, 80000):,.2f}",
+        }
+        for index, title in enumerate(titles)
+    ]
+
+
+def synthetic_queries(count: int, brands: list[str], seed: int = 1) -> list[dict]:
+    """Mix of brand, keyword, prefix and filtered queries, like a search box sees."""
+    rng = random.Random(seed)  # noqa: S311
+    queries = []
+    for _ in range(count):
+        words = [rng.choice(brands), rng.choice(WORDS)]
+        text = " ".join(words[: rng.randint(1, 2)])
+        if rng.random() < 0.3:
+            text = text[: max(2, len(text) - rng.randint(0, 3))]
+        query = {"q": text}
+        if rng.random() < 0.5:
+            query["platform"] = rng.choice(PLATFORMS)
+        if rng.random() < 0.3:
+            query["max_price"] = rng.choice([5000.0, 20000.0])
+        queries.append(query)
+    return queries
+
+
+# One LIKE per query word; unused slots hold "%", which matches any title.
+LIKE_WORDS = 4
+_LIKE_QUERY = """SELECT title FROM products
+    WHERE title LIKE :word0 AND title LIKE :word1
+    AND title LIKE :word2 AND title LIKE :word3
+    AND (:platform IS NULL OR platform = :platform)
+    AND (:max_price IS NULL OR price <= :max_price)
+    LIMIT :limit"""
+
+
+def like_search(conn: sqlite3.Connection, query: dict, limit: int) -> list:
+    """Baseline: substring scan over every title."""
+    words = query["q"].split()
+    if len(words) > LIKE_WORDS:
+        raise ValueError(f"LIKE baseline takes up to {LIKE_WORDS} words: {words}")
+    patterns = [f"%{word}%" for word in words]
+    patterns += ["%"] * (LIKE_WORDS - len(patterns))
+    return conn.execute(
+        _LIKE_QUERY,
+        {
+            **{f"word{slot}": pattern for slot, pattern in enumerate(patterns)},
+            "platform": query.get("platform"),
+            "max_price": query.get("max_price"),
+            "limit": limit,
+        },
+    ).fetchall()
+
+
+def percentile(values: list[float], percent: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure product search latency over a synthetic listing index."
+    )
+    parser.add_argument("--listings", type=int, default=100_000)
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    listings = synthetic_listings(args.listings)
+    queries = synthetic_queries(args.queries, get_brand_tagger().brands)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = ProductIndex(os.path.join(tmp, "search.db"))
+        start = time.perf_counter()
+        for offset in range(0, len(listings), args.batch_size):
+            index.upsert(listings[offset : offset + args.batch_size])
+        build = time.perf_counter() - start
+        log.info(
+            f"Indexed {len(listings)} listings in {build:.1f}s "
+            f"({len(listings) / build:,.0f}/s, batches of {args.batch_size})"
+        )
+
+        # A second crawl with unchanged titles only touches the row store.
+        start = time.perf_counter()
+        for offset in range(0, len(listings), args.batch_size):
+            index.upsert(listings[offset : offset + args.batch_size])
+        log.info(f"Re-indexed unchanged listings in {time.perf_counter() - start:.1f}s")
+
+        fts, matches = [], 0
+        for query in queries:
+            start = time.perf_counter()
+            result = index.search(limit=args.limit, **query)
+            fts.append((time.perf_counter() - start) * 1000)
+            matches += result["total"]
+
+        conn = sqlite3.connect(index.db_path)
+        like = []
+        for query in queries:
+            start = time.perf_counter()
+            like_search(conn, query, args.limit)
+            like.append((time.perf_counter() - start) * 1000)
+        conn.close()
+
+    log.info(
+        f"{len(queries)} queries, {matches / len(queries):,.0f} matches on average"
+    )
+    log.info(f"{'mode':<6} {'p50':>8} {'p99':>8} {'max':>8}")
+    for name, timings in (("fts5", fts), ("like", like)):
+        log.info(
+            f"{name:<6} {percentile(timings, 50):>6.2f}ms {percentile(timings, 99):>6.2f}ms "
+            f"{max(timings):>6.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
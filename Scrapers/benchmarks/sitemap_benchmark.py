@@ -0,0 +1,158 @@
+import argparse
+import gzip
+import importlib
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+import defusedxml.ElementTree as ElementTree
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.mock_marketplace import (
+    PER_PAGE,
+    SITEMAP_URLS_PER_FILE,
+    FaultProfile,
+    MockMarketplace,
+)
+from common.refresh import ProductRefresher
+from common.sitemaps import SitemapCrawler, SitemapStore
+from common.tracing import JobTrace
+
+log = logging.getLogger(__name__)
+
+MODULES = {
+    "amazon": "amazon.amazon_scraper",
+    "jumia": "jumia.jumia_scraper",
+    "2b": "twoB.twoB_scraper",
+}
+
+
+def load_module(key: str):
+    return importlib.import_module(MODULES[key])
+
+
+def traced(func: Callable[[], Any]) -> dict[str, Any]:
+    """Runs `func` under tracemalloc; returns its result, seconds and peak MB."""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = func()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {"result": result, "seconds": seconds, "peak_mb": peak / 2**20}
+
+
+def prebuild(marketplace: MockMarketplace, platform: str, total: int) -> bytes:
+    """Builds the mock's sitemap files up front, so serving them is not measured."""
+    files = [
+        marketplace.sitemap(platform, f"sitemap-{number}.xml.gz")
+        for number in range(-(-total // SITEMAP_URLS_PER_FILE))
+    ]
+    return files[0]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=(
+            "Sync a large gzipped sitemap index, then fetch only the products whose "
+            "<lastmod> moved, against a listing crawl of the same catalog."
+        )
+    )
+    parser.add_argument("--platform", default="jumia", choices=list(MODULES))
+    parser.add_argument("--categories", type=int, default=10)
+    parser.add_argument("--products", type=int, default=30000, help="Per category.")
+    parser.add_argument("--modified", type=float, default=0.005)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, default=16)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    for noisy in ("common", "amazon", "jumia", "twoB"):
+        logging.getLogger(noisy).setLevel(logging.ERROR)
+    platform = args.platform
+    marketplace = MockMarketplace(
+        args.categories,
+        args.products,
+        FaultProfile(latency=args.latency),
+        padding=False,
+    ).start()
+    total = args.categories * args.products
+    tmp = tempfile.mkdtemp()
+    store = SitemapStore(os.path.join(tmp, "sitemaps.db"))
+    crawler = SitemapCrawler(
+        load_module,
+        store,
+        index_urls={platform: f"{marketplace.base_url}/{platform}/sitemap.xml"},
+    )
+
+    first_file = prebuild(marketplace, platform, total)
+    whole = traced(lambda: len(ElementTree.fromstring(gzip.decompress(first_file))))
+    log.info(
+        f"Catalog: {total} products; sitemap file 0 is {len(first_file) / 2**20:.1f} MB gzipped, "
+        f"{len(gzip.decompress(first_file)) / 2**20:.0f} MB of XML. Parsing it whole peaks at "
+        f"{whole['peak_mb']:.0f} MB."
+    )
+
+    first = traced(lambda: crawler.sync(platform))
+    due = store.due(platform)
+    log.info(
+        f"First sync: {first['seconds']:.1f}s (under tracemalloc), peak {first['peak_mb']:.1f} MB, "
+        f"{len(due)} product URLs due. {first['result']}"
+    )
+    # As if a first full crawl had fetched everything.
+    store.mark_fetched(due)
+
+    rng = random.Random(0)  # noqa: S311
+    changed = rng.sample(range(1, total + 1), int(total * args.modified))
+    marketplace.touch_products(platform, changed, "2026-03-01T10:00:00+02:00")
+    prebuild(marketplace, platform, total)
+    requests_before = len(marketplace.requests)
+    second = traced(lambda: crawler.sync(platform))
+    due = store.due(platform)
+    log.info(
+        f"Second sync: {second['seconds']:.1f}s (under tracemalloc), peak {second['peak_mb']:.1f} MB, "
+        f"{len(due)} due ({len(changed)} modified). {second['result']}"
+    )
+
+    trace = JobTrace("sitemap")
+    refresher = ProductRefresher(
+        load_module,
+        args.concurrency,
+        args.concurrency,
+        trace,
+        pipeline_options={
+            platform: {
+                "image_dir": os.path.join(tmp, "images"),
+                **({"headers": {}} if platform == "amazon" else {}),
+            }
+        },
+    )
+    start = time.perf_counter()
+    records = refresher.refresh(
+        [
+            {"product_url": url, "platform": platform, "category": "sitemap"}
+            for url in due
+        ]
+    )
+    fetch_seconds = time.perf_counter() - start
+    store.mark_fetched(record["product_url"] for record in records)
+    requests_made = len(marketplace.requests) - requests_before
+    listing_pages = -(-args.products // PER_PAGE[platform]) * args.categories
+    log.info(
+        f"Fetched {len(records)} changed products in {fetch_seconds:.1f}s with "
+        f"{requests_made} requests in all (sitemaps included); a listing crawl "
+        f"touches {listing_pages} pages. {len(store.due(platform))} still due."
+    )
+    marketplace.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+import argparse
+import json
+import logging
+import os
+import statistics
+import subprocess
+import sys
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+log = logging.getLogger(__name__)
+
+SCRAPERS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = (
+    "bs4",
+    "pandas",
+    "amazon.amazon_scraper",
+    "jumia.jumia_scraper",
+    "twoB.twoB_scraper",
+)
+
+# Each probe runs in a fresh interpreter so every measurement is a cold start.
+# The "first job" probe loads the plugin and runs the parse + extract path of a
+# job on a synthetic listing page, i.e. everything a job does before the network.
+PROBE = r"""
+import importlib.util, json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {scrapers_dir!r})
+spec = importlib.util.spec_from_file_location("scraper_service", {service!r})
+service = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(service)
+from fastapi.testclient import TestClient
+TestClient(service.app).get("/scrapers/status")
+result = {{"app_seconds": time.perf_counter() - start}}
+platform = {platform!r}
+if platform:
+    from benchmarks.sample_pages import listing_page
+    page = listing_page(platform).encode("utf-8")
+    job_start = time.perf_counter()
+    scraper = service.scraper_plugins.load(platform)
+    result["plugin_seconds"] = time.perf_counter() - job_start
+    from common.parsing import extract_json_ld_products, parse_document
+    soup = parse_document(page, scraper.PAGE_REGIONS)
+    extract_json_ld_products(soup)
+    result["first_job_seconds"] = time.perf_counter() - job_start
+    parse_start = time.perf_counter()
+    parse_document(page, scraper.PAGE_REGIONS)
+    result["warm_parse_seconds"] = time.perf_counter() - parse_start
+result["loaded"] = [name for name in {heavy!r} if name in sys.modules]
+print(json.dumps(result))
+"""
+
+
+def run_probe(platform: str = "") -> dict:
+    code = PROBE.format(
+        scrapers_dir=SCRAPERS_DIR,
+        service=os.path.join(SCRAPERS_DIR, "scraper-service.py"),
+        platform=platform,
+        heavy=HEAVY_MODULES,
+    )
+    completed = subprocess.run(  # noqa: S603 - the probe is our own code
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        cwd=SCRAPERS_DIR,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def median_ms(results: list[dict], key: str) -> float:
+    return statistics.median(result[key] for result in results) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure cold start of the scraper service and of each scraper's first job."
+    )
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    app_runs = [run_probe() for _ in range(args.repeats)]
+    log.info(
+        f"FastAPI app cold start: {median_ms(app_runs, 'app_seconds'):.0f} ms "
+        f"(heavy modules loaded: {', '.join(app_runs[0]['loaded']) or 'none'})"
+    )
+
+    log.info(
+        f"{'platform':<8} {'plugin ms':>10} {'first job ms':>13} {'warm parse ms':>14}  loaded after"
+    )
+    for platform in ("amazon", "jumia", "2b"):
+        runs = [run_probe(platform) for _ in range(args.repeats)]
+        log.info(
+            f"{platform:<8} {median_ms(runs, 'plugin_seconds'):>10.0f} "
+            f"{median_ms(runs, 'first_job_seconds'):>13.0f} "
+            f"{median_ms(runs, 'warm_parse_seconds'):>14.0f}  {', '.join(runs[0]['loaded'])}"
+        )
+
+
+if __name__ == "__main__":
+    main()
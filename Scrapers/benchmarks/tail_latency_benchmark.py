@@ -0,0 +1,139 @@
+import argparse
+import logging
+import os
+import random
+import sys
+import threading
+import time
+from collections.abc import Callable
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+if __package__ in (None, ""):
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.sample_pages import first_product_index, listing_page
+from common import deadlines
+from common.deadlines import CrawlBudget
+from jumia import jumia_scraper
+
+log = logging.getLogger(__name__)
+
+
+def start_tail_server(pages: int, latency: float, tail_rate: float, tail: float):
+    """Serves Jumia listing pages; a `tail_rate` share of requests stalls for `tail` seconds."""
+    cache = {}
+    rng = random.Random(0)  # noqa: S311
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            page = int(parse_qs(parsed.query).get("page", ["1"])[0])
+            products = 48 if page <= pages else 0
+            key = (parsed.path, page, products)
+            with lock:
+                if key not in cache:
+                    cache[key] = listing_page(
+                        "jumia",
+                        1,
+                        products=products,
+                        start_index=first_product_index(parsed.path, page),
+                        bulk=False,
+                        has_next=page < pages,
+                    ).encode("utf-8")
+                body = cache[key]
+                slow = rng.random() < tail_rate
+            time.sleep(tail if slow else latency)
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # The client gave up on this request (timeout or lost hedge).
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def percentile(values: list[float], percent: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+def run_jobs(base_url: str, args, budget: Callable[[], CrawlBudget | None]):
+    # Each mode learns its own latency percentile from scratch.
+    deadlines._trackers.clear()
+    categories = [
+        (f"bench_{i}", f"{base_url}/bench_{i}/?page={{}}")
+        for i in range(args.categories)
+    ]
+    durations, products = [], []
+    for _ in range(args.jobs):
+        pipeline = jumia_scraper.build_pipeline(
+            req_timeout=args.timeout, download_images=False, budget=budget()
+        )
+        start = time.perf_counter()
+        products.append(len(pipeline.run(categories)))
+        durations.append(time.perf_counter() - start)
+    return durations, products
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure job duration percentiles with deadlines and hedged requests."
+    )
+    parser.add_argument("--jobs", type=int, default=30)
+    parser.add_argument("--categories", type=int, default=3)
+    parser.add_argument("--pages", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.03)
+    parser.add_argument("--tail-rate", type=float, default=0.03)
+    parser.add_argument("--tail", type=float, default=2.0)
+    parser.add_argument("--timeout", type=float, default=20)
+    parser.add_argument(
+        "--job-deadline", type=float, default=1.5, help="Seconds, deadline mode."
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    for noisy in ("common", "jumia"):
+        logging.getLogger(noisy).setLevel(logging.ERROR)
+    server = start_tail_server(args.pages, args.latency, args.tail_rate, args.tail)
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    expected = args.categories * args.pages * 48
+
+    modes = [
+        ("baseline", lambda: None),
+        ("hedged", lambda: CrawlBudget(hedge=True)),
+        ("deadline", lambda: CrawlBudget(job_seconds=args.job_deadline)),
+        (
+            "hedged+deadline",
+            lambda: CrawlBudget(job_seconds=args.job_deadline, hedge=True),
+        ),
+    ]
+    log.info(
+        f"{args.jobs} jobs x {args.categories * (args.pages + 1)} pages, "
+        f"{args.tail_rate:.0%} of requests stall {args.tail:.1f}s"
+    )
+    log.info(
+        f"{'mode':<16} {'p50':>7} {'p99':>7} {'max':>7} {'complete':>9} {'products':>9}"
+    )
+    for name, budget in modes:
+        durations, products = run_jobs(base_url, args, budget)
+        complete = sum(count == expected for count in products) / len(products)
+        log.info(
+            f"{name:<16} {percentile(durations, 50):>6.2f}s {percentile(durations, 99):>6.2f}s "
+            f"{max(durations):>6.2f}s {complete:>9.0%} {sum(products) / len(products):>9.0f}"
+        )
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,340 @@
+import json
+import logging
+import math
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from typing import Any
+
+from common.archive import normalize_price
+from common.pricedrops import detector as price_drop_detector
+
+log = logging.getLogger(__name__)
+
+DEFAULT_QUARANTINE_DB = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "price_quarantine.db",
+)
+DEFAULT_MAX_Z = 3.5
+DEFAULT_MAX_JUMP = 5.0
+DEFAULT_MIN_PRICE = 5.0
+DEFAULT_MIN_CATEGORY_SIZE = 8
+# A price jump quarantined this many times in a row, at about the same price
+# and against the same reference, is taken as a real price change.
+DEFAULT_CONFIRMATIONS = 2
+CONFIRMATION_TOLERANCE = 0.1
+# Smallest spread (in log-price) a category band is allowed, so a category
+# where most products share one price does not flag every other price.
+MAD_FLOOR = 0.05
+# Scales the MAD to a standard deviation for normally distributed values.
+MAD_SCALE = 0.6745
+
+# What happens to a suspicious record.
+QUARANTINE = "quarantine"
+FLAG = "flag"
+OFF = "off"
+MODES = (QUARANTINE, FLAG, OFF)
+
+# Reasons stored with each suspicious record.
+BELOW_MIN_PRICE = "below_min_price"
+PRICE_JUMP = "price_jump"
+CATEGORY_OUTLIER = "category_outlier"
+
+ProductKey = tuple[str, str]
+
+
+class PriceAnomalyFilter:
+    """
+    Catches implausible prices before they reach the archive, price history
+    and the backend: accessory prices on a laptop card, placeholder prices,
+    and parse errors such as "1" or a price with an extra digit.
+
+    A batch is checked in one vectorized pass over log prices:
+    - below `min_price` is a placeholder;
+    - more than `max_jump` times above or below the product's own last
+      accepted price is a jump;
+    - a robust z-score beyond `max_z` from its platform and category median,
+      scaled by the median absolute deviation (MAD), is an outlier. It only
+      counts for a product with no accepted price yet, and only in
+      categories with at least `min_category_size` priced records.
+
+    In "quarantine" mode suspicious records are stored for review and left
+    out of the batch; "flag" keeps them with a `price_anomaly` reason. As
+    only accepted prices become the reference, a jump seen again after
+    `confirmations` quarantined jumps in a row to within
+    CONFIRMATION_TOLERANCE of it is accepted and re-anchors the product, so
+    a wrong first price or a real large price change is not quarantined
+    forever.
+    pandas and numpy are imported on first use.
+    """
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_QUARANTINE_DB,
+        mode: str = QUARANTINE,
+        max_z: float = DEFAULT_MAX_Z,
+        max_jump: float = DEFAULT_MAX_JUMP,
+        min_price: float = DEFAULT_MIN_PRICE,
+        min_category_size: int = DEFAULT_MIN_CATEGORY_SIZE,
+        confirmations: int = DEFAULT_CONFIRMATIONS,
+        history: Callable[[list[ProductKey]], dict[ProductKey, float]] | None = None,
+    ):
+        if mode not in MODES:
+            raise ValueError(f"Unknown price anomaly mode '{mode}'.")
+        self.db_path = db_path
+        self.mode = mode
+        self.max_z = max_z
+        self.max_jump = max_jump
+        self.min_price = min_price
+        self.min_category_size = min_category_size
+        self.confirmations = confirmations
+        self.history = history
+        self._lock = threading.Lock()
+        self.reasons: dict[str, int] = {}
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS quarantine (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                quarantined_at REAL,
+                platform TEXT,
+                category TEXT,
+                product_url TEXT,
+                product_title TEXT,
+                reason TEXT,
+                price REAL,
+                last_price REAL,
+                category_median REAL,
+                record TEXT
+            )"""
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_quarantine_url ON quarantine (product_url, id)"
+        )
+        return conn
+
+    def check(
+        self,
+        records: list[dict[str, Any]],
+        last_prices: dict[ProductKey, float] | None = None,
+    ) -> list[dict[str, Any] | None]:
+        """
+        The anomaly found for each record (reason, price, last price and
+        category median), or None for a plausible price. Records without a
+        price are never flagged.
+        """
+        import numpy as np
+        import pandas as pd
+
+        if not records:
+            return []
+        # The only per-record Python work: pulling columns out of the dicts.
+        prices = np.array(
+            [
+                normalize_price(record.get("product_price") or record.get("price"))
+                for record in records
+            ],
+            dtype=float,
+        )
+        platforms = [record.get("platform") or "" for record in records]
+        keys = list(zip(platforms, [record.get("product_url") for record in records]))
+        platform_codes, _ = pd.factorize(np.array(platforms, dtype=object))
+        category_codes, category_names = pd.factorize(
+            np.array([record.get("category") or "" for record in records], dtype=object)
+        )
+        groups, _ = pd.factorize(platform_codes * len(category_names) + category_codes)
+        if last_prices is None:
+            last_prices = self.history(keys) if self.history is not None else {}
+        get_last = last_prices.get
+        last = np.array([get_last(key) for key in keys], dtype=float)
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            priced = prices > 0
+            log_prices = np.where(priced, np.log(prices), np.nan)
+            log_last = np.where(last > 0, np.log(last), np.nan)
+
+            by_group = pd.Series(log_prices).groupby(groups)
+            median = by_group.transform("median").to_numpy()
+            deviation = np.abs(log_prices - median)
+            mad = pd.Series(deviation).groupby(groups).transform("median").to_numpy()
+            sizes = np.bincount(groups, weights=priced)[groups]
+            z = MAD_SCALE * deviation / np.maximum(mad, MAD_FLOOR)
+
+            has_history = ~np.isnan(log_last)
+            jump = has_history & (np.abs(log_prices - log_last) > np.log(self.max_jump))
+            below = priced & (prices < self.min_price)
+            outlier = (z > self.max_z) & (sizes >= self.min_category_size)
+            reasons = np.select(
+                [below, jump, outlier & ~has_history],
+                [BELOW_MIN_PRICE, PRICE_JUMP, CATEGORY_OUTLIER],
+                default="",
+            )
+
+        anomalies: list[dict[str, Any] | None] = [None] * len(records)
+        for i in np.flatnonzero(reasons != "").tolist():
+            anomalies[i] = {
+                "reason": str(reasons[i]),
+                "price": float(prices[i]),
+                "last_price": None if np.isnan(last[i]) else float(last[i]),
+                "category_median": round(float(np.exp(median[i])), 2),
+            }
+        return anomalies
+
+    def filter(self, records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """Returns the records to ingest; quarantines or flags the suspicious ones."""
+        if self.mode == OFF or not records:
+            return records
+        anomalies = self.check(records)
+        if self.mode == QUARANTINE:
+            self._accept_confirmed_jumps(records, anomalies)
+        suspicious = [
+            (record, anomaly)
+            for record, anomaly in zip(records, anomalies)
+            if anomaly is not None
+        ]
+        if not suspicious:
+            return records
+
+        with self._lock:
+            for _, anomaly in suspicious:
+                self.reasons[anomaly["reason"]] = (
+                    self.reasons.get(anomaly["reason"], 0) + 1
+                )
+        if self.mode == FLAG:
+            for record, anomaly in suspicious:
+                record["price_anomaly"] = anomaly["reason"]
+            log.warning(f"Flagged {len(suspicious)} suspicious prices.")
+            return records
+
+        self._quarantine(suspicious)
+        log.warning(
+            f"Quarantined {len(suspicious)} of {len(records)} records with suspicious prices."
+        )
+        return [
+            record for record, anomaly in zip(records, anomalies) if anomaly is None
+        ]
+
+    def _accept_confirmed_jumps(
+        self,
+        records: list[dict[str, Any]],
+        anomalies: list[dict[str, Any] | None],
+    ):
+        """
+        Clears the anomaly of each price jump that the product's last
+        `confirmations` quarantined records already showed: jumps to about
+        the same price against the same last accepted price.
+        """
+        jumps = [
+            i
+            for i, anomaly in enumerate(anomalies)
+            if anomaly is not None and anomaly["reason"] == PRICE_JUMP
+        ]
+        if self.confirmations <= 0 or not jumps:
+            return
+        urls = sorted({records[i].get("product_url") or "" for i in jumps})
+        earlier: dict[ProductKey, list[tuple[str, float, float]]] = {}
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                """SELECT platform, product_url, reason, price, last_price
+                FROM quarantine
+                WHERE product_url IN (SELECT value FROM json_each(?))
+                ORDER BY id DESC""",
+                (json.dumps(urls),),
+            )
+            for platform, url, reason, price, last_price in rows:
+                latest = earlier.setdefault((platform or "", url), [])
+                if len(latest) < self.confirmations:
+                    latest.append((reason, price, last_price))
+        finally:
+            conn.close()
+
+        tolerance = math.log1p(CONFIRMATION_TOLERANCE)
+        accepted = 0
+        for i in jumps:
+            anomaly = anomalies[i]
+            key = (records[i].get("platform") or "", records[i].get("product_url"))
+            latest = earlier.get(key, [])
+            if len(latest) == self.confirmations and all(
+                reason == PRICE_JUMP
+                and price
+                and last_price is not None
+                and math.isclose(last_price, anomaly["last_price"])
+                and abs(math.log(anomaly["price"] / price)) <= tolerance
+                for reason, price, last_price in latest
+            ):
+                anomalies[i] = None
+                accepted += 1
+        if accepted:
+            log.info(
+                f"Accepted {accepted} price jumps confirmed by {self.confirmations} "
+                "earlier runs as new reference prices."
+            )
+
+    def _quarantine(self, suspicious: list[tuple[dict[str, Any], dict[str, Any]]]):
+        quarantined_at = time.time()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.executemany(
+                    """INSERT INTO quarantine (quarantined_at, platform, category,
+                    product_url, product_title, reason, price, last_price,
+                    category_median, record) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                    [
+                        (
+                            quarantined_at,
+                            record.get("platform"),
+                            record.get("category"),
+                            record.get("product_url"),
+                            record.get("product_title"),
+                            anomaly["reason"],
+                            anomaly["price"],
+                            anomaly["last_price"],
+                            anomaly["category_median"],
+                            json.dumps(record, default=str),
+                        )
+                        for record, anomaly in suspicious
+                    ],
+                )
+        finally:
+            conn.close()
+
+    def quarantined(
+        self,
+        platform: str | None = None,
+        reason: str | None = None,
+        limit: int = 100,
+    ) -> list[dict[str, Any]]:
+        """Most recently quarantined records, for review."""
+        query = "SELECT * FROM quarantine WHERE 1 = 1"
+        params: list[Any] = []
+        if platform:
+            query += " AND platform = ?"
+            params.append(platform)
+        if reason:
+            query += " AND reason = ?"
+            params.append(reason)
+        query += " ORDER BY id DESC LIMIT ?"
+        params.append(limit)
+
+        conn = self._connect()
+        try:
+            conn.row_factory = sqlite3.Row
+            rows = [dict(row) for row in conn.execute(query, params)]
+        finally:
+            conn.close()
+        for row in rows:
+            row["record"] = json.loads(row["record"])
+        return rows
+
+
+anomaly_filter = PriceAnomalyFilter(
+    os.getenv("PRICE_QUARANTINE_DB", DEFAULT_QUARANTINE_DB),
+    os.getenv("PRICE_ANOMALY_MODE", QUARANTINE).lower(),
+    history=price_drop_detector.last_prices,
+)
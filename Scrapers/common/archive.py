@@ -0,0 +1,274 @@
+import argparse
+import datetime
+import logging
+import os
+import re
+import threading
+import uuid
+from typing import Any
+
+from common.logs import configure_logging
+
+log = logging.getLogger(__name__)
+
+DEFAULT_ARCHIVE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "price_archive",
+)
+DEFAULT_STATS_DAYS = 90
+
+_PRICE_PATTERN = re.compile(r"\d[\d,]*(?:\.\d+)?")
+
+
+def normalize_price(value: Any) -> float | None:
+    """Parses scraped price text ("EGP 12,999.00", "1,200 - 1,500") to a number."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    match = _PRICE_PATTERN.search(str(value))
+    if not match:
+        return None
+    try:
+        return float(match.group().replace(",", ""))
+    except ValueError:
+        return None
+
+
+def _schema():
+    import pyarrow as pa
+
+    # Low-cardinality strings are dictionary-encoded in memory and on disk.
+    category_type = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema(
+        [
+            ("scraped_at", pa.timestamp("s", tz="UTC")),
+            ("category", category_type),
+            ("brand", category_type),
+            ("product_title", pa.string()),
+            ("product_url", pa.string()),
+            ("product_image_url", pa.string()),
+            ("price", pa.float64()),
+        ]
+    )
+
+
+def _partition_schema():
+    import pyarrow as pa
+
+    return pa.schema([("platform", pa.string()), ("scrape_date", pa.date32())])
+
+
+def _partitioning():
+    import pyarrow.dataset as ds
+
+    return ds.partitioning(_partition_schema(), flavor="hive")
+
+
+def _write_table(table, path: str, **options):
+    """
+    Writes a Parquet file under a hidden temporary name and renames it into
+    place, so compaction and dataset scans (which skip dot-files) never see
+    a partial file.
+    """
+    import pyarrow.parquet as pq
+
+    directory, name = os.path.split(path)
+    temporary = os.path.join(directory, f".{name}.tmp")
+    pq.write_table(table, temporary, compression="zstd", use_dictionary=True, **options)
+    os.replace(temporary, path)
+
+
+class PriceArchive:
+    """
+    Append-only Parquet archive of every scraped price.
+
+    Files are laid out as `platform=<name>/scrape_date=<YYYY-MM-DD>/*.parquet`
+    so date-bounded queries only open the partitions they need, and only the
+    columns they ask for. Each run adds one small file per platform and day;
+    `compact` merges them. pyarrow is imported on first use.
+    """
+
+    def __init__(self, root: str = DEFAULT_ARCHIVE_DIR):
+        self.root = root
+        self._compact_lock = threading.Lock()
+
+    def _partition_dir(self, platform: str, scrape_date: datetime.date) -> str:
+        return os.path.join(
+            self.root, f"platform={platform}", f"scrape_date={scrape_date.isoformat()}"
+        )
+
+    def append(
+        self,
+        records: list[dict[str, Any]],
+        scraped_at: datetime.datetime | None = None,
+    ) -> int:
+        """Writes normalized records, one file per platform; returns rows written."""
+        import pyarrow as pa
+
+        if not records:
+            return 0
+        scraped_at = scraped_at or datetime.datetime.now(datetime.UTC)
+
+        by_platform: dict[str, list[dict[str, Any]]] = {}
+        for record in records:
+            if record.get("platform") and record.get("product_url"):
+                by_platform.setdefault(record["platform"], []).append(record)
+
+        schema = _schema()
+        written = 0
+        for platform, platform_records in by_platform.items():
+            table = pa.Table.from_pydict(
+                {
+                    "scraped_at": [scraped_at] * len(platform_records),
+                    "category": [r.get("category") for r in platform_records],
+                    "brand": [r.get("brand") for r in platform_records],
+                    "product_title": [r.get("product_title") for r in platform_records],
+                    "product_url": [r.get("product_url") for r in platform_records],
+                    "product_image_url": [
+                        r.get("product_image_url") for r in platform_records
+                    ],
+                    "price": [
+                        normalize_price(r.get("product_price") or r.get("price"))
+                        for r in platform_records
+                    ],
+                },
+                schema=schema,
+            )
+            partition = self._partition_dir(platform, scraped_at.date())
+            os.makedirs(partition, exist_ok=True)
+            path = os.path.join(
+                partition, f"part-{scraped_at:%H%M%S}-{uuid.uuid4().hex[:8]}.parquet"
+            )
+            _write_table(table, path)
+            written += table.num_rows
+        log.info(f"Archived {written} price records under {self.root}")
+        return written
+
+    def compact(self, min_files: int = 2) -> dict[str, int]:
+        """
+        Merges each partition holding at least `min_files` files into one file.
+
+        The merged file is renamed into place before the originals are
+        removed, so a partition is never empty.
+        """
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        merged_partitions = 0
+        merged_files = 0
+        with self._compact_lock:
+            for partition, _, files in os.walk(self.root):
+                parts = sorted(f for f in files if f.endswith(".parquet"))
+                if len(parts) < min_files:
+                    continue
+                paths = [os.path.join(partition, f) for f in parts]
+                table = pa.concat_tables([pq.read_table(path) for path in paths])
+                target = os.path.join(
+                    partition, f"compacted-{uuid.uuid4().hex[:8]}.parquet"
+                )
+                _write_table(table, target, row_group_size=128 * 1024)
+                for path in paths:
+                    os.remove(path)
+                merged_partitions += 1
+                merged_files += len(paths)
+                log.info(f"Compacted {len(paths)} files in {partition}")
+        return {"partitions": merged_partitions, "files_merged": merged_files}
+
+    def dataset(self):
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        # An explicit schema, so a partition whose only file is still being
+        # written reads as empty instead of failing schema inference.
+        return ds.dataset(
+            self.root,
+            schema=pa.unify_schemas([_schema(), _partition_schema()]),
+            format="parquet",
+            partitioning=_partitioning(),
+            exclude_invalid_files=True,
+        )
+
+    def price_stats(
+        self,
+        days: int = DEFAULT_STATS_DAYS,
+        platform: str | None = None,
+        product_url: str | None = None,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Min/avg/max price per product over the last `days` days.
+
+        The date and platform filters hit partition columns, so only matching
+        directories are opened, and only the url/title/price columns are read.
+        """
+        import pyarrow.compute as pc
+        import pyarrow.dataset as ds
+
+        if not os.path.isdir(self.root):
+            return []
+
+        # Partitions are UTC dates.
+        today = datetime.datetime.now(datetime.UTC).date()
+        cutoff = today - datetime.timedelta(days=days)
+        condition = ds.field("scrape_date") >= cutoff
+        if platform:
+            condition = condition & (ds.field("platform") == platform)
+        if product_url:
+            condition = condition & (ds.field("product_url") == product_url)
+
+        table = self.dataset().to_table(
+            columns=["platform", "product_url", "product_title", "price"],
+            filter=condition & pc.is_valid(ds.field("price")),
+        )
+        if table.num_rows == 0:
+            return []
+
+        stats = table.group_by(["platform", "product_url"]).aggregate(
+            [
+                ("price", "min"),
+                ("price", "mean"),
+                ("price", "max"),
+                ("price", "count"),
+                ("product_title", "last"),
+            ]
+        )
+        stats = stats.sort_by([("price_count", "descending")])
+        if limit:
+            stats = stats.slice(0, limit)
+        return [
+            {
+                "platform": row["platform"],
+                "product_url": row["product_url"],
+                "product_title": row["product_title_last"],
+                "min_price": row["price_min"],
+                "avg_price": round(row["price_mean"], 2),
+                "max_price": row["price_max"],
+                "observations": row["price_count"],
+            }
+            for row in stats.to_pylist()
+        ]
+
+
+archive = PriceArchive(os.getenv("PRICE_ARCHIVE_DIR", DEFAULT_ARCHIVE_DIR))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Maintain the price archive.")
+    parser.add_argument("command", choices=["compact", "stats"])
+    parser.add_argument("--days", type=int, default=DEFAULT_STATS_DAYS)
+    parser.add_argument("--platform")
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--min-files", type=int, default=2)
+    args = parser.parse_args()
+
+    configure_logging()
+    if args.command == "compact":
+        log.info(f"Compaction result: {archive.compact(args.min_files)}")
+    else:
+        for row in archive.price_stats(args.days, args.platform, limit=args.limit):
+            log.info(
+                f"{row['platform']:<7} min {row['min_price']:>10.2f} avg {row['avg_price']:>10.2f} "
+                f"max {row['max_price']:>10.2f} n={row['observations']:<4} {row['product_title'][:60]}"
+            )
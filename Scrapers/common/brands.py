@@ -0,0 +1,160 @@
+import json
+import logging
+import os
+import threading
+from collections import deque
+from collections.abc import Iterable, Iterator
+from typing import Any
+
+from common.categories import registry as category_registry
+
+log = logging.getLogger(__name__)
+
+DEFAULT_ALIASES_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "brand_aliases.json"
+)
+
+
+class AhoCorasick:
+    """
+    Multi-pattern string matcher: finds every occurrence of every pattern in a
+    single left-to-right pass over the text, independent of the pattern count.
+    """
+
+    def __init__(self, patterns: dict[str, Any]):
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[tuple[int, Any]]] = [[]]
+
+        for pattern, value in patterns.items():
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                node = next_node
+            self._out[node].append((len(pattern), value))
+
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                self._fail[child] = self._goto[fallback].get(char, 0)
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def iter_matches(self, text: str) -> Iterator[tuple[int, int, Any]]:
+        """Yields `(start, end, value)` for every pattern occurrence in `text`."""
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for index, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            for length, value in out[node]:
+                yield index + 1 - length, index + 1, value
+
+
+class BrandTagger:
+    """
+    Tags product titles with a canonical brand name.
+
+    Brand names and aliases are case-folded and compiled into one automaton, so
+    tagging costs one pass over the title however many brands are known. Only
+    whole-word matches count ("Mi" matches "Mi Band", not "Microsoft"); the
+    leftmost, then longest, match wins.
+    """
+
+    def __init__(
+        self,
+        brands: Iterable[str],
+        aliases: dict[str, list[str]] | None = None,
+        ignore: Iterable[str] = (),
+    ):
+        ignored = {name.casefold() for name in ignore}
+        canonical: dict[str, str] = {}
+
+        for brand, brand_aliases in (aliases or {}).items():
+            canonical[brand.casefold()] = brand
+            for alias in brand_aliases:
+                canonical[alias.casefold()] = brand
+
+        for brand in brands:
+            key = brand.strip().casefold()
+            if not key or key in ignored:
+                continue
+            current = canonical.get(key)
+            # Prefer a properly capitalized spelling over an all-lowercase one.
+            if current is None or (current.islower() and not brand.islower()):
+                canonical[key] = brand.strip()
+
+        self.brands = sorted(set(canonical.values()))
+        self._matcher = AhoCorasick(canonical)
+
+    def extract(self, title: str | None) -> str | None:
+        if not title:
+            return None
+        text = title.casefold()
+        best: tuple[int, int, str] | None = None
+        for start, end, brand in self._matcher.iter_matches(text):
+            if start > 0 and text[start - 1].isalnum():
+                continue
+            if end < len(text) and text[end].isalnum():
+                continue
+            if best is None or start < best[0] or (start == best[0] and end > best[1]):
+                best = (start, end, brand)
+        return best[2] if best else None
+
+    def tag(self, products: list[dict[str, Any]]) -> int:
+        """Sets `brand` on every product record; returns how many were recognized."""
+        tagged = 0
+        for product in products:
+            brand = self.extract(product.get("product_title"))
+            product["brand"] = brand
+            if brand:
+                tagged += 1
+        return tagged
+
+
+def load_brand_aliases(path: str = DEFAULT_ALIASES_PATH) -> dict[str, Any]:
+    try:
+        with open(path) as aliases_file:
+            return json.load(aliases_file)
+    except FileNotFoundError:
+        log.warning(f"Brand aliases file not found at '{path}', using no aliases.")
+    except json.JSONDecodeError as e:
+        log.error(f"Error decoding brand aliases file '{path}': {e}")
+    return {}
+
+
+_tagger: BrandTagger | None = None
+_tagger_lock = threading.Lock()
+
+
+def get_brand_tagger() -> BrandTagger:
+    """Builds the shared tagger from every brand list in the category registry."""
+    global _tagger
+    if _tagger is None:
+        with _tagger_lock:
+            if _tagger is None:
+                brands = [
+                    brand
+                    for platform in ("jumia", "amazon", "2b")
+                    for category in category_registry.categories(
+                        platform, include_disabled=True
+                    )
+                    for brand in category["brands"]
+                ]
+                config = load_brand_aliases()
+                _tagger = BrandTagger(
+                    brands, config.get("aliases", {}), config.get("ignore", [])
+                )
+                log.info(f"Compiled brand tagger with {len(_tagger.brands)} brands.")
+    return _tagger
@@ -0,0 +1,154 @@
+import json
+import logging
+import os
+import threading
+from typing import Any
+from urllib.parse import urldefrag
+
+log = logging.getLogger(__name__)
+
+DEFAULT_REGISTRY_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "categories.json"
+)
+PLATFORMS = ("amazon", "jumia", "2b")
+
+
+class CategoryRegistryError(ValueError):
+    """Raised when the category registry file is missing or inconsistent."""
+
+
+def normalize_url_template(url_template: str) -> str:
+    """Drops the fragment so `...?page={}` and `...?page={}#catalog-listing` compare equal."""
+    return urldefrag(url_template)[0]
+
+
+def _validate_platform(
+    platform: str, config: dict[str, Any], seen_templates: dict[str, str]
+) -> list[dict[str, Any]]:
+    if not isinstance(config, dict) or not isinstance(config.get("categories"), list):
+        raise CategoryRegistryError(f"{platform}: expected a 'categories' list.")
+
+    base_url = config.get("base_url")
+    seen_ids = set()
+    categories = []
+    for index, entry in enumerate(config["categories"]):
+        category_id = entry.get("id") if isinstance(entry, dict) else None
+        if not category_id or not isinstance(category_id, str):
+            raise CategoryRegistryError(f"{platform}[{index}]: missing 'id'.")
+        if category_id in seen_ids:
+            raise CategoryRegistryError(
+                f"{platform}: duplicate category id '{category_id}'."
+            )
+        seen_ids.add(category_id)
+
+        if "node" in entry:
+            if not base_url:
+                raise CategoryRegistryError(
+                    f"{platform}.{category_id}: 'node' requires a platform 'base_url'."
+                )
+            url_template = base_url.format(entry["node"], "{}")
+        else:
+            url_template = entry.get("url_template")
+        if not url_template or url_template.count("{}") != 1:
+            raise CategoryRegistryError(
+                f"{platform}.{category_id}: 'url_template' must contain exactly one '{{}}' page placeholder."
+            )
+
+        normalized = normalize_url_template(url_template)
+        if normalized in seen_templates:
+            raise CategoryRegistryError(
+                f"{platform}.{category_id}: URL template already used by {seen_templates[normalized]}."
+            )
+        seen_templates[normalized] = f"{platform}.{category_id}"
+
+        category = dict(entry)
+        category["platform"] = platform
+        category["category"] = entry.get("category", category_id)
+        category["url_template"] = url_template
+        category["enabled"] = entry.get("enabled", True)
+        category["tags"] = list(entry.get("tags", []))
+        category["brands"] = list(entry.get("brands", []))
+        categories.append(category)
+    return categories
+
+
+def validate_registry(raw: dict[str, Any]) -> dict[str, list[dict[str, Any]]]:
+    """
+    Validates a raw registry document and returns the categories per platform.
+
+    Category ids must be unique within a platform and URL templates unique across
+    the whole registry (ignoring fragments), so one listing is never crawled twice.
+    """
+    if not isinstance(raw, dict):
+        raise CategoryRegistryError("Registry root must be an object.")
+    unknown = set(raw) - set(PLATFORMS)
+    if unknown:
+        raise CategoryRegistryError(f"Unknown platforms in registry: {sorted(unknown)}")
+
+    seen_templates: dict[str, str] = {}
+    return {
+        platform: _validate_platform(platform, raw[platform], seen_templates)
+        for platform in PLATFORMS
+        if platform in raw
+    }
+
+
+class CategoryRegistry:
+    """Lazily loads and validates the category registry file on first use."""
+
+    def __init__(self, path: str = DEFAULT_REGISTRY_PATH):
+        self.path = path
+        self._categories: dict[str, list[dict[str, Any]]] | None = None
+        self._lock = threading.Lock()
+
+    def _load(self) -> dict[str, list[dict[str, Any]]]:
+        if self._categories is None:
+            with self._lock:
+                if self._categories is None:
+                    try:
+                        with open(self.path) as registry_file:
+                            raw = json.load(registry_file)
+                    except FileNotFoundError:
+                        raise CategoryRegistryError(
+                            f"Category registry not found at '{self.path}'"
+                        )
+                    except json.JSONDecodeError as e:
+                        raise CategoryRegistryError(
+                            f"Error decoding category registry '{self.path}': {e}"
+                        )
+                    self._categories = validate_registry(raw)
+                    log.info(
+                        f"Loaded category registry from {self.path}: "
+                        + ", ".join(
+                            f"{platform}={len(cats)}"
+                            for platform, cats in self._categories.items()
+                        )
+                    )
+        return self._categories
+
+    def categories(
+        self,
+        platform: str,
+        include_disabled: bool = False,
+        tag: str | None = None,
+    ) -> list[dict[str, Any]]:
+        """Returns the platform's categories in registry order."""
+        return [
+            category
+            for category in self._load().get(platform, [])
+            if (include_disabled or category["enabled"])
+            and (tag is None or tag in category["tags"])
+        ]
+
+    def get(self, platform: str, category_id: str) -> dict[str, Any] | None:
+        for category in self._load().get(platform, []):
+            if category["id"] == category_id:
+                return category
+        return None
+
+    def reload(self):
+        with self._lock:
+            self._categories = None
+
+
+registry = CategoryRegistry()
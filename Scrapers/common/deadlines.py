@@ -0,0 +1,129 @@
+import collections
+import threading
+import time
+from typing import Optional
+
+from common.memory import MemoryGuard
+
+# Hedging waits for enough samples to trust the percentile.
+MIN_LATENCY_SAMPLES = 20
+LATENCY_WINDOW = 256
+HEDGE_PERCENTILE = 95
+
+
+class Deadline:
+    """
+    A point in time a crawl must finish by; `None` seconds means no limit.
+    A deadline also ends with its parent, including a parent ended early
+    with `expire()`.
+    """
+
+    def __init__(self, seconds: float | None, parent: Optional["Deadline"] = None):
+        self.expires_at = time.monotonic() + seconds if seconds is not None else None
+        self.parent = parent
+
+    def remaining(self) -> float | None:
+        remaining = (
+            max(0.0, self.expires_at - time.monotonic())
+            if self.expires_at is not None
+            else None
+        )
+        if self.parent is not None:
+            inherited = self.parent.remaining()
+            if inherited is not None and (remaining is None or inherited < remaining):
+                remaining = inherited
+        return remaining
+
+    def expired(self) -> bool:
+        remaining = self.remaining()
+        return remaining is not None and remaining <= 0
+
+    def expire(self):
+        """Ends the deadline now."""
+        self.expires_at = time.monotonic()
+
+    def cap(self, timeout: float) -> float:
+        """Shortens a request timeout so it cannot run past the deadline."""
+        remaining = self.remaining()
+        return timeout if remaining is None else max(0.1, min(timeout, remaining))
+
+
+class LatencyTracker:
+    """Rolling window of successful fetch latencies for one platform."""
+
+    def __init__(self, window: int = LATENCY_WINDOW):
+        self._samples = collections.deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, percent: float) -> float | None:
+        with self._lock:
+            if len(self._samples) < MIN_LATENCY_SAMPLES:
+                return None
+            samples = sorted(self._samples)
+        index = min(len(samples) - 1, int(len(samples) * percent / 100))
+        return samples[index]
+
+
+_trackers: dict[str, LatencyTracker] = {}
+_trackers_lock = threading.Lock()
+
+
+def latency_tracker(platform: str) -> LatencyTracker:
+    """Shared per platform, so pipelines built per category still learn the p95."""
+    with _trackers_lock:
+        if platform not in _trackers:
+            _trackers[platform] = LatencyTracker()
+        return _trackers[platform]
+
+
+class CrawlBudget:
+    """
+    Time and memory limits and tail-latency handling for a crawl.
+
+    `job_seconds` bounds a whole pipeline run and `category_seconds` each
+    category in it; once exceeded, the crawl stops paging and returns what it
+    has, so partial results are still ingested. With `hedge`, a page that has
+    not answered within the platform's observed p95 latency gets a second
+    request and whichever answers first is used. `memory_limit_mb` turns on
+    memory-bounded mode (see MemoryGuard). `max_pages` caps the listing
+    pages crawled per category, for partial and sampled refreshes. Create
+    one budget per job:
+    the job deadline starts with the first pipeline run that uses it and is
+    shared by any further pipelines of that job.
+    """
+
+    def __init__(
+        self,
+        job_seconds: float | None = None,
+        category_seconds: float | None = None,
+        hedge: bool = False,
+        hedge_percentile: float = HEDGE_PERCENTILE,
+        memory_limit_mb: float | None = None,
+        trace_allocations: bool = False,
+        max_pages: int | None = None,
+    ):
+        self.job_seconds = job_seconds
+        self.category_seconds = category_seconds
+        self.hedge = hedge
+        self.hedge_percentile = hedge_percentile
+        self.memory = (
+            MemoryGuard(memory_limit_mb, trace_allocations) if memory_limit_mb else None
+        )
+        self.max_pages = max_pages
+        self._job_deadline: Deadline | None = None
+
+    def job_deadline(self) -> Deadline:
+        if self._job_deadline is None:
+            self._job_deadline = Deadline(self.job_seconds)
+        return self._job_deadline
+
+    def cancel(self):
+        """
+        Expires the job deadline: the crawl stops paging at its next page and
+        returns what it has, as if its time budget had run out.
+        """
+        self.job_deadline().expire()
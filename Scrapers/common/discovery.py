@@ -0,0 +1,376 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections.abc import Callable
+from types import ModuleType
+from typing import TYPE_CHECKING, Any
+
+from common.categories import CategoryRegistry, normalize_url_template
+from common.categories import registry as default_registry
+from common.tracing import PARSE, JobTrace, count, span
+
+if TYPE_CHECKING:
+    from common.pipeline import ScrapePipeline
+
+log = logging.getLogger(__name__)
+
+DEFAULT_TREE_DB = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "category_tree.db",
+)
+DEFAULT_TTL_HOURS = 24.0
+# A discovery run is a handful of polite requests, not a crawl: pages are
+# fetched one at a time, `request_interval` apart, and at most `max_pages`
+# of them (navigation pages and count probes together).
+DEFAULT_MAX_PAGES = 30
+DEFAULT_REQUEST_INTERVAL = 2.0
+DEFAULT_MAX_PROBES = 10
+
+DISCOVERY = "discovery"
+
+
+def category_key(category: dict[str, Any]) -> str:
+    """What identifies a category across runs: its browse node, else its listing URL."""
+    if category.get("node"):
+        return f"node:{category['node']}"
+    return normalize_url_template(category["url_template"])
+
+
+def category_slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", name.lower()).strip("_") or "category"
+
+
+class CategoryTreeCache:
+    """
+    The last discovered category tree of each platform, with when it was
+    fetched and what changed against the tree before it.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_TREE_DB):
+        self.db_path = db_path
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS category_trees (
+                platform TEXT PRIMARY KEY,
+                fetched_at REAL NOT NULL,
+                categories TEXT NOT NULL,
+                changes TEXT NOT NULL
+            )"""
+        )
+        return conn
+
+    def get(self, platform: str) -> dict[str, Any] | None:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT * FROM category_trees WHERE platform = ?", (platform,)
+            ).fetchone()
+        finally:
+            conn.close()
+        if row is None:
+            return None
+        return {
+            "platform": platform,
+            "fetched_at": row["fetched_at"],
+            "categories": json.loads(row["categories"]),
+            "changes": json.loads(row["changes"]),
+        }
+
+    def save(
+        self,
+        platform: str,
+        categories: list[dict[str, Any]],
+        changes: dict[str, Any],
+        fetched_at: float,
+    ):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO category_trees VALUES (?, ?, ?, ?)",
+                    (platform, fetched_at, json.dumps(categories), json.dumps(changes)),
+                )
+        finally:
+            conn.close()
+
+
+class CategoryDiscovery:
+    """
+    Finds each platform's categories from its own navigation instead of the
+    hand-edited registry.
+
+    The scraper module supplies the seed page (`CATEGORY_TREE_URL`), the
+    regions to parse (`CATEGORY_TREE_REGIONS`), `extract_category_links`,
+    which reads category links off a navigation page (flagging department
+    pages whose own listing holds the subcategories), and
+    `extract_result_count`, which reads a listing's product count. The seed
+    and the department pages it links are fetched through the platform's
+    pipeline (headers, retries, tracing), one request at a time and
+    `request_interval` apart. A department page is also a listing, so its
+    count comes free; other categories get a one-page count probe only when
+    no earlier run counted them, at most `max_probes` per run.
+
+    The tree is cached for `ttl_seconds`; within it `discover` costs no
+    request. Each report compares the tree with the registry (categories
+    not crawled yet, registry categories no longer in the tree) and with the
+    previous tree (renamed and vanished categories).
+    """
+
+    def __init__(
+        self,
+        load_module: Callable[[str], ModuleType],
+        cache: CategoryTreeCache | None = None,
+        registry: CategoryRegistry | None = None,
+        ttl_seconds: float = DEFAULT_TTL_HOURS * 3600,
+        max_pages: int = DEFAULT_MAX_PAGES,
+        request_interval: float = DEFAULT_REQUEST_INTERVAL,
+        max_probes: int = DEFAULT_MAX_PROBES,
+        pipeline_options: dict[str, dict[str, Any]] | None = None,
+        seed_urls: dict[str, str] | None = None,
+        trace: JobTrace | None = None,
+    ):
+        self.load_module = load_module
+        self.cache = cache or CategoryTreeCache()
+        self.registry = registry or default_registry
+        self.ttl_seconds = ttl_seconds
+        self.max_pages = max(1, max_pages)
+        self.request_interval = request_interval
+        self.max_probes = max_probes
+        self.pipeline_options = pipeline_options or {}
+        self.seed_urls = seed_urls or {}
+        self.trace = trace
+        # Serializes discovery runs, so two callers never crawl the same tree.
+        self._lock = threading.Lock()
+
+    def discover(self, platform: str, refresh: bool = False) -> dict[str, Any]:
+        """
+        The platform's category report, from the cache when it is younger
+        than the TTL (unless `refresh`), from a discovery run otherwise.
+        """
+        with self._lock:
+            cached = self.cache.get(platform)
+            fresh = (
+                cached is not None
+                and time.time() - cached["fetched_at"] < self.ttl_seconds
+            )
+            requests_made = 0
+            if refresh or not fresh:
+                cached, requests_made = self._crawl(platform, cached)
+        return self._report(platform, cached, requests_made)
+
+    def _crawl(self, platform: str, previous: dict[str, Any] | None):
+        module = self.load_module(platform)
+        pipeline: ScrapePipeline = module.build_pipeline(
+            max_retries=2,
+            download_images=False,
+            trace=self.trace,
+            **self.pipeline_options.get(platform, {}),
+        )
+        fetcher = _PoliteFetcher(pipeline, module, self.request_interval, self.trace)
+        seed = self.seed_urls.get(platform, module.CATEGORY_TREE_URL)
+        log.info(f"Discovering {platform} categories from {seed}...")
+
+        tree: dict[str, dict[str, Any]] = {}
+        soup = fetcher.fetch(seed)
+        departments = []
+        if soup is not None:
+            for link in module.extract_category_links(soup, seed):
+                self._add(tree, link)
+                if link.get("department"):
+                    departments.append(link)
+        for department in departments:
+            if fetcher.requests >= self.max_pages:
+                count(self.trace, "page_limit_stops", 1, DISCOVERY)
+                break
+            url = department["url_template"].format(1)
+            soup = fetcher.fetch(url)
+            if soup is None:
+                continue
+            tree[category_key(department)]["product_count"] = (
+                module.extract_result_count(soup)
+            )
+            for link in module.extract_category_links(soup, url):
+                if category_key(link) not in tree:
+                    self._add(tree, {**link, "parent": department["name"]})
+
+        if not tree:
+            if previous is not None:
+                log.warning(f"No {platform} categories found; keeping the cached tree.")
+                return previous, fetcher.requests
+            raise RuntimeError(f"No {platform} categories found at {seed}.")
+
+        previous_tree = {
+            category_key(category): category
+            for category in (previous or {}).get("categories", [])
+        }
+        known = {category_key(category) for category in self._registered(platform)}
+        probes = 0
+        for key, category in tree.items():
+            earlier = previous_tree.get(key)
+            if earlier is not None:
+                category["first_seen_at"] = earlier["first_seen_at"]
+                if category["product_count"] is None:
+                    category["product_count"] = earlier.get("product_count")
+            if (
+                category["product_count"] is None
+                and key not in known
+                and probes < self.max_probes
+                and fetcher.requests < self.max_pages
+            ):
+                soup = fetcher.fetch(category["url_template"].format(1))
+                probes += 1
+                if soup is not None:
+                    category["product_count"] = module.extract_result_count(soup)
+
+        changes = {
+            "renamed": [
+                {
+                    "key": key,
+                    "old_name": previous_tree[key]["name"],
+                    "new_name": category["name"],
+                }
+                for key, category in tree.items()
+                if key in previous_tree
+                and previous_tree[key]["name"] != category["name"]
+            ],
+            "vanished": [
+                {"key": key, "name": category["name"]}
+                for key, category in previous_tree.items()
+                if key not in tree
+            ],
+        }
+        fetched = {
+            "platform": platform,
+            "fetched_at": time.time(),
+            "categories": list(tree.values()),
+            "changes": changes,
+        }
+        self.cache.save(platform, fetched["categories"], changes, fetched["fetched_at"])
+        log.info(
+            f"Discovered {len(tree)} {platform} categories with {fetcher.requests} requests "
+            f"({probes} count probes)."
+        )
+        return fetched, fetcher.requests
+
+    @staticmethod
+    def _add(tree: dict[str, dict[str, Any]], link: dict[str, Any]):
+        key = category_key(link)
+        if key in tree:
+            return
+        tree[key] = {
+            "name": link["name"],
+            "url_template": link["url_template"],
+            "node": link.get("node"),
+            "parent": link.get("parent"),
+            "product_count": link.get("product_count"),
+            "first_seen_at": time.time(),
+        }
+
+    def _registered(self, platform: str) -> list[dict[str, Any]]:
+        return self.registry.categories(platform, include_disabled=True)
+
+    def _report(
+        self, platform: str, tree: dict[str, Any], requests_made: int
+    ) -> dict[str, Any]:
+        registered = {
+            category_key(category): category for category in self._registered(platform)
+        }
+        categories = []
+        new = []
+        for category in tree["categories"]:
+            key = category_key(category)
+            entry = {
+                **category,
+                "key": key,
+                "registry_id": registered[key]["id"] if key in registered else None,
+            }
+            categories.append(entry)
+            if key not in registered:
+                new.append({**entry, "registry_entry": registry_entry(category)})
+        discovered = {category["key"] for category in categories}
+        removed = [
+            {"key": key, "registry_id": category["id"], "name": category["category"]}
+            for key, category in registered.items()
+            if key not in discovered
+        ] + [
+            {"key": vanished["key"], "registry_id": None, "name": vanished["name"]}
+            for vanished in tree["changes"]["vanished"]
+            if vanished["key"] not in registered
+        ]
+        renamed = [
+            {
+                **rename,
+                "registry_id": (
+                    registered[rename["key"]]["id"]
+                    if rename["key"] in registered
+                    else None
+                ),
+            }
+            for rename in tree["changes"]["renamed"]
+        ]
+        return {
+            "platform": platform,
+            "fetched_at": tree["fetched_at"],
+            "from_cache": requests_made == 0,
+            "requests": requests_made,
+            "categories": categories,
+            "new": sorted(new, key=lambda c: -(c["product_count"] or 0)),
+            "removed": removed,
+            "renamed": renamed,
+        }
+
+
+def registry_entry(category: dict[str, Any]) -> dict[str, Any]:
+    """A categories.json entry for a discovered category, disabled until reviewed."""
+    entry: dict[str, Any] = {"id": category_slug(category["name"])}
+    if category.get("node"):
+        entry["node"] = category["node"]
+    else:
+        entry["url_template"] = category["url_template"]
+    entry["category"] = category["name"]
+    entry["enabled"] = False
+    return entry
+
+
+class _PoliteFetcher:
+    """Fetches and parses navigation pages one at a time, spaced out."""
+
+    def __init__(
+        self,
+        pipeline: "ScrapePipeline",
+        module: ModuleType,
+        interval: float,
+        trace: JobTrace | None,
+    ):
+        self.pipeline = pipeline
+        self.module = module
+        self.interval = interval
+        self.trace = trace
+        self.requests = 0
+        self._last: float | None = None
+
+    def fetch(self, url: str):
+        # Imported here so the service does not load bs4 before discovery runs.
+        from common.parsing import parse_document
+
+        if self._last is not None:
+            time.sleep(max(0.0, self._last + self.interval - time.monotonic()))
+        self._last = time.monotonic()
+        self.requests += 1
+        response = self.pipeline.fetch(url, DISCOVERY)
+        if response is None:
+            count(self.trace, "failed_pages", 1, DISCOVERY)
+            return None
+        with span(self.trace, PARSE, DISCOVERY):
+            soup = parse_document(response.content, self.module.CATEGORY_TREE_REGIONS)
+        count(self.trace, "pages", 1, DISCOVERY)
+        return soup
@@ -0,0 +1,111 @@
+import asyncio
+import json
+import threading
+import time
+from collections import deque
+from collections.abc import AsyncIterator
+from itertools import islice
+from typing import Any
+
+DEFAULT_MAX_EVENTS = 2000
+KEEPALIVE_SECONDS = 15.0
+
+# Event types. Products are a separate type so subscribers that only follow
+# progress never receive (or serialize) the records.
+QUEUED = "queued"
+STARTED = "started"
+CATEGORY_STARTED = "category_started"
+PAGE = "page"
+PRODUCTS = "products"
+CATEGORY_FINISHED = "category_finished"
+IMAGES_PENDING = "images_pending"
+INGEST = "ingest"
+FINISHED = "finished"
+GAP = "gap"
+
+
+class JobEvents:
+    """
+    Progress log of one job, streamed to subscribers as it grows.
+
+    Publishing appends to a bounded buffer and wakes waiting subscribers; it
+    never waits on them, so a slow or stalled client cannot slow the crawl.
+    A subscriber that falls more than `max_events` behind skips ahead and is
+    told how many events it missed with a "gap" event.
+    """
+
+    def __init__(self, max_events: int = DEFAULT_MAX_EVENTS):
+        self._events: deque = deque(maxlen=max_events)
+        self._next_seq = 0
+        self._lock = threading.Lock()
+        self._waiters: list[tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+        self.closed = False
+
+    def publish(self, event_type: str, **fields):
+        with self._lock:
+            if self.closed:
+                return
+            self._events.append(
+                {
+                    "seq": self._next_seq,
+                    "type": event_type,
+                    "time": time.time(),
+                    **fields,
+                }
+            )
+            self._next_seq += 1
+            if event_type == FINISHED:
+                self.closed = True
+            waiters = list(self._waiters)
+        for loop, ready in waiters:
+            if not ready.is_set():
+                loop.call_soon_threadsafe(ready.set)
+
+    def since(self, seq: int) -> tuple[list[dict[str, Any]], int]:
+        """Buffered events from `seq` on, and how many before them were dropped."""
+        with self._lock:
+            if not self._events:
+                return [], 0
+            first = self._events[0]["seq"]
+            start = max(0, seq - first)
+            return list(islice(self._events, start, None)), max(0, first - seq)
+
+    async def subscribe(self, after: int = -1) -> AsyncIterator[dict[str, Any] | None]:
+        """
+        Yields events after sequence number `after` until the job finishes.
+        Yields None after KEEPALIVE_SECONDS without events.
+        """
+        ready = asyncio.Event()
+        waiter = (asyncio.get_running_loop(), ready)
+        with self._lock:
+            self._waiters.append(waiter)
+        try:
+            next_seq = after + 1
+            while True:
+                ready.clear()
+                events, missed = self.since(next_seq)
+                if missed:
+                    yield {"seq": next_seq + missed - 1, "type": GAP, "missed": missed}
+                for event in events:
+                    yield event
+                    next_seq = event["seq"] + 1
+                if self.closed and not self.since(next_seq)[0]:
+                    return
+                if not events:
+                    try:
+                        await asyncio.wait_for(ready.wait(), KEEPALIVE_SECONDS)
+                    except TimeoutError:
+                        yield None
+        finally:
+            with self._lock:
+                self._waiters.remove(waiter)
+
+
+def format_sse(event: dict[str, Any] | None) -> str:
+    """One Server-Sent Events message; None becomes a keep-alive comment."""
+    if event is None:
+        return ": keep-alive\n\n"
+    return (
+        f"id: {event['seq']}\nevent: {event['type']}\n"
+        f"data: {json.dumps(event, default=str)}\n\n"
+    )
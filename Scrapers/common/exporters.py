@@ -0,0 +1,244 @@
+import csv
+import io
+import json
+import logging
+import os
+import threading
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+from typing import Any
+
+from common.brands import get_brand_tagger
+
+log = logging.getLogger(__name__)
+
+# The unified record fields, in file order. Amazon records carry `price`,
+# the others `product_price`; both are exported as `price`. `brand` is
+# tagged on export when the record does not carry one yet.
+EXPORT_COLUMNS = [
+    "platform",
+    "category",
+    "brand",
+    "product_id",
+    "product_title",
+    "price",
+    "product_url",
+    "product_image_url",
+    "product_image_local_path",
+]
+DEFAULT_CHUNK_ROWS = 5000
+
+CSV = "csv"
+NDJSON = "ndjson"
+PARQUET = "parquet"
+GZIP = "gzip"
+ZSTD = "zstd"
+COMPRESSION_EXTENSIONS = {GZIP: ".gz", ZSTD: ".zst"}
+
+
+def export_row(record: dict[str, Any], columns: list[str]) -> list[str | None]:
+    row = []
+    for column in columns:
+        value = record.get(column)
+        if column == "price" and value is None:
+            value = record.get("product_price")
+        row.append(None if value is None else str(value))
+    return row
+
+
+class Exporter(ABC):
+    """
+    Writes product records to a file in chunks as batches arrive, so memory
+    stays bounded by `chunk_rows` however long the run. `on_batch` matches
+    the pipeline's batch callback; `close` flushes the last chunk. Usable as
+    a context manager.
+
+    An export is the crawl's raw output: records are written as the
+    pipeline produced them, with brands tagged, but their prices have not
+    been through the service's anomaly check, so prices the service would
+    quarantine are exported too.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        columns: list[str] | None = None,
+        compression: str | None = None,
+        chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    ):
+        if compression not in (None, GZIP, ZSTD):
+            raise ValueError(f"Unsupported compression: {compression}")
+        self.path = path
+        self.columns = list(columns or EXPORT_COLUMNS)
+        self.compression = compression
+        self.chunk_rows = max(1, chunk_rows)
+        self.rows = 0
+        self._chunk: list[list[str | None]] = []
+        self._lock = threading.Lock()
+        self._closed = False
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def write(self, records: Iterable[dict[str, Any]]):
+        tagger = get_brand_tagger()
+        with self._lock:
+            for record in records:
+                if "brand" not in record:
+                    record["brand"] = tagger.extract(record.get("product_title"))
+                self._chunk.append(export_row(record, self.columns))
+                if len(self._chunk) >= self.chunk_rows:
+                    self._flush()
+
+    def on_batch(self, category: str, records: list[dict[str, Any]]):
+        self.write(records)
+
+    def _flush(self):
+        if self._chunk:
+            self._write_chunk(self._chunk)
+            self.rows += len(self._chunk)
+            self._chunk = []
+
+    @abstractmethod
+    def _write_chunk(self, rows: list[list[str | None]]):
+        """Writes one chunk of rows to the file."""
+
+    def _finish(self):
+        pass
+
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._flush()
+            self._finish()
+        log.info(f"Exported {self.rows} records to {self.path}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _TextExporter(Exporter):
+    """A line-oriented text file, optionally gzip or zstd compressed."""
+
+    def __init__(self, path: str, *args, **kwargs):
+        super().__init__(path, *args, **kwargs)
+        self._stream = self._open_text()
+
+    def _open_text(self) -> io.TextIOBase:
+        if self.compression == GZIP:
+            import gzip
+
+            return gzip.open(self.path, "wt", encoding="utf-8", newline="")
+        if self.compression == ZSTD:
+            import zstandard
+
+            raw = zstandard.ZstdCompressor().stream_writer(open(self.path, "wb"))
+            return io.TextIOWrapper(raw, encoding="utf-8", newline="")
+        return open(self.path, "w", encoding="utf-8", newline="")
+
+    def _finish(self):
+        self._stream.close()
+
+
+class CsvExporter(_TextExporter):
+    def __init__(self, path: str, *args, **kwargs):
+        super().__init__(path, *args, **kwargs)
+        self._writer = csv.writer(self._stream)
+        self._writer.writerow(self.columns)
+
+    def _write_chunk(self, rows: list[list[str | None]]):
+        self._writer.writerows(rows)
+
+
+class NdjsonExporter(_TextExporter):
+    def _write_chunk(self, rows: list[list[str | None]]):
+        self._stream.write(
+            "".join(
+                json.dumps(dict(zip(self.columns, row)), ensure_ascii=False) + "\n"
+                for row in rows
+            )
+        )
+
+
+class ParquetExporter(Exporter):
+    """
+    One Parquet row group per chunk. Compression is the Parquet codec
+    (uncompressed by default). pyarrow is imported on first use.
+    """
+
+    def __init__(self, path: str, *args, **kwargs):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        super().__init__(path, *args, **kwargs)
+        self._schema = pa.schema([(column, pa.string()) for column in self.columns])
+        self._writer = pq.ParquetWriter(
+            self.path, self._schema, compression=self.compression or "none"
+        )
+
+    def _write_chunk(self, rows: list[list[str | None]]):
+        import pyarrow as pa
+
+        columns = list(zip(*rows))
+        self._writer.write_table(
+            pa.Table.from_arrays(
+                [pa.array(values, pa.string()) for values in columns],
+                schema=self._schema,
+            )
+        )
+
+    def _finish(self):
+        self._writer.close()
+
+
+EXPORTERS = {CSV: CsvExporter, NDJSON: NdjsonExporter, PARQUET: ParquetExporter}
+
+
+def export_format_for_path(path: str) -> str:
+    """The format implied by a file name, ignoring a .gz/.zst suffix."""
+    name = path.lower()
+    for extension in COMPRESSION_EXTENSIONS.values():
+        if name.endswith(extension):
+            name = name[: -len(extension)]
+    for export_format in EXPORTERS:
+        if name.endswith(f".{export_format}") or (
+            export_format == NDJSON and name.endswith(".jsonl")
+        ):
+            return export_format
+    raise ValueError(f"Cannot tell the export format of {path}")
+
+
+def open_exporter(
+    path: str,
+    export_format: str | None = None,
+    compression: str | None = None,
+    columns: list[str] | None = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> Exporter:
+    """
+    Opens an exporter for `path`. The format defaults to the file extension
+    and a text file's compression to its .gz/.zst suffix.
+    """
+    export_format = export_format or export_format_for_path(path)
+    if export_format not in EXPORTERS:
+        raise ValueError(f"Unsupported export format: {export_format}")
+    if compression is None and export_format != PARQUET:
+        for codec, extension in COMPRESSION_EXTENSIONS.items():
+            if path.lower().endswith(extension):
+                compression = codec
+    return EXPORTERS[export_format](path, columns, compression, chunk_rows)
+
+
+def export_records(
+    records: Iterable[dict[str, Any]],
+    path: str,
+    export_format: str | None = None,
+    compression: str | None = None,
+) -> int:
+    """Writes already collected records in one go; returns the rows written."""
+    with open_exporter(path, export_format, compression) as exporter:
+        exporter.write(records)
+    return exporter.rows
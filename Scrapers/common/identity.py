@@ -0,0 +1,76 @@
+import re
+from typing import Any
+from urllib.parse import urlsplit
+
+# Product detail paths carrying an ASIN: /dp/<ASIN>, /gp/product/<ASIN>, /gp/aw/d/<ASIN>.
+_ASIN_PATTERN = re.compile(r"/(?:dp|gp/product|gp/aw/d)/([A-Z0-9]{10})(?=[/?#]|$)")
+_ASIN_VALUE = re.compile(r"^[A-Z0-9]{10}$")
+
+
+def amazon_asin(url: str | None) -> str | None:
+    """The ASIN in an Amazon product URL, if there is one."""
+    if not url:
+        return None
+    match = _ASIN_PATTERN.search(url)
+    return match.group(1) if match else None
+
+
+def url_slug(url: str | None) -> str | None:
+    """
+    Last path segment of a product URL without its extension, lowercased:
+    "/samsung-galaxy-a55-278473823.html?ref=x" -> "samsung-galaxy-a55-278473823".
+    """
+    if not url:
+        return None
+    path = urlsplit(url).path.rstrip("/")
+    slug = path.rsplit("/", 1)[-1]
+    if slug.endswith(".html"):
+        slug = slug[: -len(".html")]
+    return slug.lower() or None
+
+
+def canonical_product_id(
+    platform: str, product_url: str | None, sku: str | None = None
+) -> str | None:
+    """
+    The platform's own id for a listing: the ASIN on Amazon, the SKU (or, when
+    the page does not carry one, the URL slug) on Jumia and 2B. Sponsored and
+    organic slots, tracking parameters and repeat listings of one product all
+    resolve to the same id.
+    """
+    if platform == "Amazon":
+        if sku and _ASIN_VALUE.match(sku.strip()):
+            return sku.strip()
+        return amazon_asin(product_url)
+    if sku and str(sku).strip():
+        return str(sku).strip()
+    return url_slug(product_url)
+
+
+class ProductDeduplicator:
+    """
+    Per-run seen-set of (platform, product_id); records without an id fall
+    back to their URL. Keeps the first occurrence of each product so repeats
+    are dropped before image downloads and ingestion.
+    """
+
+    def __init__(self):
+        self._seen: set[tuple[str, str]] = set()
+        self.duplicates = 0
+
+    def filter(self, records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        unique = []
+        for record in records:
+            key = (
+                record.get("platform", ""),
+                record.get("product_id") or record.get("product_url", ""),
+            )
+            if key in self._seen:
+                continue
+            self._seen.add(key)
+            unique.append(record)
+        self.duplicates += len(records) - len(unique)
+        return unique
+
+    def __len__(self) -> int:
+        return len(self._seen)
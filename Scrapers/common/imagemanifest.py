@@ -0,0 +1,154 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from typing import Any
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MANIFEST_DB = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "image_manifest.db",
+)
+DEFAULT_MAX_AGE_DAYS = 7.0
+
+# Outcomes of a download attempt, counted per manifest.
+FRESH = "fresh"
+NOT_MODIFIED = "not_modified"
+DOWNLOADED = "downloaded"
+FAILED = "failed"
+
+
+class ImageManifest:
+    """
+    What is known about every downloaded product image: its source URL, the
+    ETag and Last-Modified validators the server sent, its size and when it
+    was last verified.
+
+    An image verified within `max_age_seconds` is used as is. An older one is
+    revalidated with a conditional GET; the usual 304 only costs headers, and
+    only a changed photo is downloaded again. A `max_age_seconds` of None
+    never revalidates, which is how images behaved before the manifest.
+    """
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_MANIFEST_DB,
+        max_age_seconds: float | None = DEFAULT_MAX_AGE_DAYS * 86400,
+    ):
+        self.db_path = db_path
+        self.max_age_seconds = max_age_seconds
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self.outcomes: dict[str, int] = {}
+        self.bytes_downloaded = 0
+
+    def _connection(self) -> sqlite3.Connection:
+        # Called once per image from every download thread, so one connection
+        # is kept open (guarded by the lock) instead of reconnecting each time.
+        if self._conn is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.row_factory = sqlite3.Row
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS images (
+                    image_path TEXT PRIMARY KEY,
+                    url TEXT NOT NULL,
+                    etag TEXT,
+                    last_modified TEXT,
+                    size INTEGER,
+                    verified_at REAL
+                )"""
+            )
+        return self._conn
+
+    def lookup(self, image_path: str) -> dict[str, Any] | None:
+        with self._lock:
+            row = (
+                self._connection()
+                .execute(
+                    "SELECT * FROM images WHERE image_path = ?",
+                    (os.path.abspath(image_path),),
+                )
+                .fetchone()
+            )
+        return dict(row) if row else None
+
+    def is_fresh(self, entry: dict[str, Any] | None, url: str) -> bool:
+        """Whether an existing file can be used without asking the server."""
+        if self.max_age_seconds is None:
+            return True
+        if entry is None or entry["url"] != url:
+            return False
+        return time.time() - (entry["verified_at"] or 0) < self.max_age_seconds
+
+    def record(
+        self,
+        image_path: str,
+        url: str,
+        etag: str | None,
+        last_modified: str | None,
+        size: int,
+    ):
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO images VALUES (?, ?, ?, ?, ?, ?)",
+                    (
+                        os.path.abspath(image_path),
+                        url,
+                        etag,
+                        last_modified,
+                        size,
+                        time.time(),
+                    ),
+                )
+
+    def touch(self, image_path: str):
+        """Marks an image verified now (the server answered 304)."""
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.execute(
+                    "UPDATE images SET verified_at = ? WHERE image_path = ?",
+                    (time.time(), os.path.abspath(image_path)),
+                )
+
+    def count(self, outcome: str, downloaded_bytes: int = 0):
+        with self._lock:
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+            self.bytes_downloaded += downloaded_bytes
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            images, total_bytes = (
+                self._connection()
+                .execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM images")
+                .fetchone()
+            )
+            outcomes = dict(self.outcomes)
+            downloaded = self.bytes_downloaded
+        return {
+            "images": images,
+            "bytes": total_bytes,
+            "max_age_seconds": self.max_age_seconds,
+            "outcomes": outcomes,
+            "bytes_downloaded": downloaded,
+        }
+
+
+def _max_age_from_env() -> float | None:
+    days = os.getenv("IMAGE_MAX_AGE_DAYS", str(DEFAULT_MAX_AGE_DAYS))
+    if days.lower() in ("", "none", "never"):
+        return None
+    return float(days) * 86400
+
+
+manifest = ImageManifest(
+    os.getenv("IMAGE_MANIFEST_DB", DEFAULT_MANIFEST_DB), _max_age_from_env()
+)
@@ -0,0 +1,376 @@
+import asyncio
+import heapq
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import time
+import uuid
+from collections.abc import Callable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any
+
+from common import events as job_events
+from common.events import JobEvents
+from common.logs import log_context
+
+log = logging.getLogger(__name__)
+
+DEFAULT_JOBS_DB = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "jobs.db",
+)
+DEFAULT_MAX_CONCURRENT_JOBS = 3
+DEFAULT_DRAIN_SECONDS = 60.0
+
+IDLE = "idle"
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+TERMINAL_STATUSES = (COMPLETED, FAILED, CANCELLED)
+
+
+class Job:
+    """
+    One scrape job; awaiting it waits for the job to finish. Its `events` log
+    streams progress while it runs. `request` holds the trigger's parameters
+    (category subset, page limits) for display.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        name: str,
+        priority: int = 0,
+        request: dict[str, Any] | None = None,
+    ):
+        self.job_id = uuid.uuid4().hex
+        self.key = key
+        self.name = name
+        self.priority = priority
+        self.request = request or {}
+        self.status = QUEUED
+        self.submitted_at = time.time()
+        self.started_at: float | None = None
+        self.finished_at: float | None = None
+        self.counts: dict[str, Any] = {}
+        self.error: str | None = None
+        self.task: asyncio.Task | None = None
+        self.events = JobEvents()
+
+    def __await__(self):
+        return self.task.__await__()
+
+    @property
+    def duration_seconds(self) -> float | None:
+        if self.started_at is None:
+            return None
+        end = self.finished_at if self.finished_at is not None else time.time()
+        return round(end - self.started_at, 3)
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "scraper": self.key,
+            "status": self.status,
+            "priority": self.priority,
+            "request": self.request,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+            "duration_seconds": self.duration_seconds,
+            "counts": self.counts,
+            "error": self.error,
+        }
+
+
+class JobStore:
+    """Terminal job records (status, counts, duration), kept across restarts."""
+
+    def __init__(self, db_path: str = DEFAULT_JOBS_DB):
+        self.db_path = db_path
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS jobs (
+                job_id TEXT PRIMARY KEY,
+                scraper TEXT NOT NULL,
+                status TEXT NOT NULL,
+                submitted_at REAL,
+                started_at REAL,
+                finished_at REAL,
+                duration_seconds REAL,
+                counts TEXT,
+                error TEXT
+            )"""
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_jobs_scraper ON jobs (scraper, finished_at)"
+        )
+        return conn
+
+    def save(self, job: Job):
+        record = job.to_dict()
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO jobs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        record["job_id"],
+                        record["scraper"],
+                        record["status"],
+                        record["submitted_at"],
+                        record["started_at"],
+                        record["finished_at"],
+                        record["duration_seconds"],
+                        json.dumps(record["counts"]),
+                        record["error"],
+                    ),
+                )
+        finally:
+            conn.close()
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE job_id = ?", (job_id,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return _row_to_dict(row) if row else None
+
+    def recent(
+        self, scraper: str | None = None, limit: int = 20
+    ) -> list[dict[str, Any]]:
+        query = "SELECT * FROM jobs"
+        params: list[Any] = []
+        if scraper:
+            query += " WHERE scraper = ?"
+            params.append(scraper)
+        query += " ORDER BY finished_at DESC LIMIT ?"
+        params.append(limit)
+        conn = self._connect()
+        try:
+            rows = conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+        return [_row_to_dict(row) for row in rows]
+
+    def latest_statuses(self) -> dict[str, str]:
+        conn = self._connect()
+        try:
+            rows = conn.execute(
+                """SELECT scraper, status FROM jobs AS j
+                WHERE finished_at = (
+                    SELECT MAX(finished_at) FROM jobs WHERE scraper = j.scraper
+                )"""
+            ).fetchall()
+        finally:
+            conn.close()
+        return {row["scraper"]: row["status"] for row in rows}
+
+
+def _row_to_dict(row: sqlite3.Row) -> dict[str, Any]:
+    record = dict(row)
+    record["counts"] = json.loads(record["counts"] or "{}")
+    return record
+
+
+def _run_in_context(job: Job, func: Callable[..., dict[str, Any]], args: tuple):
+    # Runs on the job's thread: everything it logs carries the job's key and id.
+    with log_context(job=job.key, job_id=job.job_id):
+        return func(*args, events=job.events)
+
+
+class JobRunner:
+    """
+    Runs scrape jobs from the service's event loop.
+
+    A job is an asyncio task: it waits for one of `max_concurrent` slots, then
+    runs its blocking scrape function on a dedicated thread, so the loop
+    itself never blocks and endpoints stay responsive while scrapes run.
+    Triggers beyond the limit queue instead of tying up a request; a freed
+    slot goes to the queued job with the highest priority, oldest first. One job
+    per scraper key is active at a time. Finished jobs keep their terminal
+    status in `statuses` and in the job store. Only the latest job of each
+    key is kept in memory with its event log; older ones are read back from
+    the store.
+
+    `shutdown` stops accepting jobs, cancels queued ones, asks running ones
+    to wrap up through the `on_drain` callbacks and waits for them.
+    """
+
+    def __init__(
+        self,
+        keys: Iterable[str],
+        store: JobStore,
+        max_concurrent: int = DEFAULT_MAX_CONCURRENT_JOBS,
+    ):
+        self.store = store
+        self.max_concurrent = max(1, max_concurrent)
+        self.jobs: dict[str, Job] = {}
+        self.active: dict[str, Job] = {}
+        self.statuses: dict[str, str] = dict.fromkeys(keys, IDLE)
+        self._on_drain: list[Callable[[], None]] = []
+        self._executor: ThreadPoolExecutor | None = None
+        self._free_slots = self.max_concurrent
+        # (-priority, arrival, future) of jobs waiting for a slot.
+        self._waiting: list[tuple[int, int, asyncio.Future]] = []
+        self._arrivals = itertools.count()
+        self._accepting = False
+
+    def start(self):
+        try:
+            persisted = self.store.latest_statuses()
+        except sqlite3.Error as e:
+            log.error(f"Could not load persisted job statuses: {e}")
+            persisted = {}
+        for key in self.statuses:
+            self.statuses[key] = persisted.get(key, IDLE)
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_concurrent, thread_name_prefix="scrape-job"
+        )
+        self._accepting = True
+
+    def on_drain(self, callback: Callable[[], None]):
+        self._on_drain.append(callback)
+
+    def is_active(self, key: str) -> bool:
+        return key in self.active
+
+    def submit(
+        self,
+        key: str,
+        name: str,
+        func: Callable[..., dict[str, Any]],
+        *args,
+        priority: int = 0,
+        request: dict[str, Any] | None = None,
+    ) -> Job | None:
+        """
+        Schedules `func(*args, events=job.events)`, which returns the job's
+        counts and publishes its progress to `events`. Jobs with a higher
+        `priority` get the next free slot. Returns None when a job for `key`
+        is already queued or running, or the runner is shutting down. Must be
+        called from the event loop.
+        """
+        if not self._accepting or key in self.active:
+            return None
+        for job_id in [job_id for job_id, job in self.jobs.items() if job.key == key]:
+            del self.jobs[job_id]
+        job = Job(key, name, priority, request)
+        self.jobs[job.job_id] = job
+        job.events.publish(
+            job_events.QUEUED,
+            job_id=job.job_id,
+            scraper=key,
+            priority=priority,
+            request=job.request,
+        )
+        self.active[key] = job
+        self.statuses[key] = QUEUED
+        job.task = asyncio.get_running_loop().create_task(self._run(job, func, args))
+        return job
+
+    async def _acquire_slot(self, priority: int):
+        if self._free_slots > 0 and not self._waiting:
+            self._free_slots -= 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiting, (-priority, next(self._arrivals), future))
+        try:
+            await future
+        except asyncio.CancelledError:
+            # Cancelled just after being handed a slot: pass it on.
+            if future.done() and not future.cancelled():
+                self._release_slot()
+            raise
+
+    def _release_slot(self):
+        while self._waiting:
+            _, _, future = heapq.heappop(self._waiting)
+            if not future.done():
+                future.set_result(None)
+                return
+        self._free_slots += 1
+
+    async def _run(self, job: Job, func: Callable[..., dict[str, Any]], args: tuple):
+        loop = asyncio.get_running_loop()
+        try:
+            await self._acquire_slot(job.priority)
+            try:
+                job.status = self.statuses[job.key] = RUNNING
+                job.started_at = time.time()
+                job.events.publish(job_events.STARTED)
+                job.counts = (
+                    await loop.run_in_executor(
+                        self._executor, partial(_run_in_context, job, func, args)
+                    )
+                    or {}
+                )
+            finally:
+                self._release_slot()
+            job.status = COMPLETED
+        except asyncio.CancelledError:
+            job.status = CANCELLED
+            job.error = (
+                "Cancelled while running."
+                if job.started_at is not None
+                else "Cancelled before it started."
+            )
+        except Exception as e:
+            log.exception(f"{job.name} scraping failed: {e}")
+            job.status = FAILED
+            job.error = str(e)
+        finally:
+            job.finished_at = time.time()
+            self.statuses[job.key] = job.status
+            self.active.pop(job.key, None)
+            job.events.publish(
+                job_events.FINISHED,
+                status=job.status,
+                counts=job.counts,
+                error=job.error,
+                duration_seconds=job.duration_seconds,
+            )
+            log.info(
+                f"{job.name} job {job.job_id} {job.status} in {job.duration_seconds or 0:.1f}s: {job.counts}"
+            )
+            try:
+                await loop.run_in_executor(None, self.store.save, job)
+            except sqlite3.Error as e:
+                log.error(f"Failed to persist job {job.job_id}: {e}")
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        job = self.jobs.get(job_id)
+        return job.to_dict() if job is not None else self.store.get(job_id)
+
+    async def shutdown(self, timeout: float = DEFAULT_DRAIN_SECONDS):
+        self._accepting = False
+        queued = [job for job in self.active.values() if job.status == QUEUED]
+        running = [job for job in self.active.values() if job.status == RUNNING]
+        for job in queued:
+            job.task.cancel()
+        if running:
+            log.info(f"Draining {len(running)} running jobs...")
+            for callback in self._on_drain:
+                callback()
+        tasks = [job.task for job in queued + running]
+        if tasks:
+            _, still_running = await asyncio.wait(tasks, timeout=timeout)
+            if still_running:
+                log.warning(
+                    f"{len(still_running)} jobs still running after {timeout:.0f}s; not waiting."
+                )
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
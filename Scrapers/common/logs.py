@@ -0,0 +1,195 @@
+import atexit
+import contextlib
+import contextvars
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import threading
+from typing import Any, TextIO
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+# Context attached to every record logged inside `log_context`.
+CONTEXT_FIELDS = ("job", "job_id", "category", "page")
+
+TEXT = "text"
+JSON = "json"
+
+_context: contextvars.ContextVar[dict[str, Any]] = contextvars.ContextVar(
+    "log_context", default={}
+)
+_listener: logging.handlers.QueueListener | None = None
+_configure_lock = threading.Lock()
+
+
+@contextlib.contextmanager
+def log_context(**fields):
+    """Adds job/category/page context to the records logged inside the block."""
+    token = _context.set({**_context.get(), **fields})
+    try:
+        yield
+    finally:
+        _context.reset(token)
+
+
+def sample(every: int) -> dict[str, Any]:
+    """`extra` for a per-item message: only 1 in `every` from its call site is kept."""
+    return {"sample_every": every}
+
+
+def rate_limit(per_second: float) -> dict[str, Any]:
+    """`extra` for a repetitive warning: at most `per_second` from its call site."""
+    return {"rate_limit": per_second}
+
+
+class ContextFilter(logging.Filter):
+    """Copies the current `log_context` onto the record, in the logging thread."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        context = _context.get()
+        for field in CONTEXT_FIELDS:
+            if field in context and not hasattr(record, field):
+                setattr(record, field, context[field])
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Thins out high-volume messages per call site (file and line).
+
+    Records logged with `extra=sample(n)` pass 1 in n and carry `sampled=n`;
+    with `extra=rate_limit(n)` at most n pass per second and the next one to
+    pass carries how many were `suppressed` meanwhile. Other records always
+    pass. With `enabled` off every record passes.
+    """
+
+    def __init__(self, enabled: bool = True):
+        super().__init__()
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._counts: dict[tuple[str, int], int] = {}
+        # Call site -> [window start, passed in window, suppressed since last pass].
+        self._windows: dict[tuple[str, int], list[float]] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        every = getattr(record, "sample_every", None)
+        per_second = getattr(record, "rate_limit", None)
+        if not self.enabled or (every is None and per_second is None):
+            return True
+        site = (record.pathname, record.lineno)
+        with self._lock:
+            if every is not None:
+                seen = self._counts.get(site, 0)
+                self._counts[site] = seen + 1
+                if seen % every:
+                    return False
+                record.sampled = every
+                return True
+
+            window = self._windows.get(site)
+            if window is None:
+                window = self._windows[site] = [record.created, 0, 0]
+            elif record.created - window[0] >= 1.0:
+                window[0], window[1] = record.created, 0
+            if window[1] >= per_second:
+                window[2] += 1
+                return False
+            window[1] += 1
+            if window[2]:
+                record.suppressed = int(window[2])
+                window[2] = 0
+            return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message and context."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for field in (*CONTEXT_FIELDS, "sampled", "suppressed"):
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """The classic text format, with a note on sampled and suppressed messages."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        text = super().format(record)
+        if getattr(record, "sampled", None):
+            text += f" [1 in {record.sampled}]"
+        if getattr(record, "suppressed", None):
+            text += f" [{record.suppressed} similar suppressed]"
+        return text
+
+
+def stop_logging():
+    """Flushes queued records and stops the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def configure_logging(
+    level: str | None = None,
+    log_format: str | None = None,
+    use_queue: bool | None = None,
+    sampling: bool | None = None,
+    stream: TextIO | None = None,
+    text_format: str = TEXT_FORMAT,
+) -> logging.Handler:
+    """
+    Sets up the root logger for a process; call it once from the entry point
+    instead of `logging.basicConfig`. Unset options come from LOG_LEVEL
+    (INFO), LOG_FORMAT ("text" or "json"), LOG_QUEUE (true) and LOG_SAMPLING
+    (true).
+
+    With the queue on, the calling thread only checks the level, applies the
+    filters, formats the message and enqueues it; a listener thread does the
+    formatting to text/JSON and the stream I/O. Returns the handler attached
+    to the root logger.
+    """
+    global _listener
+    level = (level or os.getenv("LOG_LEVEL", "INFO")).upper()
+    log_format = (log_format or os.getenv("LOG_FORMAT", TEXT)).lower()
+    if use_queue is None:
+        use_queue = os.getenv("LOG_QUEUE", "true").lower() == "true"
+    if sampling is None:
+        sampling = os.getenv("LOG_SAMPLING", "true").lower() == "true"
+
+    with _configure_lock:
+        stop_logging()
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+
+        output = logging.StreamHandler(stream)
+        output.setFormatter(
+            JsonFormatter() if log_format == JSON else TextFormatter(text_format)
+        )
+        if use_queue:
+            records: queue.SimpleQueue = queue.SimpleQueue()
+            handler: logging.Handler = logging.handlers.QueueHandler(records)
+            _listener = logging.handlers.QueueListener(records, output)
+            _listener.start()
+        else:
+            handler = output
+        handler.addFilter(ContextFilter())
+        handler.addFilter(SamplingFilter(sampling))
+        root.addHandler(handler)
+        root.setLevel(level)
+    return handler
+
+
+atexit.register(stop_logging)
@@ -0,0 +1,141 @@
+import logging
+import os
+import sys
+import threading
+import tracemalloc
+from typing import Any
+
+log = logging.getLogger(__name__)
+
+# Past the limit the crawl drains and collects; past this multiple it stops.
+HARD_LIMIT_FACTOR = 1.2
+
+# tracemalloc is process-wide; concurrent jobs share one tracing session.
+_tracing_users = 0
+_tracing_lock = threading.Lock()
+_rss_warning_logged = False
+
+
+def peak_rss_mb() -> float | None:
+    """
+    Peak resident set size of the process (ru_maxrss is KB on Linux, bytes
+    on macOS). Without the Unix-only `resource` module, the traced heap peak
+    while tracemalloc runs, else None.
+    """
+    try:
+        import resource
+    except ImportError:
+        if tracemalloc.is_tracing():
+            return tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def current_rss_mb() -> float | None:
+    """
+    Current resident set size from /proc, or from psutil where it is
+    installed (macOS, Windows); None where neither is available.
+    """
+    try:
+        with open("/proc/self/statm") as statm:
+            resident_pages = int(statm.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        try:
+            import psutil
+        except ImportError:
+            return None
+        return psutil.Process().memory_info().rss / (1024 * 1024)
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+class MemoryGuard:
+    """
+    Memory limit for a crawl.
+
+    The limit applies to the process's current RSS, which is cheap to sample
+    between pages. Over `limit_mb` the pipeline drains its download queue and
+    collects garbage; still over `limit_mb * HARD_LIMIT_FACTOR` afterwards, it
+    stops paging so the products found so far can be ingested before the
+    container runs out of memory. Where RSS cannot be read, the traced Python
+    heap is used instead.
+
+    With `trace_allocations`, tracemalloc also records the Python heap for
+    the report. It roughly doubles parse time and adds its own bookkeeping to
+    RSS, so it is meant for diagnosing a run, not for every run.
+    """
+
+    def __init__(self, limit_mb: float, trace_allocations: bool = False):
+        global _rss_warning_logged
+        self.limit_mb = limit_mb
+        rss_readable = current_rss_mb() is not None
+        if not rss_readable and not _rss_warning_logged:
+            log.warning(
+                f"Cannot read the process RSS on {sys.platform}; the memory limit "
+                f"applies to the traced Python heap, which misses native allocations."
+            )
+            _rss_warning_logged = True
+        self.trace_allocations = trace_allocations or not rss_readable
+        self.peak_mb = 0.0
+        self.peak_traced_mb: float | None = None
+        self.drains = 0
+        self._tracing = False
+
+    def start(self):
+        global _tracing_users
+        if self.peak_mb == 0.0 and self.over_limit():
+            log.warning(
+                f"Process already uses {self.peak_mb:.0f} MB, above the {self.limit_mb:.0f} MB "
+                f"memory limit; the crawl will stop early."
+            )
+        if not self.trace_allocations or self._tracing:
+            return
+        with _tracing_lock:
+            if _tracing_users == 0:
+                tracemalloc.start(1)
+            _tracing_users += 1
+        self._tracing = True
+
+    def current_mb(self) -> float:
+        current = current_rss_mb()
+        if current is None:
+            current = (
+                tracemalloc.get_traced_memory()[0] / (1024 * 1024)
+                if self._tracing
+                else 0.0
+            )
+        self.peak_mb = max(self.peak_mb, current)
+        return current
+
+    def over_limit(self, factor: float = 1.0) -> bool:
+        return self.current_mb() > self.limit_mb * factor
+
+    def stop(self) -> dict[str, Any]:
+        global _tracing_users
+        if self._tracing:
+            self.peak_traced_mb = tracemalloc.get_traced_memory()[1] / (1024 * 1024)
+            with _tracing_lock:
+                _tracing_users -= 1
+                if _tracing_users == 0:
+                    tracemalloc.stop()
+            self._tracing = False
+        report = self.report()
+        log.info(
+            f"Memory: peak {report['peak_mb']} MB sampled against a {self.limit_mb:.0f} MB limit, "
+            f"peak RSS {report['peak_rss_mb']} MB, {self.drains} drains"
+        )
+        return report
+
+    def report(self) -> dict[str, Any]:
+        peak_rss = peak_rss_mb()
+        return {
+            "limit_mb": self.limit_mb,
+            "peak_mb": round(self.peak_mb, 1),
+            "peak_rss_mb": round(peak_rss, 1) if peak_rss is not None else None,
+            "peak_traced_mb": (
+                round(self.peak_traced_mb, 1)
+                if self.peak_traced_mb is not None
+                else None
+            ),
+            "drains": self.drains,
+        }
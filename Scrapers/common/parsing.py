@@ -0,0 +1,274 @@
+import json
+import logging
+import re
+from html.parser import HTMLParser
+from typing import Any
+
+from bs4 import BeautifulSoup, UnicodeDammit
+
+log = logging.getLogger(__name__)
+
+# A region is (tag, attribute, token): the element matches when its tag name is
+# `tag` and `token` is one of the space separated values of `attribute`.
+# `attribute=None` matches every element with that tag name.
+Region = tuple[str, str | None, str | None]
+
+JSON_LD_REGION: Region = ("script", "type", "application/ld+json")
+
+VOID_ELEMENTS = frozenset(
+    [
+        "area",
+        "base",
+        "br",
+        "col",
+        "embed",
+        "hr",
+        "img",
+        "input",
+        "link",
+        "meta",
+        "param",
+        "source",
+        "track",
+        "wbr",
+    ]
+)
+
+
+def decode_markup(content: bytes | str) -> str:
+    """Decodes raw page bytes the same way BeautifulSoup would."""
+    if isinstance(content, str):
+        return content
+    return UnicodeDammit(content, is_html=True).unicode_markup or ""
+
+
+class _RegionCollector(HTMLParser):
+    """Tokenizes a document and records the character spans of matching regions."""
+
+    def __init__(self, markup: str, regions: list[Region]):
+        super().__init__(convert_charrefs=False)
+        self.markup = markup
+        self.regions = regions
+        self.spans: list[tuple[int, int]] = []
+        self._stack: list[str] = []
+        self._start = 0
+        self._line_offsets = [0]
+        pos = markup.find("\n")
+        while pos != -1:
+            self._line_offsets.append(pos + 1)
+            pos = markup.find("\n", pos + 1)
+
+    def _offset(self) -> int:
+        line, col = self.getpos()
+        return self._line_offsets[line - 1] + col
+
+    def _matches(self, tag: str, attrs) -> bool:
+        for region_tag, attr, token in self.regions:
+            if tag != region_tag:
+                continue
+            if attr is None:
+                return True
+            for name, value in attrs:
+                if (
+                    name == attr
+                    and value
+                    and (value == token or token in value.split())
+                ):
+                    return True
+        return False
+
+    def handle_starttag(self, tag, attrs):
+        if self._stack:
+            if tag not in VOID_ELEMENTS:
+                self._stack.append(tag)
+            return
+        if not self._matches(tag, attrs):
+            return
+        start = self._offset()
+        if tag in VOID_ELEMENTS:
+            self.spans.append((start, start + len(self.get_starttag_text() or "")))
+        else:
+            self._start = start
+            self._stack.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        if not self._stack and self._matches(tag, attrs):
+            start = self._offset()
+            self.spans.append((start, start + len(self.get_starttag_text() or "")))
+
+    def handle_endtag(self, tag):
+        if not self._stack or tag not in self._stack:
+            return
+        while self._stack.pop() != tag:
+            pass
+        if not self._stack:
+            end = self.markup.find(">", self._offset())
+            end = len(self.markup) if end == -1 else end + 1
+            self.spans.append((self._start, end))
+
+    def close(self):
+        super().close()
+        if self._stack:
+            # Truncated document: keep whatever the open region had.
+            self.spans.append((self._start, len(self.markup)))
+            self._stack = []
+
+
+def extract_regions(content: bytes | str, regions: list[Region]) -> str:
+    """Returns the concatenated markup of every top-level element matching `regions`."""
+    markup = decode_markup(content)
+    collector = _RegionCollector(markup, regions)
+    collector.feed(markup)
+    collector.close()
+    return "".join(markup[start:end] for start, end in collector.spans)
+
+
+# Markup read per step while looking for the end of an anchored region.
+_ANCHOR_CHUNK = 16 * 1024
+
+
+def _start_tag_pattern(region: Region) -> "re.Pattern":
+    tag, attr, _ = region
+    if attr is None:
+        return re.compile(rf"<{re.escape(tag)}(?=[\s/>])", re.IGNORECASE)
+    return re.compile(
+        rf"<{re.escape(tag)}(?=[\s/>])[^>]*?\s{re.escape(attr)}\s*=\s*"
+        rf"(?:\"([^\"]*)\"|'([^']*)')",
+        re.IGNORECASE,
+    )
+
+
+def extract_anchored_regions(content: bytes | str, regions: list[Region]) -> str:
+    """
+    Like `extract_regions`, but finds the regions' start tags with a pattern
+    search and tokenizes only from each start tag to its end tag, instead of
+    the whole document. For pages where the regions are a tiny part of the
+    markup, such as a product page's title and price. Start tags inside
+    scripts or comments may match too, so prefer specific regions.
+    """
+    markup = decode_markup(content)
+    starts = set()
+    for region in regions:
+        token = region[2]
+        for match in _start_tag_pattern(region).finditer(markup):
+            value = match.group(1) if region[1] is not None else None
+            if value is None and region[1] is not None:
+                value = match.group(2)
+            if region[1] is None or value == token or token in value.split():
+                starts.add(match.start())
+
+    spans: list[tuple[int, int]] = []
+    end = 0
+    for start in sorted(starts):
+        if start < end:
+            continue  # Inside the previous region.
+        length = _ANCHOR_CHUNK
+        while True:
+            collector = _RegionCollector(markup[start : start + length], regions)
+            collector.feed(collector.markup)
+            if collector.spans or start + length >= len(markup):
+                collector.close()
+                break
+            length *= 4
+        if collector.spans:
+            span_start, span_end = collector.spans[0]
+            spans.append((start + span_start, start + span_end))
+            end = start + span_end
+    return "".join(markup[start:end] for start, end in spans)
+
+
+def parse_document(
+    content: bytes | str,
+    regions: list[Region] | None = None,
+    partial: bool = True,
+    anchored: bool = False,
+) -> BeautifulSoup:
+    """
+    Parses a listing page into a soup tree.
+
+    With `partial` set, only the elements matching `regions` (product containers,
+    pagination, structured data) are materialized; headers, navigation and
+    scripts are tokenized and skipped without building tree nodes for them.
+    `anchored` skips tokenizing them too (see `extract_anchored_regions`).
+    """
+    if not partial or not regions:
+        return BeautifulSoup(content, "html.parser")
+    if anchored:
+        return BeautifulSoup(extract_anchored_regions(content, regions), "html.parser")
+    return BeautifulSoup(extract_regions(content, regions), "html.parser")
+
+
+def _json_ld_nodes(data: Any):
+    if isinstance(data, list):
+        for entry in data:
+            yield from _json_ld_nodes(entry)
+    elif isinstance(data, dict):
+        yield data
+        if "@graph" in data:
+            yield from _json_ld_nodes(data["@graph"])
+
+
+def _has_type(node: dict[str, Any], type_name: str) -> bool:
+    node_type = node.get("@type")
+    if isinstance(node_type, list):
+        return type_name in node_type
+    return node_type == type_name
+
+
+def _structured_product(node: dict[str, Any]) -> dict[str, Any] | None:
+    offers = node.get("offers")
+    if isinstance(offers, list):
+        offers = offers[0] if offers else None
+    price = None
+    if isinstance(offers, dict):
+        price = offers.get("price", offers.get("lowPrice"))
+    image = node.get("image")
+    if isinstance(image, list):
+        image = image[0] if image else None
+    if isinstance(image, dict):
+        image = image.get("url")
+
+    title = node.get("name")
+    url = node.get("url") or (offers.get("url") if isinstance(offers, dict) else None)
+    if not title or not url or price in (None, ""):
+        return None
+    return {
+        "title": str(title).strip(),
+        "price": str(price).replace(",", "").strip(),
+        "url": url,
+        "image_url": image,
+        "sku": node.get("sku") or node.get("productID"),
+    }
+
+
+def extract_json_ld_products(soup: BeautifulSoup) -> list[dict[str, Any]]:
+    """
+    Extracts products embedded as JSON-LD (Product nodes or an ItemList of them).
+
+    Returns an empty list unless every listed product has a title, URL and price,
+    so callers can fall back to DOM extraction when the structured data is partial.
+    """
+    products: list[dict[str, Any]] = []
+    for script in soup.find_all("script", {"type": "application/ld+json"}):
+        try:
+            data = json.loads(script.string or "")
+        except ValueError:
+            log.debug("Skipping malformed JSON-LD block.")
+            continue
+
+        for node in _json_ld_nodes(data):
+            candidates = []
+            if _has_type(node, "ItemList"):
+                for element in node.get("itemListElement") or []:
+                    if isinstance(element, dict):
+                        item = element.get("item")
+                        candidates.append(item if isinstance(item, dict) else element)
+            elif _has_type(node, "Product"):
+                candidates.append(node)
+
+            for candidate in candidates:
+                product = _structured_product(candidate)
+                if product is None:
+                    return []
+                products.append(product)
+    return products
@@ -0,0 +1,720 @@
+import concurrent.futures
+import contextvars
+import gc
+import logging
+import os
+import re
+import time
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any
+
+import requests
+from bs4 import BeautifulSoup
+
+from common import events as job_events
+from common.deadlines import CrawlBudget, Deadline, latency_tracker
+from common.identity import ProductDeduplicator
+from common.imagemanifest import DOWNLOADED, FAILED, FRESH, NOT_MODIFIED, ImageManifest
+from common.imagemanifest import manifest as default_image_manifest
+from common.logs import log_context, rate_limit
+from common.memory import HARD_LIMIT_FACTOR
+from common.parsing import Region, parse_document
+from common.rawarchive import RawPageWriter
+from common.tracing import (
+    EXTRACT,
+    FETCH,
+    IMAGE_DOWNLOAD,
+    PARSE,
+    JobTrace,
+    count,
+    emit,
+    span,
+    streaming,
+    traced,
+)
+
+log = logging.getLogger(__name__)
+
+MAX_FILE_LENGTH = 100
+# A dead image host fails every download of a page; keep a handful per second.
+IMAGE_WARNINGS_PER_SECOND = 5
+# Longest stretch spent waiting on image downloads without calling on_progress.
+PROGRESS_INTERVAL = 30.0
+
+# Turns a parsed page into finished product records for one category.
+Extractor = Callable[[BeautifulSoup, str], list[dict[str, Any]]]
+
+
+def get_num_workers(max_workers: int | None = None) -> int:
+    """Determines the number of workers for ThreadPoolExecutor."""
+    if max_workers and max_workers > 0:
+        return max_workers
+    try:
+        cpus = os.cpu_count()
+        return cpus if cpus else 1
+    except NotImplementedError:
+        log.warning("Could not detect number of CPUs, defaulting to 1 worker.")
+        return 1
+
+
+def sanitize_filename(filename: str) -> str:
+    """Removes illegal characters from a filename and truncates it."""
+    sanitized = re.sub(r'[\\/*?:"<>|]', "", filename)
+    sanitized = re.sub(r"\s+", "_", sanitized)
+    return sanitized[: MAX_FILE_LENGTH - 5]  # reserve space for image extensions
+
+
+def create_directory_if_not_exists(dir_path: str):
+    """Creates a directory if it doesn't exist."""
+    if not os.path.exists(dir_path):
+        try:
+            os.makedirs(dir_path)
+            log.info(f"Created directory: {dir_path}")
+        except OSError as e:
+            log.error(f"Failed to create directory {dir_path}: {e}")
+            raise
+
+
+def download_image(
+    image_url: str,
+    image_path: str,
+    timeout: int = 20,
+    headers: dict[str, str] | None = None,
+    manifest: ImageManifest | None = None,
+) -> str | None:
+    """
+    Downloads an image from a URL and saves it to a path.
+
+    Without a `manifest` an existing file is never refreshed. With one, a file
+    past the manifest's max age is revalidated with a conditional GET and only
+    replaced when the server sends a new image. Returns the outcome (see
+    common.imagemanifest), or None when the URL was skipped.
+    """
+    if not image_url:
+        log.warning(
+            "Skipping download for empty image URL (intended path: %s)",
+            image_path,
+            extra=rate_limit(IMAGE_WARNINGS_PER_SECOND),
+        )
+        return None
+
+    if image_url.startswith("//"):
+        image_url = "https:" + image_url
+    elif not image_url.startswith("http"):
+        log.warning(
+            "Skipping download for potentially invalid image URL: %s",
+            image_url,
+            extra=rate_limit(IMAGE_WARNINGS_PER_SECOND),
+        )
+        return None
+
+    entry = None
+    if os.path.exists(image_path):
+        if manifest is None:
+            return FRESH
+        entry = manifest.lookup(image_path)
+        if manifest.is_fresh(entry, image_url):
+            manifest.count(FRESH)
+            return FRESH
+
+    request_headers = dict(headers or {})
+    if entry is not None and entry["url"] == image_url:
+        if entry["etag"]:
+            request_headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            request_headers["If-Modified-Since"] = entry["last_modified"]
+
+    partial_path = image_path + ".part"
+    try:
+        response = requests.get(
+            image_url, headers=request_headers, timeout=timeout, stream=True
+        )
+        if response.status_code == 304 and entry is not None:
+            response.close()
+            manifest.touch(image_path)
+            manifest.count(NOT_MODIFIED)
+            return NOT_MODIFIED
+        response.raise_for_status()
+        # Written aside and swapped in, so a failed refresh keeps the old image.
+        size = 0
+        with open(partial_path, "wb") as file:
+            for chunk in response.iter_content(chunk_size=8192):
+                file.write(chunk)
+                size += len(chunk)
+        os.replace(partial_path, image_path)
+        if manifest is not None:
+            manifest.record(
+                image_path,
+                image_url,
+                response.headers.get("ETag"),
+                response.headers.get("Last-Modified"),
+                size,
+            )
+            manifest.count(DOWNLOADED, size)
+        return DOWNLOADED
+    except requests.exceptions.RequestException as e:
+        log.warning(
+            "Failed to download image %s: %s",
+            image_url,
+            e,
+            extra=rate_limit(IMAGE_WARNINGS_PER_SECOND),
+        )
+    except OSError as e:
+        log.error(f"Failed to write image to {image_path}: {e}")
+    except Exception:
+        log.exception(f"An unexpected error occurred downloading {image_url}")
+    if os.path.exists(partial_path):
+        os.remove(partial_path)
+    if manifest is not None:
+        manifest.count(FAILED)
+    return FAILED
+
+
+class Pagination:
+    """Decides whether a category has another listing page after this one."""
+
+    # Whether a page without products is fetched once more before paging
+    # decides on it.
+    refetch_empty = False
+
+    def has_next(self, soup: BeautifulSoup, records: list[dict[str, Any]]) -> bool:
+        raise NotImplementedError
+
+
+class StopOnEmptyPage(Pagination):
+    """
+    Keeps paging until a page yields no products (Jumia, 2B).
+
+    A truncated response or changed card markup also yields no products, so
+    an empty page is fetched again before it ends the category, and with
+    `next_link` an empty page that still links to a next page is skipped.
+    """
+
+    refetch_empty = True
+
+    def __init__(self, next_link: Callable[[BeautifulSoup], Any] | None = None):
+        self.next_link = next_link
+
+    def has_next(self, soup: BeautifulSoup, records: list[dict[str, Any]]) -> bool:
+        if records:
+            return True
+        return self.next_link is not None and bool(self.next_link(soup))
+
+
+class NextLinkPagination(Pagination):
+    """
+    Follows the page's "next" link (Amazon).
+
+    A page without products is skipped as long as it still links to a next
+    page; a matching `stop_when` element (e.g. a no-results banner) ends paging.
+    """
+
+    def __init__(
+        self,
+        next_link: Callable[[BeautifulSoup], Any],
+        disabled_class: str | None = None,
+        stop_when: Callable[[BeautifulSoup], bool] | None = None,
+    ):
+        self.next_link = next_link
+        self.disabled_class = disabled_class
+        self.stop_when = stop_when
+
+    def has_next(self, soup: BeautifulSoup, records: list[dict[str, Any]]) -> bool:
+        if self.stop_when is not None and self.stop_when(soup):
+            return False
+        link = self.next_link(soup)
+        if not link:
+            return False
+        return not (
+            self.disabled_class and self.disabled_class in link.get("class", [])
+        )
+
+
+class ScrapePipeline:
+    """
+    The fetch -> retry -> parse -> extract -> image download -> collect loop
+    shared by every platform.
+
+    A platform supplies the page regions, an extractor and a pagination
+    strategy; retries with backoff, the download pool and its backpressure,
+    tracing and per-page batching are handled here once. A page that still
+    fails after `max_retries` attempts is skipped, and a category is abandoned
+    only after `max_failed_pages` consecutive failed pages. An optional
+    `budget` bounds the run and each category in time and pages, and hedges
+    slow fetches.
+    Products already seen in the run (by canonical product id) are dropped
+    before they are batched, downloaded or returned; pass a shared `dedupe`
+    when one run spans several pipelines. Image downloads go through the
+    shared image manifest unless another `image_manifest` is given.
+    `on_progress` is called before every page and at least every
+    PROGRESS_INTERVAL seconds while waiting for downloads, so a caller can
+    tell a slow crawl from a stuck one (a queue worker renews its lease).
+    """
+
+    def __init__(
+        self,
+        platform: str,
+        page_regions: list[Region],
+        extract: Extractor,
+        pagination: Pagination,
+        headers: dict[str, str] | None = None,
+        max_workers: int | None = None,
+        req_timeout: int = 20,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+        max_failed_pages: int = 3,
+        max_pending_downloads: int | None = None,
+        partial_parse: bool = True,
+        download_images: bool = True,
+        trace: JobTrace | None = None,
+        on_batch: Callable[[str, list[dict[str, Any]]], None] | None = None,
+        on_progress: Callable[[], None] | None = None,
+        raw_archive: RawPageWriter | None = None,
+        budget: CrawlBudget | None = None,
+        dedupe: ProductDeduplicator | None = None,
+        image_manifest: ImageManifest | None = None,
+    ):
+        self.platform = platform
+        self.page_regions = page_regions
+        self.extract = extract
+        self.pagination = pagination
+        self.headers = headers
+        self.num_workers = get_num_workers(max_workers)
+        self.req_timeout = req_timeout
+        self.max_retries = max(1, max_retries)
+        self.retry_delay = retry_delay
+        self.max_failed_pages = max_failed_pages
+        self.partial_parse = partial_parse
+        self.download_images = download_images
+        self.trace = trace
+        self.on_batch = on_batch
+        self.on_progress = on_progress
+        self.raw_archive = raw_archive
+        self.budget = budget or CrawlBudget()
+        self.dedupe = dedupe if dedupe is not None else ProductDeduplicator()
+        self.image_manifest = image_manifest or default_image_manifest
+        # Memory-bounded mode keeps a much shorter download queue.
+        self.max_pending_downloads = max_pending_downloads or self.num_workers * (
+            2 if self.budget.memory is not None else 8
+        )
+        self.latency = latency_tracker(platform)
+        self._hedge_pool: ThreadPoolExecutor | None = None
+
+    def _request(self, url: str, timeout: float) -> requests.Response:
+        start = time.perf_counter()
+        response = requests.get(url, headers=self.headers, timeout=timeout)
+        response.raise_for_status()
+        self.latency.record(time.perf_counter() - start)
+        return response
+
+    def _hedged_request(
+        self, url: str, timeout: float, category: str
+    ) -> requests.Response:
+        """
+        Sends a second request when the first outlives the platform's p95
+        latency; the first successful answer wins. The loser is left to finish
+        in the background, bounded by its own timeout.
+        """
+        threshold = self.latency.percentile(self.budget.hedge_percentile)
+        if threshold is None or threshold >= timeout:
+            return self._request(url, timeout)
+        if self._hedge_pool is None:
+            self._hedge_pool = ThreadPoolExecutor(
+                max_workers=4, thread_name_prefix=f"{self.platform}-hedge"
+            )
+
+        primary = self._hedge_pool.submit(self._request, url, timeout)
+        done, _ = concurrent.futures.wait([primary], timeout=threshold)
+        if done:
+            return primary.result()
+
+        count(self.trace, "hedged_requests", 1, category)
+        hedge = self._hedge_pool.submit(self._request, url, timeout)
+        waiting = {primary, hedge}
+        error: BaseException | None = None
+        while waiting:
+            done, waiting = concurrent.futures.wait(
+                waiting, return_when=concurrent.futures.FIRST_COMPLETED
+            )
+            for future in done:
+                if future.exception() is None:
+                    if future is hedge:
+                        count(self.trace, "hedge_wins", 1, category)
+                    return future.result()
+                error = error or future.exception()
+        raise error
+
+    def fetch(
+        self, url: str, category: str, deadline: Deadline | None = None
+    ) -> requests.Response | None:
+        """
+        GETs `url`, retrying with a linear backoff; None once retries run out.
+
+        Attempts never run past `deadline`: timeouts are shortened to the time
+        left and no new attempt starts once it has passed.
+        """
+        for attempt in range(self.max_retries):
+            if deadline is not None and deadline.expired():
+                log.warning(f"Deadline reached before fetching {url}.")
+                return None
+            timeout = deadline.cap(self.req_timeout) if deadline else self.req_timeout
+            try:
+                with span(self.trace, FETCH, category):
+                    if self.budget.hedge:
+                        response = self._hedged_request(url, timeout, category)
+                    else:
+                        response = self._request(url, timeout)
+                return response
+            except requests.exceptions.Timeout:
+                log.warning(
+                    f"Request timed out for {url} (Attempt {attempt + 1}/{self.max_retries})"
+                )
+            except requests.exceptions.RequestException as e:
+                log.warning(
+                    f"Request failed for {url} (Attempt {attempt + 1}/{self.max_retries}): {e}"
+                )
+            if attempt < self.max_retries - 1:
+                delay = self.retry_delay * (attempt + 1)
+                remaining = deadline.remaining() if deadline else None
+                time.sleep(delay if remaining is None else min(delay, remaining))
+        log.error(f"Max retries reached for {url}. Skipping this page.")
+        return None
+
+    def extract_body(
+        self, body: bytes, category: str
+    ) -> tuple[BeautifulSoup, list[dict[str, Any]]]:
+        """Parses and extracts a page body; also used to re-extract archived pages."""
+        with span(self.trace, PARSE, category):
+            soup = parse_document(body, self.page_regions, partial=self.partial_parse)
+        with span(self.trace, EXTRACT, category):
+            records = self.extract(soup, category)
+        return soup, records
+
+    def scrape_page(
+        self,
+        url: str,
+        category: str,
+        page: int | None = None,
+        deadline: Deadline | None = None,
+    ) -> tuple[BeautifulSoup, list[dict[str, Any]]] | None:
+        """Fetches, parses and extracts one page; None if the page failed."""
+        response = self.fetch(url, category, deadline)
+        if response is None:
+            return None
+        if self.raw_archive is not None:
+            self.raw_archive.append(category, page, url, response.content)
+        try:
+            return self.extract_body(response.content, category)
+        except Exception:
+            log.exception(f"Error scraping {self.platform} page {url}")
+            return None
+
+    def _submit_downloads(
+        self,
+        executor: ThreadPoolExecutor,
+        pending: set[Future],
+        records: list[dict[str, Any]],
+        category: str,
+    ):
+        if not self.download_images:
+            return
+        for record in records:
+            if not record.get("product_image_url"):
+                continue
+            # Backpressure: don't let queued downloads grow without bound while
+            # listing pages keep arriving faster than images download.
+            while len(pending) >= self.max_pending_downloads:
+                done, _ = concurrent.futures.wait(
+                    pending, return_when=concurrent.futures.FIRST_COMPLETED
+                )
+                _collect(done)
+                pending.difference_update(done)
+            # The download logs with the category/page context of its page.
+            pending.add(
+                executor.submit(
+                    contextvars.copy_context().run,
+                    traced,
+                    self.trace,
+                    IMAGE_DOWNLOAD,
+                    category,
+                    download_image,
+                    record["product_image_url"],
+                    record["product_image_local_path"],
+                    self.req_timeout,
+                    self.headers,
+                    self.image_manifest,
+                )
+            )
+
+    def scrape_category(
+        self,
+        category: str,
+        url_template: str,
+        executor: ThreadPoolExecutor,
+        pending: set[Future],
+        job_deadline: Deadline | None = None,
+    ) -> list[dict[str, Any]]:
+        log.info(f"Processing {self.platform} category: {category}")
+        emit(self.trace, job_events.CATEGORY_STARTED, category=category)
+        duplicates_before = self.dedupe.duplicates
+        with log_context(category=category):
+            products, more = self.scrape_range(
+                category,
+                url_template,
+                executor,
+                pending,
+                last_page=self.budget.max_pages,
+                deadline=Deadline(self.budget.category_seconds, job_deadline),
+            )
+        if more:
+            log.info(f"Page limit of {self.budget.max_pages} reached for {category}.")
+            count(self.trace, "page_limit_stops", 1, category)
+        log.info(
+            f"Finished processing {self.platform} category: {category}. Found {len(products)} products, "
+            f"dropped {self.dedupe.duplicates - duplicates_before} duplicates."
+        )
+        emit(
+            self.trace,
+            job_events.CATEGORY_FINISHED,
+            category=category,
+            products=len(products),
+            duplicates=self.dedupe.duplicates - duplicates_before,
+        )
+        return products
+
+    def scrape_range(
+        self,
+        category: str,
+        url_template: str,
+        executor: ThreadPoolExecutor,
+        pending: set[Future],
+        first_page: int = 1,
+        last_page: int | None = None,
+        deadline: Deadline | None = None,
+    ) -> tuple[list[dict[str, Any]], bool]:
+        """
+        Scrapes pages `first_page`..`last_page` (to the end when `last_page` is None).
+
+        Returns the products and whether the listing continues past `last_page`.
+        Reaching `deadline` stops paging and keeps the products found so far.
+        """
+        products: list[dict[str, Any]] = []
+        page = first_page
+        failed_pages = 0
+
+        while last_page is None or page <= last_page:
+            self._progress()
+            if deadline is not None and deadline.expired():
+                log.warning(
+                    f"Deadline reached for {category} before page {page}. "
+                    f"Keeping {len(products)} products."
+                )
+                count(self.trace, "deadline_stops", 1, category)
+                return products, False
+            url = url_template.format(page)
+            log.info("Scraping URL: %s (Page: %d)", url, page)
+            with log_context(page=page):
+                result = self.scrape_page(url, category, page, deadline)
+
+            if result is None:
+                failed_pages += 1
+                if failed_pages >= self.max_failed_pages:
+                    log.error(
+                        f"{failed_pages} consecutive pages failed for {category}. Stopping this category."
+                    )
+                    return products, False
+                page += 1
+                continue
+            failed_pages = 0
+
+            soup, records = result
+            if not records and self.pagination.refetch_empty:
+                log.info(
+                    "No products on page %d of %s; fetching it again.", page, category
+                )
+                count(self.trace, "empty_page_refetches", 1, category)
+                with log_context(page=page):
+                    result = self.scrape_page(url, category, page, deadline) or result
+                soup, records = result
+            unique = self.dedupe.filter(records)
+            if len(unique) < len(records):
+                count(self.trace, "duplicates", len(records) - len(unique), category)
+            if unique:
+                log.info(
+                    "Found %d products on page %d (%d duplicates).",
+                    len(unique),
+                    page,
+                    len(records) - len(unique),
+                )
+                products.extend(unique)
+                count(self.trace, "products", len(unique), category)
+                if self.on_batch is not None:
+                    self.on_batch(category, unique)
+                with log_context(page=page):
+                    self._submit_downloads(executor, pending, unique, category)
+            elif records:
+                log.info("Only duplicate products for %s on page %d.", category, page)
+            else:
+                log.info("No products found for %s on page %d.", category, page)
+            emit(
+                self.trace,
+                job_events.PAGE,
+                category=category,
+                page=page,
+                products=len(unique),
+                duplicates=len(records) - len(unique),
+                images_pending=len(pending),
+            )
+            if unique and streaming(self.trace):
+                # Copies, as tagging and ingest keep updating the records.
+                emit(
+                    self.trace,
+                    job_events.PRODUCTS,
+                    category=category,
+                    page=page,
+                    records=[dict(record) for record in unique],
+                )
+
+            # Paging follows what the page listed, duplicates included.
+            has_next = self.pagination.has_next(soup, records)
+            if self.budget.memory is not None:
+                # Free the parse tree now rather than whenever the GC gets to it.
+                soup.decompose()
+                del soup, result
+                if not self._within_memory_limit(pending, category):
+                    return products, False
+            if not has_next:
+                log.info(f"End of results for {category} on page {page}.")
+                return products, False
+            page += 1
+
+        return products, True
+
+    def _within_memory_limit(self, pending: set[Future], category: str) -> bool:
+        """
+        Enforces the memory limit between pages: when over it, waits for queued
+        downloads and collects garbage; if still past the hard limit, the
+        category stops.
+        """
+        memory = self.budget.memory
+        if not memory.over_limit():
+            return True
+        memory.drains += 1
+        log.warning(
+            f"{self.platform} over its {memory.limit_mb:.0f} MB memory limit "
+            f"({memory.current_mb():.0f} MB). Draining {len(pending)} downloads."
+        )
+        done, _ = self._wait_for_downloads(pending, None)
+        _collect(done)
+        pending.clear()
+        gc.collect()
+        if memory.over_limit(HARD_LIMIT_FACTOR):
+            log.error(
+                f"Still over the hard memory limit after draining. Stopping category {category}."
+            )
+            count(self.trace, "memory_stops", 1, category)
+            return False
+        return True
+
+    def run_range(
+        self,
+        category: str,
+        url_template: str,
+        first_page: int,
+        last_page: int,
+    ) -> tuple[list[dict[str, Any]], bool]:
+        """Scrapes one page range of a category (a work queue shard) with its downloads."""
+        pending: set[Future] = set()
+        deadline = self.budget.job_deadline()
+        if self.budget.memory is not None:
+            self.budget.memory.start()
+        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+            result = self.scrape_range(
+                category,
+                url_template,
+                executor,
+                pending,
+                first_page,
+                last_page,
+                Deadline(self.budget.category_seconds, deadline),
+            )
+            self._finish_downloads(executor, pending, deadline)
+        return result
+
+    def run(self, categories: Iterable[tuple[str, str]]) -> list[dict[str, Any]]:
+        """Scrapes `(category, url_template)` pairs and waits for their image downloads."""
+        all_products: list[dict[str, Any]] = []
+        pending: set[Future] = set()
+        deadline = self.budget.job_deadline()
+        if self.budget.memory is not None:
+            self.budget.memory.start()
+        log.info(f"Starting {self.platform} pipeline with {self.num_workers} workers.")
+
+        with ThreadPoolExecutor(max_workers=self.num_workers) as executor:
+            for category, url_template in categories:
+                if deadline.expired():
+                    log.warning(
+                        f"{self.platform} job deadline reached. Skipping category {category}."
+                    )
+                    count(self.trace, "deadline_stops", 1, category)
+                    continue
+                all_products.extend(
+                    self.scrape_category(
+                        category, url_template, executor, pending, deadline
+                    )
+                )
+            log.info(f"Waiting for {len(pending)} image downloads...")
+            self._finish_downloads(executor, pending, deadline)
+
+        log.info(
+            f"Finished {self.platform} pipeline. Total products found: {len(all_products)}, "
+            f"duplicates dropped: {self.dedupe.duplicates}"
+        )
+        return all_products
+
+    def _finish_downloads(
+        self, executor: ThreadPoolExecutor, pending: set[Future], deadline: Deadline
+    ):
+        """Waits for queued image downloads, dropping the ones the deadline leaves no time for."""
+        emit(self.trace, job_events.IMAGES_PENDING, pending=len(pending))
+        done, not_done = self._wait_for_downloads(pending, deadline.remaining())
+        _collect(done)
+        if not_done:
+            log.warning(
+                f"{self.platform} job deadline reached. Dropping {len(not_done)} image downloads."
+            )
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _wait_for_downloads(
+        self, pending: set[Future], timeout: float | None
+    ) -> tuple[set[Future], set[Future]]:
+        """concurrent.futures.wait in PROGRESS_INTERVAL slices, reporting progress between them."""
+        end = time.monotonic() + timeout if timeout is not None else None
+        done: set[Future] = set()
+        not_done = set(pending)
+        while not_done:
+            remaining = max(0.0, end - time.monotonic()) if end is not None else None
+            wait = (
+                PROGRESS_INTERVAL
+                if remaining is None
+                else min(PROGRESS_INTERVAL, remaining)
+            )
+            finished, not_done = concurrent.futures.wait(not_done, timeout=wait)
+            done |= finished
+            if not not_done or (remaining is not None and remaining <= wait):
+                break
+            self._progress()
+        return done, not_done
+
+    def _progress(self):
+        if self.on_progress is not None:
+            self.on_progress()
+
+
+def _collect(futures: Iterable[Future]):
+    for future in futures:
+        try:
+            future.result()
+        except Exception:
+            log.exception("Image download generated an exception")
@@ -0,0 +1,180 @@
+import logging
+import os
+import sqlite3
+import time
+from typing import Any
+
+from common.categories import normalize_url_template
+from common.tracing import FETCH, IMAGE_DOWNLOAD, PARSE
+
+log = logging.getLogger(__name__)
+
+DEFAULT_HISTORY_DB = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "crawl_history.db",
+)
+ESTIMATE_RUNS = 5
+
+
+class CrawlHistory:
+    """Per-category crawl statistics of past jobs, used to estimate upcoming runs."""
+
+    def __init__(self, db_path: str = DEFAULT_HISTORY_DB):
+        self.db_path = db_path
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS crawl_stats (
+                platform TEXT,
+                category TEXT,
+                finished_at REAL,
+                pages INTEGER,
+                listing_requests INTEGER,
+                image_requests INTEGER,
+                products INTEGER,
+                seconds REAL
+            )"""
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_crawl_stats ON crawl_stats (platform, category, finished_at)"
+        )
+        return conn
+
+    def record_job(self, platform: str, breakdown: dict[str, Any]):
+        """Stores one row per category from a finished job's trace breakdown."""
+        rows = []
+        finished_at = time.time()
+        for category, stages in breakdown.get("categories", {}).items():
+            counters = breakdown.get("category_counters", {}).get(category, {})
+            rows.append(
+                (
+                    platform,
+                    category,
+                    finished_at,
+                    stages.get(PARSE, {}).get("count", 0),
+                    stages.get(FETCH, {}).get("count", 0),
+                    stages.get(IMAGE_DOWNLOAD, {}).get("count", 0),
+                    counters.get("products", 0),
+                    sum(
+                        stats["total_seconds"]
+                        for stage, stats in stages.items()
+                        if stage != IMAGE_DOWNLOAD
+                    ),
+                )
+            )
+        if not rows:
+            return
+
+        conn = None
+        try:
+            conn = self._connect()
+            conn.executemany(
+                "INSERT INTO crawl_stats VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            conn.commit()
+        except sqlite3.Error as e:
+            log.error(f"Failed to record crawl history for {platform}: {e}")
+        finally:
+            if conn:
+                conn.close()
+
+    def estimate(
+        self, platform: str, category: str, runs: int = ESTIMATE_RUNS
+    ) -> dict[str, float] | None:
+        """Averages the last `runs` crawls of a category, or None without history."""
+        conn = None
+        try:
+            conn = self._connect()
+            row = conn.execute(
+                """SELECT COUNT(*), AVG(pages), AVG(listing_requests), AVG(image_requests),
+                          AVG(products), AVG(seconds)
+                   FROM (SELECT * FROM crawl_stats
+                         WHERE platform = ? AND category = ?
+                         ORDER BY finished_at DESC LIMIT ?)""",
+                (platform, category, runs),
+            ).fetchone()
+        except sqlite3.Error as e:
+            log.error(f"Failed to read crawl history for {platform}/{category}: {e}")
+            return None
+        finally:
+            if conn:
+                conn.close()
+
+        if not row or not row[0]:
+            return None
+        return {
+            "runs": row[0],
+            "pages": round(row[1], 1),
+            "listing_requests": round(row[2], 1),
+            "image_requests": round(row[3], 1),
+            "requests": round(row[2] + row[3], 1),
+            "products": round(row[4], 1),
+            "seconds": round(row[5], 1),
+        }
+
+
+def plan_crawl(
+    platform: str,
+    categories: list[dict[str, Any]],
+    history: CrawlHistory | None = None,
+) -> dict[str, Any]:
+    """
+    Builds the crawl plan for a run before any request is made.
+
+    Categories repeated in `categories`, or pointing at a listing already planned
+    (same URL template, fragments ignored), are dropped with the reason recorded.
+    Each planned category carries page/request estimates from `history`.
+    """
+    planned: list[dict[str, Any]] = []
+    skipped: list[dict[str, str]] = []
+    seen_ids = set()
+    seen_templates: dict[str, str] = {}
+
+    for category in categories:
+        category_id = category["id"]
+        template = normalize_url_template(category["url_template"])
+        if category_id in seen_ids:
+            skipped.append({"id": category_id, "reason": "listed more than once"})
+            continue
+        if template in seen_templates:
+            skipped.append(
+                {
+                    "id": category_id,
+                    "reason": f"same listing as '{seen_templates[template]}'",
+                }
+            )
+            continue
+        seen_ids.add(category_id)
+        seen_templates[template] = category_id
+        planned.append(category)
+
+    estimates = {
+        category["id"]: history.estimate(platform, category["id"]) if history else None
+        for category in planned
+    }
+    known = [estimate for estimate in estimates.values() if estimate]
+    plan = {
+        "platform": platform,
+        "categories": planned,
+        "skipped": skipped,
+        "estimates": estimates,
+        "totals": {
+            "categories": len(planned),
+            "categories_without_history": len(planned) - len(known),
+            "pages": round(sum(e["pages"] for e in known), 1),
+            "requests": round(sum(e["requests"] for e in known), 1),
+            "products": round(sum(e["products"] for e in known), 1),
+        },
+    }
+
+    for entry in skipped:
+        log.info(f"{platform}: skipping category '{entry['id']}' ({entry['reason']}).")
+    log.info(
+        f"{platform} crawl plan: {len(planned)} categories, ~{plan['totals']['pages']} pages, "
+        f"~{plan['totals']['requests']} requests "
+        f"({plan['totals']['categories_without_history']} without history)."
+    )
+    return plan
@@ -0,0 +1,83 @@
+import importlib
+import logging
+import threading
+import time
+from types import ModuleType
+from typing import Any
+
+log = logging.getLogger(__name__)
+
+
+class ScraperPlugin:
+    """A scraper module registered by import path; imported on first use."""
+
+    def __init__(self, key: str, name: str, module_path: str):
+        self.key = key
+        self.name = name
+        self.module_path = module_path
+        self.module: ModuleType | None = None
+        self.load_seconds: float | None = None
+        self.first_job_seconds: float | None = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "name": self.name,
+            "module": self.module_path,
+            "loaded": self.module is not None,
+            "load_seconds": self.load_seconds,
+            "first_job_seconds": self.first_job_seconds,
+        }
+
+
+class PluginRegistry:
+    """
+    Registry of the scrapers the service can run.
+
+    Registering a plugin only records its module path, so the service starts
+    without importing any scraper or its dependencies (the HTML parser, pandas).
+    The module is imported the first time a job asks for it, and the import
+    time is kept so cold starts can be compared with warm runs.
+    """
+
+    def __init__(self):
+        self._plugins: dict[str, ScraperPlugin] = {}
+        self._lock = threading.Lock()
+
+    def register(self, key: str, name: str, module_path: str):
+        self._plugins[key] = ScraperPlugin(key, name, module_path)
+
+    def keys(self) -> list[str]:
+        return list(self._plugins)
+
+    def names(self) -> list[str]:
+        return [plugin.name for plugin in self._plugins.values()]
+
+    def get(self, key: str) -> ScraperPlugin:
+        try:
+            return self._plugins[key]
+        except KeyError:
+            raise KeyError(f"No scraper plugin registered for '{key}'")
+
+    def load(self, key: str) -> ModuleType:
+        plugin = self.get(key)
+        if plugin.module is None:
+            with self._lock:
+                if plugin.module is None:
+                    start = time.perf_counter()
+                    module = importlib.import_module(plugin.module_path)
+                    plugin.load_seconds = round(time.perf_counter() - start, 3)
+                    plugin.module = module
+                    log.info(
+                        f"Loaded scraper plugin '{key}' ({plugin.module_path}) in {plugin.load_seconds:.3f}s"
+                    )
+        return plugin.module
+
+    def record_job(self, key: str, seconds: float):
+        """Keeps the wall time of the plugin's first job (its cold run)."""
+        plugin = self.get(key)
+        if plugin.first_job_seconds is None:
+            plugin.first_job_seconds = round(seconds, 3)
+            log.info(f"First {key} job finished in {plugin.first_job_seconds:.3f}s")
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        return {key: plugin.stats() for key, plugin in self._plugins.items()}
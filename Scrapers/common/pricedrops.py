@@ -0,0 +1,360 @@
+import datetime
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from common.archive import normalize_price
+
+log = logging.getLogger(__name__)
+
+DEFAULT_DROPS_DB = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "price_drops.db",
+)
+DEFAULT_WINDOW_DAYS = 30
+DEFAULT_DROP_PERCENT = 10.0
+# Products whose last price is kept in memory; older entries are re-read from the store.
+DEFAULT_CACHE_SIZE = 100_000
+
+# Rule names stored on each event.
+PERCENT_DROP = "percent_drop"
+WINDOW_LOW = "window_low"
+
+
+def _decode_window(text: str | None) -> list[tuple[int, float]]:
+    if not text:
+        return []
+    window = []
+    for entry in text.split(";"):
+        day, price = entry.split(":")
+        window.append((int(day), float(price)))
+    return window
+
+
+def _encode_window(window: list[tuple[int, float]]) -> str:
+    return ";".join(f"{day}:{price:g}" for day, price in window)
+
+
+def push_window(
+    window: list[tuple[int, float]], held_through: int, price: float
+) -> list[tuple[int, float]]:
+    """
+    Records that `price` held until day `held_through` in a monotonic window.
+
+    Prices increase from front to back, so once expired entries are dropped
+    from the front it holds the window minimum, and an update only ever
+    touches the ends. A product rarely keeps more than a handful of entries.
+    """
+    while window and window[-1][1] >= price:
+        window.pop()
+    window.append((held_through, price))
+    return window
+
+
+def expire_window(
+    window: list[tuple[int, float]], day: int, window_days: int
+) -> list[tuple[int, float]]:
+    while window and window[0][0] <= day - window_days:
+        window.pop(0)
+    return window
+
+
+class DropRule:
+    """
+    Threshold rule evaluated against a product's state before an observation.
+
+    `percent` is the drop from the last seen price that triggers the rule;
+    `new_low` additionally requires the price to undercut the window minimum.
+    """
+
+    def __init__(self, name: str, percent: float = 0.0, new_low: bool = False):
+        self.name = name
+        self.percent = percent
+        self.new_low = new_low
+
+    def matches(
+        self, price: float, last_price: float | None, window_min: float | None
+    ) -> bool:
+        if last_price is None or last_price <= 0 or price >= last_price:
+            return False
+        if (last_price - price) / last_price * 100 < self.percent:
+            return False
+        if self.new_low and (window_min is None or price >= window_min):
+            return False
+        return True
+
+
+DEFAULT_RULES = [
+    DropRule(PERCENT_DROP, percent=DEFAULT_DROP_PERCENT),
+    DropRule(WINDOW_LOW, new_low=True),
+]
+
+
+class PriceDropDetector:
+    """
+    Incremental price-drop detection over ingested batches.
+
+    Each product keeps a small row of rolling state keyed by platform and
+    URL: its current price, the day it changed and a monotonic window of the
+    earlier prices still inside the N-day range. The last prices of the
+    `cache_size` most recently seen products are cached in memory, so a
+    product whose price did not move is skipped without touching the
+    database; rows are only read and written for products whose price
+    changed (or fell out of the cache), and detection costs
+    O(changed products), not O(catalog).
+    Events are stored so the backend can match them against watchlists by
+    product URL.
+    """
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_DROPS_DB,
+        window_days: int = DEFAULT_WINDOW_DAYS,
+        rules: list[DropRule] | None = None,
+        cache_size: int = DEFAULT_CACHE_SIZE,
+    ):
+        self.db_path = db_path
+        self.window_days = window_days
+        self.rules = rules if rules is not None else DEFAULT_RULES
+        self.cache_size = max(1, cache_size)
+        self._lock = threading.Lock()
+        # Least recently seen first; callers hold self._lock.
+        self._last_prices: OrderedDict[tuple[str, str], float] = OrderedDict()
+        self.state_writes = 0
+
+    def _cached_price(self, key: tuple[str, str]) -> float | None:
+        price = self._last_prices.get(key)
+        if price is not None:
+            self._last_prices.move_to_end(key)
+        return price
+
+    def _cache_price(self, key: tuple[str, str], price: float):
+        self._last_prices[key] = price
+        self._last_prices.move_to_end(key)
+        if len(self._last_prices) > self.cache_size:
+            self._last_prices.popitem(last=False)
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS price_state (
+                platform TEXT,
+                product_url TEXT,
+                last_price REAL,
+                last_day INTEGER,
+                window TEXT,
+                PRIMARY KEY (platform, product_url)
+            ) WITHOUT ROWID"""
+        )
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS price_drops (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                detected_at REAL,
+                platform TEXT,
+                product_url TEXT,
+                product_title TEXT,
+                rule TEXT,
+                old_price REAL,
+                new_price REAL,
+                window_min REAL,
+                drop_percent REAL
+            )"""
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_price_drops_url ON price_drops (product_url)"
+        )
+        return conn
+
+    def _load_state(
+        self, conn: sqlite3.Connection, keys: list[tuple[str, str]]
+    ) -> dict[tuple[str, str], tuple[float, int, str]]:
+        state = {}
+        # The keys are bound as one JSON array of [platform, url] pairs.
+        for platform, url, last_price, last_day, window in conn.execute(
+            """SELECT platform, product_url, last_price, last_day, window FROM price_state
+            WHERE (platform, product_url) IN (
+                SELECT json_extract(value, '$[0]'), json_extract(value, '$[1]')
+                FROM json_each(?)
+            )""",
+            (json.dumps(keys),),
+        ):
+            state[(platform, url)] = (last_price, last_day, window)
+        return state
+
+    def last_prices(self, keys: list[tuple[str, str]]) -> dict[tuple[str, str], float]:
+        """Last recorded price of each known product, from the cache or the state table."""
+        with self._lock:
+            found = {}
+            for key in keys:
+                price = self._cached_price(key)
+                if price is not None:
+                    found[key] = price
+            missing = list({key for key in keys if key not in found})
+            if missing:
+                conn = self._connect()
+                try:
+                    state = self._load_state(conn, missing)
+                finally:
+                    conn.close()
+                for key, (last_price, _, _) in state.items():
+                    self._cache_price(key, last_price)
+                    found[key] = last_price
+        return found
+
+    def _evaluate(
+        self,
+        key: tuple[str, str],
+        price: float,
+        record: dict[str, Any],
+        state: tuple[float | None, int | None, str | None],
+        day: int,
+    ) -> tuple[list[dict[str, Any]], tuple]:
+        """Runs the rules for one changed product; returns its events and new state row."""
+        last_price, last_day, window_text = state
+        window = expire_window(_decode_window(window_text), day, self.window_days)
+        lows = [window[0][1]] if window else []
+        if last_price is not None:
+            lows.append(last_price)
+        window_min = min(lows) if lows else None
+
+        events = [
+            {
+                "platform": key[0],
+                "product_url": key[1],
+                "product_title": record.get("product_title"),
+                "rule": rule.name,
+                "old_price": last_price,
+                "new_price": price,
+                "window_min": window_min,
+                "drop_percent": round((last_price - price) / last_price * 100, 2),
+            }
+            for rule in self.rules
+            if rule.matches(price, last_price, window_min)
+        ]
+
+        if last_price is not None:
+            # The old price held at least until yesterday (today if it changed today).
+            window = push_window(window, max(last_day, day - 1), last_price)
+        return events, (key[0], key[1], price, day, _encode_window(window))
+
+    def process(
+        self,
+        records: list[dict[str, Any]],
+        observed_at: datetime.datetime | None = None,
+    ) -> list[dict[str, Any]]:
+        """Updates state for a batch of scraped records and returns the drop events."""
+        observed_at = observed_at or datetime.datetime.now(datetime.UTC)
+        day = observed_at.date().toordinal()
+
+        # Last observation wins when a product appears twice in one batch.
+        batch: dict[tuple[str, str], tuple[float, dict[str, Any]]] = {}
+        for record in records:
+            price = normalize_price(record.get("product_price") or record.get("price"))
+            if price is None or not record.get("platform"):
+                continue
+            if not record.get("product_url"):
+                continue
+            batch[(record["platform"], record["product_url"])] = (price, record)
+
+        events: list[dict[str, Any]] = []
+        updates = []
+        with self._lock:
+            changed = {
+                key: value
+                for key, value in batch.items()
+                if self._cached_price(key) != value[0]
+            }
+            if not changed:
+                return []
+
+            conn = self._connect()
+            try:
+                state = self._load_state(conn, list(changed))
+                for key, (price, record) in changed.items():
+                    row = state.get(key, (None, None, None))
+                    if row[0] == price:
+                        # Known to the store but not cached in this process.
+                        self._cache_price(key, price)
+                        continue
+                    product_events, update = self._evaluate(
+                        key, price, record, row, day
+                    )
+                    events.extend(product_events)
+                    updates.append(update)
+
+                detected_at = time.time()
+                with conn:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO price_state VALUES (?, ?, ?, ?, ?)",
+                        updates,
+                    )
+                    conn.executemany(
+                        """INSERT INTO price_drops (detected_at, platform, product_url,
+                        product_title, rule, old_price, new_price, window_min, drop_percent)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                        [
+                            (
+                                detected_at,
+                                event["platform"],
+                                event["product_url"],
+                                event["product_title"],
+                                event["rule"],
+                                event["old_price"],
+                                event["new_price"],
+                                event["window_min"],
+                                event["drop_percent"],
+                            )
+                            for event in events
+                        ],
+                    )
+            finally:
+                conn.close()
+            for platform, url, price, _, _ in updates:
+                self._cache_price((platform, url), price)
+            self.state_writes += len(updates)
+
+        if events:
+            log.info(
+                f"Detected {len(events)} price drop events across {len(updates)} changed products."
+            )
+        return events
+
+    def recent_drops(
+        self,
+        since_id: int = 0,
+        platform: str | None = None,
+        product_url: str | None = None,
+        limit: int = 100,
+    ) -> list[dict[str, Any]]:
+        """Stored events after `since_id`, oldest first, for polling consumers."""
+        query = "SELECT * FROM price_drops WHERE id > ?"
+        params: list[Any] = [since_id]
+        if platform:
+            query += " AND platform = ?"
+            params.append(platform)
+        if product_url:
+            query += " AND product_url = ?"
+            params.append(product_url)
+        query += " ORDER BY id LIMIT ?"
+        params.append(limit)
+
+        conn = self._connect()
+        try:
+            conn.row_factory = sqlite3.Row
+            return [dict(row) for row in conn.execute(query, params)]
+        finally:
+            conn.close()
+
+
+detector = PriceDropDetector(
+    os.getenv("PRICE_DROPS_DB", DEFAULT_DROPS_DB),
+    int(os.getenv("PRICE_DROP_WINDOW_DAYS", DEFAULT_WINDOW_DAYS)),
+)
@@ -0,0 +1,100 @@
+import cProfile
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable
+from typing import Any
+
+log = logging.getLogger(__name__)
+
+PROFILERS = ("cprofile", "sampling")
+DEFAULT_SAMPLE_INTERVAL = 0.005
+
+
+class SamplingProfiler:
+    """
+    Periodically samples the stacks of every thread in the process.
+
+    Unlike cProfile it also sees the image download workers and adds almost no
+    overhead to the sampled code. Output is in the collapsed-stack format read
+    by flamegraph.pl and speedscope: one `frame;frame;frame count` line per stack.
+    """
+
+    def __init__(self, interval: float = DEFAULT_SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self):
+        self._thread = threading.Thread(
+            target=self._run, name="sampling-profiler", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _run(self):
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(
+                        f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+                    )
+                    frame = frame.f_back
+                self.samples[";".join(reversed(stack))] += 1
+
+    def dump(self, path: str):
+        with open(path, "w") as output:
+            for stack, count in self.samples.most_common():
+                output.write(f"{stack} {count}\n")
+
+
+def run_profiled(
+    mode: str | None, output_dir: str, job_name: str, func: Callable[[], Any]
+):
+    """
+    Runs `func` under the requested profiler and writes the artifact to `output_dir`.
+
+    Returns `(result, artifact_path)`; `artifact_path` is None when `mode` is None.
+    cProfile only instruments the calling thread, use "sampling" to include the
+    download worker threads.
+    """
+    if mode is None:
+        return func(), None
+    if mode not in PROFILERS:
+        raise ValueError(f"Unknown profiler '{mode}'. Expected one of {PROFILERS}.")
+
+    os.makedirs(output_dir, exist_ok=True)
+    stamp = time.strftime("%Y%m%d-%H%M%S")
+
+    if mode == "cprofile":
+        artifact_path = os.path.join(output_dir, f"{job_name}-{stamp}.prof")
+        profiler = cProfile.Profile()
+        try:
+            result = profiler.runcall(func)
+        finally:
+            profiler.dump_stats(artifact_path)
+    else:
+        artifact_path = os.path.join(output_dir, f"{job_name}-{stamp}.collapsed.txt")
+        profiler = SamplingProfiler()
+        profiler.start()
+        try:
+            result = func()
+        finally:
+            profiler.stop()
+            profiler.dump(artifact_path)
+
+    log.info(f"{mode} profile for {job_name} written to {artifact_path}")
+    return result, artifact_path
@@ -0,0 +1,295 @@
+import argparse
+import concurrent.futures
+import json
+import logging
+import mmap
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from typing import Any
+
+from common.logs import configure_logging
+from common.plugins import PluginRegistry
+
+log = logging.getLogger(__name__)
+
+DEFAULT_RAW_ARCHIVE_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "raw_html",
+)
+SEGMENT_BYTES = 64 * 1024 * 1024
+COMPRESSION_LEVEL = 3
+REEXTRACT_CHUNK = 32
+
+# Same plugin keys as the service; re-extraction imports the run's scraper.
+scraper_plugins = PluginRegistry()
+scraper_plugins.register("amazon", "Amazon", "amazon.amazon_scraper")
+scraper_plugins.register("jumia", "Jumia", "jumia.jumia_scraper")
+scraper_plugins.register("2b", "2b", "twoB.twoB_scraper")
+
+
+def _connect_index(root: str) -> sqlite3.Connection:
+    os.makedirs(root, exist_ok=True)
+    conn = sqlite3.connect(os.path.join(root, "index.db"))
+    conn.execute(
+        """CREATE TABLE IF NOT EXISTS pages (
+            run_id TEXT,
+            platform TEXT,
+            category TEXT,
+            page INTEGER,
+            url TEXT,
+            fetched_at REAL,
+            segment TEXT,
+            offset INTEGER,
+            length INTEGER,
+            raw_length INTEGER
+        )"""
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_pages_run ON pages (run_id, platform, category, page, fetched_at)"
+    )
+    return conn
+
+
+class RawPageWriter:
+    """
+    Appends the raw bodies of one run's listing pages to zstd segment files.
+
+    Every page is compressed as its own zstd frame and appended to the current
+    segment (`<run_id>/segment-NNNNN.zst`, rolled over at SEGMENT_BYTES); its
+    offset and length go into the SQLite index next to the platform, category,
+    page and fetch time. Frames are never rewritten, so a segment can be read
+    while the run is still appending to it. zstandard is imported on first use.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        platform: str,
+        run_id: str | None = None,
+        level: int = COMPRESSION_LEVEL,
+        segment_bytes: int = SEGMENT_BYTES,
+    ):
+        self.root = root
+        self.platform = platform
+        # The suffix keeps runs started in the same second apart.
+        self.run_id = (
+            run_id
+            or f"{platform}-{time.strftime('%Y%m%dT%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        )
+        self.level = level
+        self.segment_bytes = segment_bytes
+        self.pages = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self._lock = threading.Lock()
+        self._compressor = None
+        self._segment_number = -1
+        self._segment_file = None
+        self._conn: sqlite3.Connection | None = None
+
+    def _open_segment(self):
+        if self._segment_file is not None:
+            self._segment_file.close()
+        self._segment_number += 1
+        run_dir = os.path.join(self.root, self.run_id)
+        os.makedirs(run_dir, exist_ok=True)
+        self._segment_file = open(
+            os.path.join(run_dir, f"segment-{self._segment_number:05d}.zst"), "ab"
+        )
+
+    def append(self, category: str, page: int | None, url: str, body: bytes):
+        """Stores one fetched page; failures are logged and never stop the scrape."""
+        try:
+            with self._lock:
+                if self._compressor is None:
+                    import zstandard
+
+                    self._compressor = zstandard.ZstdCompressor(level=self.level)
+                    self._conn = _connect_index(self.root)
+                if (
+                    self._segment_file is None
+                    or self._segment_file.tell() >= self.segment_bytes
+                ):
+                    self._open_segment()
+
+                frame = self._compressor.compress(body)
+                offset = self._segment_file.tell()
+                self._segment_file.write(frame)
+                self._segment_file.flush()
+                with self._conn:
+                    self._conn.execute(
+                        "INSERT INTO pages VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            self.run_id,
+                            self.platform,
+                            category,
+                            page,
+                            url,
+                            time.time(),
+                            os.path.join(
+                                self.run_id, f"segment-{self._segment_number:05d}.zst"
+                            ),
+                            offset,
+                            len(frame),
+                            len(body),
+                        ),
+                    )
+                self.pages += 1
+                self.raw_bytes += len(body)
+                self.stored_bytes += len(frame)
+        except Exception:
+            log.exception(f"Failed to archive raw page {url}")
+
+    def close(self):
+        with self._lock:
+            if self._segment_file is not None:
+                self._segment_file.close()
+                self._segment_file = None
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+        if self.pages:
+            log.info(
+                f"Raw HTML archive {self.run_id}: {self.pages} pages, "
+                f"{self.raw_bytes / 1e6:.1f} MB -> {self.stored_bytes / 1e6:.1f} MB"
+            )
+
+
+def list_runs(root: str = DEFAULT_RAW_ARCHIVE_DIR) -> list[dict[str, Any]]:
+    if not os.path.exists(os.path.join(root, "index.db")):
+        return []
+    conn = _connect_index(root)
+    try:
+        rows = conn.execute(
+            """SELECT run_id, platform, MIN(fetched_at), COUNT(*), SUM(raw_length), SUM(length)
+            FROM pages GROUP BY run_id, platform ORDER BY MIN(fetched_at)"""
+        ).fetchall()
+    finally:
+        conn.close()
+    return [
+        {
+            "run_id": run_id,
+            "platform": platform,
+            "started_at": started_at,
+            "pages": pages,
+            "raw_bytes": raw_bytes,
+            "stored_bytes": stored_bytes,
+        }
+        for run_id, platform, started_at, pages, raw_bytes, stored_bytes in rows
+    ]
+
+
+def _reextract_chunk(
+    root: str,
+    platform: str,
+    segment: str,
+    entries: list[tuple[str, int | None, str, int, int]],
+) -> tuple[list[dict[str, Any]], int]:
+    """Runs in a worker process: re-parses a slice of one segment, no network access."""
+    import zstandard
+
+    pipeline = scraper_plugins.load(platform).build_pipeline(download_images=False)
+    decompressor = zstandard.ZstdDecompressor()
+    records: list[dict[str, Any]] = []
+    failed = 0
+    with open(os.path.join(root, segment), "rb") as segment_file:
+        with mmap.mmap(segment_file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for category, page, url, offset, length in entries:
+                try:
+                    body = decompressor.decompress(data[offset : offset + length])
+                    _, page_records = pipeline.extract_body(body, category)
+                except Exception:
+                    log.exception(f"Re-extraction failed for {url} (page {page})")
+                    failed += 1
+                    continue
+                records.extend(page_records)
+    return records, failed
+
+
+def reextract(
+    run_id: str,
+    root: str = DEFAULT_RAW_ARCHIVE_DIR,
+    workers: int | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Reruns the current extractors over an archived run, in parallel processes.
+
+    Pages are read back from memory-mapped segments in index order, so the
+    output follows the original crawl order. Nothing is fetched.
+    """
+    conn = _connect_index(root)
+    try:
+        rows = conn.execute(
+            """SELECT platform, segment, category, page, url, offset, length FROM pages
+            WHERE run_id = ? ORDER BY segment, offset""",
+            (run_id,),
+        ).fetchall()
+    finally:
+        conn.close()
+    if not rows:
+        log.warning(f"No archived pages for run {run_id}.")
+        return []
+
+    chunks = []
+    for start in range(0, len(rows), REEXTRACT_CHUNK):
+        chunk = rows[start : start + REEXTRACT_CHUNK]
+        # Chunks never span segments, so each task maps a single file.
+        by_segment: dict[tuple[str, str], list] = {}
+        for platform, segment, category, page, url, offset, length in chunk:
+            by_segment.setdefault((platform, segment), []).append(
+                (category, page, url, offset, length)
+            )
+        chunks.extend(by_segment.items())
+
+    started = time.perf_counter()
+    records: list[dict[str, Any]] = []
+    failed = 0
+    with concurrent.futures.ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [
+            executor.submit(_reextract_chunk, root, platform, segment, entries)
+            for (platform, segment), entries in chunks
+        ]
+        for future in futures:
+            chunk_records, chunk_failed = future.result()
+            records.extend(chunk_records)
+            failed += chunk_failed
+    log.info(
+        f"Re-extracted {len(records)} products from {len(rows)} pages of {run_id} "
+        f"in {time.perf_counter() - started:.2f}s ({failed} pages failed)."
+    )
+    return records
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Inspect or re-extract raw HTML runs.")
+    parser.add_argument("command", choices=["runs", "reextract"])
+    parser.add_argument("run_id", nargs="?")
+    parser.add_argument(
+        "--root", default=os.getenv("RAW_HTML_DIR", DEFAULT_RAW_ARCHIVE_DIR)
+    )
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument(
+        "--output", help="Write re-extracted records here as JSON lines."
+    )
+    args = parser.parse_args()
+
+    configure_logging()
+    if args.command == "runs":
+        for run in list_runs(args.root):
+            log.info(
+                f"{run['run_id']:<32} {run['pages']:>6} pages "
+                f"{run['raw_bytes'] / 1e6:>9.1f} MB -> {run['stored_bytes'] / 1e6:>7.1f} MB"
+            )
+    else:
+        if not args.run_id:
+            parser.error("reextract needs a run id")
+        products = reextract(args.run_id, args.root, args.workers)
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as output:
+                for product in products:
+                    output.write(json.dumps(product, ensure_ascii=False) + "\n")
+            log.info(f"Wrote {len(products)} records to {args.output}")
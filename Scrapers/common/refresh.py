@@ -0,0 +1,176 @@
+import concurrent.futures
+import logging
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from types import ModuleType
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlsplit
+
+from common.deadlines import CrawlBudget, Deadline
+from common.tracing import EXTRACT, PARSE, JobTrace, count, span
+
+if TYPE_CHECKING:
+    from common.pipeline import ScrapePipeline
+
+log = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONCURRENCY = 16
+DEFAULT_PER_PLATFORM = 6
+# Product pages are refreshed often; a page that keeps failing waits for the next round.
+DEFAULT_MAX_RETRIES = 2
+
+# Host fragment of each platform's product pages.
+PLATFORM_HOSTS = {
+    "amazon": "amazon.",
+    "jumia": "jumia.",
+    "2b": "2b.com.eg",
+}
+
+
+def platform_for_url(url: str) -> str | None:
+    """The platform key of a product URL, from its host."""
+    host = urlsplit(url).netloc.lower()
+    for platform, fragment in PLATFORM_HOSTS.items():
+        if fragment in host:
+            return platform
+    return None
+
+
+class ProductRefresher:
+    """
+    Refreshes individual products (a watchlist) from their product pages
+    instead of re-crawling their whole categories.
+
+    Each item is a dict with a `product_url`, its `category` and optionally
+    its `platform` key (taken from the URL host otherwise). Pages are fetched
+    through the platform's pipeline (headers, retries, hedging, tracing).
+    Only the scraper module's PRODUCT_PAGE_REGIONS are located and parsed
+    (an anchored parse: the rest of the page is not even tokenized), and its
+    `extract_product_page` reads the record from them. At most `max_concurrency` pages are in
+    flight, and at most `per_platform` on one platform, so a large watchlist
+    never points the whole pool at a single site.
+
+    `load_module` returns a platform's scraper module; `pipeline_options`
+    holds extra `build_pipeline` arguments per platform (headers, image_dir).
+    """
+
+    def __init__(
+        self,
+        load_module: Callable[[str], ModuleType],
+        max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+        per_platform: int = DEFAULT_PER_PLATFORM,
+        trace: JobTrace | None = None,
+        budget: CrawlBudget | None = None,
+        pipeline_options: dict[str, dict[str, Any]] | None = None,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+    ):
+        self.load_module = load_module
+        self.max_concurrency = max(1, max_concurrency)
+        self.per_platform = max(1, per_platform)
+        self.trace = trace
+        self.budget = budget or CrawlBudget()
+        self.pipeline_options = pipeline_options or {}
+        self.max_retries = max_retries
+        self._pipelines: dict[str, ScrapePipeline] = {}
+        self._slots: dict[str, threading.BoundedSemaphore] = {}
+
+    def _pipeline(self, platform: str) -> "ScrapePipeline":
+        if platform not in self._pipelines:
+            self._pipelines[platform] = self.load_module(platform).build_pipeline(
+                max_retries=self.max_retries,
+                download_images=False,
+                trace=self.trace,
+                budget=self.budget,
+                **self.pipeline_options.get(platform, {}),
+            )
+            self._slots[platform] = threading.BoundedSemaphore(self.per_platform)
+        return self._pipelines[platform]
+
+    def refresh_one(
+        self, platform: str, item: dict[str, Any], deadline: Deadline | None = None
+    ) -> dict[str, Any] | None:
+        """Fetches and extracts one product page; None if it failed or showed no price."""
+        # Imported here so the service does not load bs4 before a job needs it.
+        from common.parsing import parse_document
+
+        url = item["product_url"]
+        category = item.get("category") or "watchlist"
+        module = self.load_module(platform)
+        pipeline = self._pipeline(platform)
+        with self._slots[platform]:
+            response = pipeline.fetch(url, category, deadline)
+        if response is None:
+            count(self.trace, "failed_pages", 1, category)
+            return None
+        try:
+            with span(self.trace, PARSE, category):
+                soup = parse_document(
+                    response.content, module.PRODUCT_PAGE_REGIONS, anchored=True
+                )
+            with span(self.trace, EXTRACT, category):
+                record = module.extract_product_page(
+                    soup,
+                    url,
+                    item.get("category"),
+                    self.pipeline_options.get(platform, {}).get(
+                        "image_dir", module.DEFAULT_IMAGE_DIR
+                    ),
+                )
+        except Exception:
+            log.exception(f"Error extracting product page {url}")
+            record = None
+        if record is None:
+            count(self.trace, "unavailable", 1, category)
+            return None
+        count(self.trace, "products", 1, category)
+        return record
+
+    def refresh(self, items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+        """
+        Refreshes `items` and returns the records of those that still show a
+        price, in input order. Items of an unknown platform are skipped; once
+        the budget's job deadline passes, items not yet started are dropped.
+        """
+        deadline = self.budget.job_deadline()
+        planned = []
+        for item in items:
+            platform = item.get("platform") or platform_for_url(item["product_url"])
+            if platform is None:
+                log.warning(f"No platform for watched product {item['product_url']}.")
+                count(self.trace, "unknown_platform", 1)
+                continue
+            planned.append((platform, item))
+        # Built up front: the workers only read the pipelines and their slots.
+        for platform in {platform for platform, _ in planned}:
+            self._pipeline(platform)
+        log.info(
+            f"Refreshing {len(planned)} product pages with up to "
+            f"{self.max_concurrency} workers ({self.per_platform} per platform)."
+        )
+
+        def refresh_planned(platform: str, item: dict[str, Any]):
+            if deadline.expired():
+                count(self.trace, "deadline_stops", 1)
+                return None
+            return self.refresh_one(platform, item, deadline)
+
+        with ThreadPoolExecutor(
+            max_workers=self.max_concurrency, thread_name_prefix="refresh"
+        ) as executor:
+            futures = [
+                executor.submit(refresh_planned, platform, item)
+                for platform, item in planned
+            ]
+            concurrent.futures.wait(futures)
+        records = []
+        for future in futures:
+            try:
+                record = future.result()
+            except Exception:
+                log.exception("Product page refresh failed")
+                continue
+            if record is not None:
+                records.append(record)
+        log.info(f"Refreshed {len(records)} of {len(planned)} watched products.")
+        return records
@@ -0,0 +1,292 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any
+
+from common.archive import normalize_price
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SEARCH_DB = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "product_search.db",
+)
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+# Matches ranked per query; deeper results are not reachable by paging.
+MAX_RESULTS = 500
+
+_RESULT_KEYS = (
+    "platform",
+    "product_url",
+    "title",
+    "brand",
+    "category",
+    "price",
+    "price_text",
+    "image_url",
+    "updated_at",
+)
+
+# The queries are static SQL: optional filters are NULL-able named parameters
+# and id/URL lists are bound as one JSON array.
+# CROSS JOIN keeps the full-text index as the outer loop. Every match is
+# scored; only the best MAX_RESULTS are returned.
+_MATCH_QUERY = """SELECT products_fts.rowid
+    FROM products_fts CROSS JOIN products p ON p.id = products_fts.rowid
+    WHERE products_fts MATCH :match
+    AND (:platform IS NULL OR p.platform = :platform COLLATE NOCASE)
+    AND (:category IS NULL OR p.category = :category COLLATE NOCASE)
+    AND (:max_price IS NULL OR p.price <= :max_price)
+    ORDER BY bm25(products_fts, 10.0, 1.0), products_fts.rowid DESC
+    LIMIT :max_results"""
+_COUNT_QUERY = """SELECT COUNT(*) FROM (
+    SELECT 1 FROM products p
+    WHERE (:platform IS NULL OR p.platform = :platform COLLATE NOCASE)
+    AND (:category IS NULL OR p.category = :category COLLATE NOCASE)
+    AND (:max_price IS NULL OR p.price <= :max_price)
+    LIMIT :max_results)"""
+_BROWSE_QUERY = """SELECT p.platform, p.product_url, p.title, p.brand, p.category,
+        p.price, p.price_text, p.image_url, p.updated_at
+    FROM products p
+    WHERE (:platform IS NULL OR p.platform = :platform COLLATE NOCASE)
+    AND (:category IS NULL OR p.category = :category COLLATE NOCASE)
+    AND (:max_price IS NULL OR p.price <= :max_price)
+    ORDER BY p.id DESC LIMIT :limit OFFSET :offset"""
+_LOOKUP_QUERY = """SELECT p.platform, p.product_url, p.title, p.brand, p.category,
+        p.price, p.price_text, p.image_url, p.updated_at
+    FROM products p WHERE p.product_url IN (SELECT value FROM json_each(?))"""
+_ROWS_QUERY = """SELECT p.id, p.platform, p.product_url, p.title, p.brand, p.category,
+        p.price, p.price_text, p.image_url, p.updated_at
+    FROM products p WHERE p.id IN (SELECT value FROM json_each(?))"""
+
+# Matches the smallest prefix index below.
+MIN_PREFIX_LENGTH = 2
+
+_TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+
+def build_match_query(text: str) -> str | None:
+    """
+    Turns free text into an FTS5 query: every word must match, the last one
+    as a prefix so results show up while typing. Words are quoted, so FTS5
+    operators and punctuation in user input are taken literally. A single
+    letter stays a whole word ("USB-C"); as a prefix it would expand to most
+    of the vocabulary.
+    """
+    tokens = _TOKEN_PATTERN.findall(text or "")
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    if len(tokens[-1]) >= MIN_PREFIX_LENGTH:
+        terms[-1] += "*"
+    return " ".join(terms)
+
+
+class ProductIndex:
+    """
+    Local full-text index of scraped listings, kept in SQLite FTS5.
+
+    `products` holds the latest state of each listing (keyed by platform and
+    URL) and `products_fts` is an external-content index over its title and
+    brand, kept in sync by triggers. A batch is upserted in one transaction;
+    a listing whose title did not change only updates its row, not the
+    full-text index.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_SEARCH_DB):
+        self.db_path = db_path
+        self._write_lock = threading.Lock()
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        if not self._initialized:
+            self._create_schema(conn)
+            self._initialized = True
+        return conn
+
+    def _create_schema(self, conn: sqlite3.Connection):
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS products (
+                id INTEGER PRIMARY KEY,
+                platform TEXT NOT NULL,
+                product_url TEXT NOT NULL,
+                title TEXT,
+                brand TEXT,
+                category TEXT,
+                price REAL,
+                price_text TEXT,
+                image_url TEXT,
+                updated_at REAL,
+                UNIQUE (platform, product_url)
+            );
+            CREATE INDEX IF NOT EXISTS idx_products_price ON products (price);
+            CREATE INDEX IF NOT EXISTS idx_products_url ON products (product_url);
+            CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+                title, brand,
+                content='products', content_rowid='id',
+                tokenize='unicode61 remove_diacritics 2',
+                prefix='2 3'
+            );
+            CREATE TRIGGER IF NOT EXISTS products_ai AFTER INSERT ON products BEGIN
+                INSERT INTO products_fts (rowid, title, brand)
+                VALUES (new.id, new.title, new.brand);
+            END;
+            CREATE TRIGGER IF NOT EXISTS products_ad AFTER DELETE ON products BEGIN
+                INSERT INTO products_fts (products_fts, rowid, title, brand)
+                VALUES ('delete', old.id, old.title, old.brand);
+            END;
+            CREATE TRIGGER IF NOT EXISTS products_au AFTER UPDATE OF title, brand ON products
+            BEGIN
+                INSERT INTO products_fts (products_fts, rowid, title, brand)
+                VALUES ('delete', old.id, old.title, old.brand);
+                INSERT INTO products_fts (rowid, title, brand)
+                VALUES (new.id, new.title, new.brand);
+            END;
+            """
+        )
+
+    def upsert(self, records: list[dict[str, Any]]) -> int:
+        """Upserts a batch of scraped records; returns how many were indexed."""
+        now = time.time()
+        rows = []
+        for record in records:
+            if not record.get("platform") or not record.get("product_url"):
+                continue
+            price_text = record.get("product_price") or record.get("price")
+            rows.append(
+                (
+                    record["platform"],
+                    record["product_url"],
+                    record.get("product_title"),
+                    record.get("brand"),
+                    record.get("category"),
+                    normalize_price(price_text),
+                    price_text,
+                    record.get("product_image_url"),
+                    now,
+                )
+            )
+        if not rows:
+            return 0
+
+        with self._write_lock:
+            conn = self._connect()
+            try:
+                with conn:
+                    # Titles and brands go through their own UPDATE that skips
+                    # unchanged rows, so the UPDATE OF trigger only rewrites the
+                    # full-text entries of listings whose text changed.
+                    conn.executemany(
+                        """INSERT INTO products (platform, product_url, title, brand,
+                            category, price, price_text, image_url, updated_at)
+                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                        ON CONFLICT (platform, product_url) DO UPDATE SET
+                            category = excluded.category,
+                            price = excluded.price,
+                            price_text = excluded.price_text,
+                            image_url = excluded.image_url,
+                            updated_at = excluded.updated_at""",
+                        rows,
+                    )
+                    conn.executemany(
+                        """UPDATE products SET title = ?, brand = ?
+                        WHERE platform = ? AND product_url = ?
+                          AND (title IS NOT ? OR brand IS NOT ?)""",
+                        [
+                            (row[2], row[3], row[0], row[1], row[2], row[3])
+                            for row in rows
+                        ],
+                    )
+            finally:
+                conn.close()
+        return len(rows)
+
+    def search(
+        self,
+        q: str | None = None,
+        platform: str | None = None,
+        category: str | None = None,
+        max_price: float | None = None,
+        limit: int = DEFAULT_PAGE_SIZE,
+        offset: int = 0,
+    ) -> dict[str, Any]:
+        """
+        Ranked, paginated search.
+
+        Listings matching `q` and the filters are ranked by BM25 (title
+        weighted over brand, newest first among equals) and the best
+        MAX_RESULTS are kept; without `q` the newest listings come first.
+        `total` counts up to MAX_RESULTS and `capped` says the search stopped
+        there, which keeps broad queries ("laptop") cheap to page through.
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        offset = max(0, offset)
+        match = build_match_query(q)
+
+        params = {
+            "platform": platform or None,
+            "category": category or None,
+            "max_price": max_price,
+            "max_results": MAX_RESULTS,
+        }
+
+        conn = self._connect()
+        try:
+            if match:
+                candidates = conn.execute(
+                    _MATCH_QUERY, {**params, "match": match}
+                ).fetchall()
+                total = len(candidates)
+                page = [rowid for (rowid,) in candidates[offset : offset + limit]]
+                rows = self._fetch_rows(conn, page)
+            else:
+                total = conn.execute(_COUNT_QUERY, params).fetchone()[0]
+                rows = conn.execute(
+                    _BROWSE_QUERY, {**params, "limit": limit, "offset": offset}
+                ).fetchall()
+        except sqlite3.OperationalError as e:
+            log.warning(f"Product search failed for {q!r}: {e}")
+            total, rows = 0, []
+        finally:
+            conn.close()
+
+        return {
+            "total": total,
+            "capped": total >= MAX_RESULTS,
+            "limit": limit,
+            "offset": offset,
+            "results": [dict(zip(_RESULT_KEYS, row)) for row in rows],
+        }
+
+    def lookup(self, urls: list[str]) -> dict[str, dict[str, Any]]:
+        """Indexed listings by product URL, for the URLs that are indexed."""
+        found: dict[str, dict[str, Any]] = {}
+        conn = self._connect()
+        try:
+            for row in conn.execute(_LOOKUP_QUERY, (json.dumps(urls),)):
+                record = dict(zip(_RESULT_KEYS, row))
+                found[record["product_url"]] = record
+        finally:
+            conn.close()
+        return found
+
+    @staticmethod
+    def _fetch_rows(conn: sqlite3.Connection, ids: list[int]) -> list[tuple]:
+        if not ids:
+            return []
+        rows = conn.execute(_ROWS_QUERY, (json.dumps(ids),)).fetchall()
+        by_id = {row[0]: row[1:] for row in rows}
+        return [by_id[rowid] for rowid in ids if rowid in by_id]
+
+
+index = ProductIndex(os.getenv("PRODUCT_SEARCH_DB", DEFAULT_SEARCH_DB))
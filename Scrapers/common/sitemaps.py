@@ -0,0 +1,371 @@
+import collections
+import datetime
+import gzip
+import io
+import json
+import logging
+import os
+import sqlite3
+import time
+from collections.abc import Callable, Iterable, Iterator
+from types import ModuleType
+from typing import Any
+
+import defusedxml.ElementTree as ElementTree
+import requests
+from defusedxml import DefusedXmlException
+
+from common.tracing import FETCH, PARSE, JobTrace, count, span
+
+log = logging.getLogger(__name__)
+
+DEFAULT_SITEMAP_DB = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "sitemaps.db",
+)
+# Product URLs are written to the store in batches of this many.
+DEFAULT_BATCH_SIZE = 1000
+DEFAULT_SITEMAP_TIMEOUT = 60
+
+SITEMAP = "sitemap"
+URL = "url"
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def normalize_lastmod(value: str | None) -> str | None:
+    """A W3C datetime (or date) as a comparable UTC ISO string; None if unparsable."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value.strip())
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.UTC)
+    return parsed.astimezone(datetime.UTC).isoformat(timespec="seconds")
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def iter_sitemap(stream) -> Iterator[dict[str, Any]]:
+    """
+    Stream-parses a sitemap or sitemap index from a binary file object,
+    gzipped or not, yielding one entry per <sitemap> or <url>: its `kind`,
+    `loc`, normalized `lastmod` and whether it lists an image.
+
+    Each entry's element is dropped from the tree once read, so memory stays
+    flat however many entries the file holds. Sitemaps are remote input:
+    defusedxml rejects entity declarations and external references.
+    """
+    buffered = io.BufferedReader(stream) if not hasattr(stream, "peek") else stream
+    if buffered.peek(2)[:2] == GZIP_MAGIC:
+        buffered = gzip.GzipFile(fileobj=buffered)
+    root = None
+    for event, element in ElementTree.iterparse(buffered, events=("start", "end")):
+        if root is None:
+            root = element
+            continue
+        if event != "end":
+            continue
+        kind = _local_name(element.tag)
+        if kind not in (SITEMAP, URL):
+            continue
+        loc = lastmod = None
+        has_image = False
+        for child in element:
+            name = _local_name(child.tag)
+            if name == "loc":
+                loc = (child.text or "").strip()
+            elif name == "lastmod":
+                lastmod = normalize_lastmod(child.text)
+            elif name == "image":
+                has_image = True
+        if loc:
+            yield {"kind": kind, "loc": loc, "lastmod": lastmod, "has_image": has_image}
+        # Read entries are no longer needed: clear them off the root.
+        root.clear()
+
+
+class SitemapStore:
+    """
+    What the sitemaps said about every product URL: its latest `lastmod`,
+    and the `lastmod` it had when the product was last fetched. A URL is due
+    when it was never fetched, or its sitemap `lastmod` moved past the
+    fetched one. Child sitemaps keep their own `lastmod`, so an unchanged
+    one is not even downloaded again.
+    """
+
+    def __init__(self, db_path: str = DEFAULT_SITEMAP_DB):
+        self.db_path = db_path
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS sitemap_urls (
+                url TEXT PRIMARY KEY,
+                platform TEXT NOT NULL,
+                lastmod TEXT,
+                seen_at REAL NOT NULL,
+                fetched_lastmod TEXT,
+                fetched_at REAL
+            )"""
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_sitemap_urls_platform ON sitemap_urls (platform, fetched_at)"
+        )
+        conn.execute(
+            """CREATE TABLE IF NOT EXISTS sitemaps (
+                loc TEXT PRIMARY KEY,
+                platform TEXT NOT NULL,
+                lastmod TEXT,
+                read_at REAL NOT NULL
+            )"""
+        )
+        return conn
+
+    def sitemap_unchanged(self, loc: str, lastmod: str | None) -> bool:
+        """Whether a child sitemap was fully read at this `lastmod` before."""
+        if lastmod is None:
+            return False
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT lastmod FROM sitemaps WHERE loc = ?", (loc,)
+            ).fetchone()
+        finally:
+            conn.close()
+        return row is not None and row["lastmod"] == lastmod
+
+    def mark_sitemap_read(self, platform: str, loc: str, lastmod: str | None):
+        conn = self._connect()
+        try:
+            with conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO sitemaps VALUES (?, ?, ?, ?)",
+                    (loc, platform, lastmod, time.time()),
+                )
+        finally:
+            conn.close()
+
+    def record(self, platform: str, entries: list[dict[str, Any]]) -> tuple[int, int]:
+        """Upserts a batch of product URLs; returns how many were new and modified."""
+        if not entries:
+            return 0, 0
+        now = time.time()
+        conn = self._connect()
+        try:
+            urls = [entry["loc"] for entry in entries]
+            rows = conn.execute(
+                """SELECT url, lastmod FROM sitemap_urls
+                WHERE url IN (SELECT value FROM json_each(?))""",
+                (json.dumps(urls),),
+            ).fetchall()
+            known = {row["url"]: row["lastmod"] for row in rows}
+            new = sum(1 for url in urls if url not in known)
+            modified = sum(
+                1
+                for entry in entries
+                if entry["loc"] in known
+                and entry["lastmod"] is not None
+                and entry["lastmod"] != known[entry["loc"]]
+            )
+            with conn:
+                conn.executemany(
+                    """INSERT INTO sitemap_urls (url, platform, lastmod, seen_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT(url) DO UPDATE SET
+                        lastmod = COALESCE(excluded.lastmod, lastmod),
+                        seen_at = excluded.seen_at""",
+                    [
+                        (entry["loc"], platform, entry["lastmod"], now)
+                        for entry in entries
+                    ],
+                )
+        finally:
+            conn.close()
+        return new, modified
+
+    def due(self, platform: str, limit: int | None = None) -> list[str]:
+        """Product URLs to fetch: never fetched or modified since, most recently changed first."""
+        query = """SELECT url FROM sitemap_urls
+            WHERE platform = ? AND (
+                fetched_at IS NULL
+                OR (lastmod IS NOT NULL AND (fetched_lastmod IS NULL OR lastmod > fetched_lastmod))
+            )
+            ORDER BY lastmod IS NULL, lastmod DESC"""
+        params: list[Any] = [platform]
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        conn = self._connect()
+        try:
+            rows = conn.execute(query, params).fetchall()
+        finally:
+            conn.close()
+        return [row["url"] for row in rows]
+
+    def mark_fetched(self, urls: Iterable[str]) -> int:
+        """
+        Records product URLs as fetched at their current `lastmod`. URLs the
+        sitemaps never listed are ignored, so any crawl mode can report here.
+        """
+        conn = self._connect()
+        try:
+            with conn:
+                return conn.execute(
+                    """UPDATE sitemap_urls SET fetched_lastmod = lastmod, fetched_at = ?
+                    WHERE url IN (SELECT value FROM json_each(?))""",
+                    (time.time(), json.dumps(list(urls))),
+                ).rowcount
+        finally:
+            conn.close()
+
+    def stats(self, platform: str | None = None) -> dict[str, int]:
+        query = """SELECT COUNT(*) AS urls,
+                SUM(fetched_at IS NULL) AS never_fetched,
+                SUM(fetched_at IS NOT NULL AND lastmod > fetched_lastmod) AS modified
+            FROM sitemap_urls"""
+        params: list[Any] = []
+        if platform:
+            query += " WHERE platform = ?"
+            params.append(platform)
+        conn = self._connect()
+        try:
+            row = conn.execute(query, params).fetchone()
+        finally:
+            conn.close()
+        return {key: row[key] or 0 for key in ("urls", "never_fetched", "modified")}
+
+
+class SitemapCrawler:
+    """
+    Syncs a platform's sitemaps into the store.
+
+    The scraper module supplies `SITEMAP_INDEX_URL` and `is_product_entry`,
+    which tells product URLs from category and content pages. The index and
+    its children are streamed straight from the response into `iter_sitemap`
+    (decompressing .gz files on the fly), and product URLs are written in
+    batches of `batch_size`, so a multi-hundred-MB sitemap is never held in
+    memory. Children whose `lastmod` matches the last full read are skipped.
+    Fetching the due products is left to the caller (see ProductRefresher).
+    """
+
+    def __init__(
+        self,
+        load_module: Callable[[str], ModuleType],
+        store: SitemapStore | None = None,
+        trace: JobTrace | None = None,
+        headers: dict[str, dict[str, str]] | None = None,
+        index_urls: dict[str, str] | None = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        req_timeout: float = DEFAULT_SITEMAP_TIMEOUT,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+    ):
+        self.load_module = load_module
+        self.store = store or SitemapStore()
+        self.trace = trace
+        self.headers = headers or {}
+        self.index_urls = index_urls or {}
+        self.batch_size = max(1, batch_size)
+        self.req_timeout = req_timeout
+        self.max_retries = max(1, max_retries)
+        self.retry_delay = retry_delay
+
+    def _open(self, url: str, platform: str) -> requests.Response | None:
+        for attempt in range(self.max_retries):
+            try:
+                with span(self.trace, FETCH, SITEMAP):
+                    response = requests.get(
+                        url,
+                        headers=self.headers.get(platform),
+                        timeout=self.req_timeout,
+                        stream=True,
+                    )
+                    response.raise_for_status()
+                # Undo any Content-Encoding; a .gz file itself is unzipped by iter_sitemap.
+                response.raw.decode_content = True
+                # Buffered readers keep reading past EOF; the body must not close under them.
+                response.raw.auto_close = False
+                return response
+            except requests.exceptions.RequestException as e:
+                log.warning(
+                    f"Failed to fetch sitemap {url} (Attempt {attempt + 1}/{self.max_retries}): {e}"
+                )
+                time.sleep(self.retry_delay * (attempt + 1))
+        log.error(f"Max retries reached for sitemap {url}. Skipping it.")
+        return None
+
+    def sync(self, platform: str) -> dict[str, int]:
+        """Reads the platform's changed sitemaps; returns what was found."""
+        module = self.load_module(platform)
+        index_url = self.index_urls.get(platform, module.SITEMAP_INDEX_URL)
+        stats = collections.Counter()
+        pending = collections.deque([(index_url, None)])
+        visited = set()
+        batch: list[dict[str, Any]] = []
+
+        def flush():
+            new, modified = self.store.record(platform, batch)
+            stats["new"] += new
+            stats["modified"] += modified
+            batch.clear()
+
+        while pending:
+            loc, lastmod = pending.popleft()
+            if loc in visited:
+                continue
+            visited.add(loc)
+            response = self._open(loc, platform)
+            if response is None:
+                stats["sitemaps_failed"] += 1
+                count(self.trace, "failed_pages", 1, SITEMAP)
+                continue
+            try:
+                with span(self.trace, PARSE, SITEMAP):
+                    for entry in iter_sitemap(response.raw):
+                        if entry["kind"] == SITEMAP:
+                            if self.store.sitemap_unchanged(
+                                entry["loc"], entry["lastmod"]
+                            ):
+                                stats["sitemaps_unchanged"] += 1
+                            else:
+                                pending.append((entry["loc"], entry["lastmod"]))
+                        elif module.is_product_entry(entry["loc"], entry["has_image"]):
+                            stats["product_urls"] += 1
+                            batch.append(entry)
+                            if len(batch) >= self.batch_size:
+                                flush()
+                        else:
+                            stats["other_urls"] += 1
+                    flush()
+            except (
+                ElementTree.ParseError,
+                DefusedXmlException,
+                OSError,
+                EOFError,
+            ) as e:
+                # URLs read before the error are kept; the sitemap is read again next time.
+                log.error(f"Could not parse sitemap {loc}: {e}")
+                flush()
+                stats["sitemaps_failed"] += 1
+                continue
+            finally:
+                response.close()
+            stats["sitemaps_read"] += 1
+            if loc != index_url:
+                self.store.mark_sitemap_read(platform, loc, lastmod)
+
+        for key, value in stats.items():
+            count(self.trace, key, value, SITEMAP)
+        log.info(
+            f"{platform} sitemaps: {stats['sitemaps_read']} read, "
+            f"{stats['sitemaps_unchanged']} unchanged, {stats['product_urls']} product URLs "
+            f"({stats['new']} new, {stats['modified']} modified)."
+        )
+        return dict(stats)
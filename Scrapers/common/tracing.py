@@ -0,0 +1,160 @@
+import logging
+import threading
+import time
+from collections.abc import Callable
+from contextlib import contextmanager, nullcontext
+from typing import Any
+
+from common.events import JobEvents
+
+log = logging.getLogger(__name__)
+
+# Stage names shared by all scrapers so breakdowns are comparable across platforms.
+PLUGIN_LOAD = "plugin_load"
+FETCH = "fetch"
+PARSE = "parse"
+EXTRACT = "extract"
+PRICE_CHECK = "price_check"
+BRAND_TAG = "brand_tag"
+ARCHIVE = "archive"
+PRICE_DROPS = "price_drops"
+SEARCH_INDEX = "search_index"
+IMAGE_DOWNLOAD = "image_download"
+INGEST = "ingest"
+
+
+class JobTrace:
+    """
+    Collects timing spans for one scrape job.
+
+    Spans are aggregated on the fly (count, total and max per stage, overall and
+    per category), so a trace stays small however many pages a job fetches.
+    Safe to record into from the image download worker threads. Progress
+    events go to the job's `events` log, when it has one.
+    """
+
+    def __init__(self, job_name: str, events: JobEvents | None = None):
+        self.job_name = job_name
+        self.events = events
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self._end: float | None = None
+        self._lock = threading.Lock()
+        self._stages: dict[str, dict[str, float]] = {}
+        self._categories: dict[str, dict[str, dict[str, float]]] = {}
+        self._counters: dict[str, int] = {}
+        self._category_counters: dict[str, dict[str, int]] = {}
+
+    @contextmanager
+    def span(self, stage: str, category: str | None = None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start, category)
+
+    def record(self, stage: str, seconds: float, category: str | None = None):
+        with self._lock:
+            _accumulate(self._stages, stage, seconds)
+            if category is not None:
+                _accumulate(self._categories.setdefault(category, {}), stage, seconds)
+
+    def add_count(self, name: str, amount: int, category: str | None = None):
+        """Adds to a named counter (e.g. products found) alongside the timings."""
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + amount
+            if category is not None:
+                counters = self._category_counters.setdefault(category, {})
+                counters[name] = counters.get(name, 0) + amount
+
+    def finish(self):
+        if self._end is None:
+            self._end = time.perf_counter()
+
+    def breakdown(self) -> dict[str, Any]:
+        """Returns the per-stage and per-category timing summary of the job."""
+        end = self._end if self._end is not None else time.perf_counter()
+        with self._lock:
+            return {
+                "job": self.job_name,
+                "started_at": self.started_at,
+                "wall_seconds": round(end - self._start, 3),
+                "stages": _summarize(self._stages),
+                "categories": {
+                    category: _summarize(stages)
+                    for category, stages in self._categories.items()
+                },
+                "counters": dict(self._counters),
+                "category_counters": {
+                    category: dict(counters)
+                    for category, counters in self._category_counters.items()
+                },
+            }
+
+    def log_summary(self):
+        summary = self.breakdown()
+        parts = ", ".join(
+            f"{stage} {stats['total_seconds']:.2f}s/{stats['count']}"
+            for stage, stats in summary["stages"].items()
+        )
+        log.info(
+            f"{self.job_name} timing breakdown ({summary['wall_seconds']:.2f}s wall): {parts}"
+        )
+
+
+def _accumulate(stages: dict[str, dict[str, float]], stage: str, seconds: float):
+    stats = stages.get(stage)
+    if stats is None:
+        stages[stage] = {"count": 1, "total": seconds, "max": seconds}
+    else:
+        stats["count"] += 1
+        stats["total"] += seconds
+        if seconds > stats["max"]:
+            stats["max"] = seconds
+
+
+def _summarize(stages: dict[str, dict[str, float]]) -> dict[str, dict[str, Any]]:
+    return {
+        stage: {
+            "count": int(stats["count"]),
+            "total_seconds": round(stats["total"], 3),
+            "mean_ms": round(stats["total"] * 1000 / stats["count"], 2),
+            "max_ms": round(stats["max"] * 1000, 2),
+        }
+        for stage, stats in stages.items()
+    }
+
+
+def span(trace: JobTrace | None, stage: str, category: str | None = None):
+    """`trace.span(...)`, or a no-op context when the caller is not tracing."""
+    if trace is None:
+        return nullcontext()
+    return trace.span(stage, category)
+
+
+def count(trace: JobTrace | None, name: str, amount: int, category: str | None = None):
+    if trace is not None:
+        trace.add_count(name, amount, category)
+
+
+def streaming(trace: JobTrace | None) -> bool:
+    return trace is not None and trace.events is not None
+
+
+def emit(trace: JobTrace | None, event_type: str, **fields):
+    """Publishes a progress event to the job's event log, if it is streaming one."""
+    if streaming(trace):
+        trace.events.publish(event_type, **fields)
+
+
+def traced(
+    trace: JobTrace | None,
+    stage: str,
+    category: str | None,
+    func: Callable,
+    *args,
+    **kwargs,
+):
+    """Calls `func` inside a span; used for work submitted to executor threads."""
+    with span(trace, stage, category):
+        return func(*args, **kwargs)
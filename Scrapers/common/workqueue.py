@@ -0,0 +1,403 @@
+import json
+import logging
+import math
+import os
+import sqlite3
+import time
+import uuid
+from typing import Any
+
+log = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_DB = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "data",
+    "work_queue.db",
+)
+DEFAULT_LEASE_SECONDS = 120
+DEFAULT_PAGES_PER_SHARD = 5
+MAX_ATTEMPTS = 3
+
+QUEUED = "queued"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+SKIPPED = "skipped"
+
+
+class WorkQueue:
+    """
+    SQLite-backed queue of crawl shards shared by the coordinator and workers.
+
+    A shard is one page range of one category. Workers claim shards under a
+    lease and extend it while they work; a shard whose lease expires (the
+    worker died or hung) is handed to the next worker that asks, up to
+    `max_attempts` times. Results are appended per page as they are scraped
+    and drained by the coordinator, so nothing waits for a whole run.
+
+    Every process opens its own connections; WAL mode lets readers proceed
+    while one writer holds the lock. Any host that can open the database file
+    can run a worker.
+    """
+
+    def __init__(
+        self,
+        db_path: str = DEFAULT_QUEUE_DB,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_attempts: int = MAX_ATTEMPTS,
+    ):
+        self.db_path = db_path
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._initialized = False
+
+    def _connect(self) -> sqlite3.Connection:
+        os.makedirs(os.path.dirname(os.path.abspath(self.db_path)), exist_ok=True)
+        conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        if not self._initialized:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(
+                """CREATE TABLE IF NOT EXISTS runs (
+                    run_id TEXT PRIMARY KEY,
+                    platform TEXT,
+                    pages_per_shard INTEGER,
+                    created_at REAL
+                );
+                CREATE TABLE IF NOT EXISTS shards (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_id TEXT,
+                    platform TEXT,
+                    category TEXT,
+                    url_template TEXT,
+                    first_page INTEGER,
+                    last_page INTEGER,
+                    open_ended INTEGER,
+                    status TEXT,
+                    worker TEXT,
+                    lease_expires REAL,
+                    attempts INTEGER DEFAULT 0,
+                    pages INTEGER,
+                    products INTEGER,
+                    seconds REAL,
+                    error TEXT,
+                    finished_at REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_shards_status ON shards (status, lease_expires);
+                CREATE INDEX IF NOT EXISTS idx_shards_run ON shards (run_id, status);
+                CREATE TABLE IF NOT EXISTS results (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    run_id TEXT,
+                    shard_id INTEGER,
+                    records TEXT
+                );
+                CREATE INDEX IF NOT EXISTS idx_results_run ON results (run_id, id);"""
+            )
+            self._initialized = True
+        return conn
+
+    def publish_run(
+        self,
+        platform: str,
+        shards: list[dict[str, Any]],
+        pages_per_shard: int = DEFAULT_PAGES_PER_SHARD,
+    ) -> str:
+        """Queues the shards of a new run and returns its id."""
+        run_id = uuid.uuid4().hex
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.execute(
+                "INSERT INTO runs VALUES (?, ?, ?, ?)",
+                (run_id, platform, pages_per_shard, time.time()),
+            )
+            conn.executemany(
+                """INSERT INTO shards (run_id, platform, category, url_template,
+                                       first_page, last_page, open_ended, status)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?)""",
+                [
+                    (
+                        run_id,
+                        platform,
+                        shard["category"],
+                        shard["url_template"],
+                        shard["first_page"],
+                        shard["last_page"],
+                        int(shard["open_ended"]),
+                        QUEUED,
+                    )
+                    for shard in shards
+                ],
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        log.info(f"Published {platform} run {run_id} with {len(shards)} shards.")
+        return run_id
+
+    def claim(self, worker_id: str) -> dict[str, Any] | None:
+        """Leases the oldest available shard, re-queueing an expired lease if needed."""
+        conn = self._connect()
+        try:
+            while True:
+                now = time.time()
+                conn.execute("BEGIN IMMEDIATE")
+                row = conn.execute(
+                    """SELECT * FROM shards
+                       WHERE status = ? OR (status = ? AND lease_expires < ?)
+                       ORDER BY id LIMIT 1""",
+                    (QUEUED, LEASED, now),
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+
+                if row["status"] == LEASED:
+                    log.warning(
+                        f"Lease of shard {row['id']} held by {row['worker']} expired; re-queueing."
+                    )
+                if row["attempts"] >= self.max_attempts:
+                    conn.execute(
+                        "UPDATE shards SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                        (FAILED, "lease expired too many times", now, row["id"]),
+                    )
+                    conn.execute("COMMIT")
+                    continue
+
+                conn.execute(
+                    """UPDATE shards SET status = ?, worker = ?, lease_expires = ?,
+                                         attempts = attempts + 1
+                       WHERE id = ?""",
+                    (LEASED, worker_id, now + self.lease_seconds, row["id"]),
+                )
+                # Undrained results of an abandoned attempt would be duplicated.
+                conn.execute("DELETE FROM results WHERE shard_id = ?", (row["id"],))
+                conn.execute("COMMIT")
+                shard = dict(row)
+                shard["attempts"] += 1
+                return shard
+        finally:
+            conn.close()
+
+    def _owned(self, conn: sqlite3.Connection, shard_id: int, worker_id: str) -> bool:
+        row = conn.execute(
+            "SELECT status, worker FROM shards WHERE id = ?", (shard_id,)
+        ).fetchone()
+        return (
+            row is not None and row["status"] == LEASED and row["worker"] == worker_id
+        )
+
+    def add_results(
+        self, shard_id: int, worker_id: str, records: list[dict[str, Any]]
+    ) -> bool:
+        """
+        Appends a batch of scraped records and extends the lease.
+
+        Returns False when the worker no longer holds the shard; it should stop.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if not self._owned(conn, shard_id, worker_id):
+                conn.execute("ROLLBACK")
+                return False
+            conn.execute(
+                "UPDATE shards SET lease_expires = ? WHERE id = ?",
+                (time.time() + self.lease_seconds, shard_id),
+            )
+            conn.execute(
+                """INSERT INTO results (run_id, shard_id, records)
+                   SELECT run_id, id, ? FROM shards WHERE id = ?""",
+                (json.dumps(records), shard_id),
+            )
+            conn.execute("COMMIT")
+            return True
+        finally:
+            conn.close()
+
+    def renew(self, shard_id: int, worker_id: str) -> bool:
+        """
+        Extends the lease of a shard the worker holds (a heartbeat).
+
+        Returns False when the worker no longer holds the shard; it should stop.
+        """
+        conn = self._connect()
+        try:
+            cursor = conn.execute(
+                """UPDATE shards SET lease_expires = ?
+                   WHERE id = ? AND status = ? AND worker = ?""",
+                (time.time() + self.lease_seconds, shard_id, LEASED, worker_id),
+            )
+            return cursor.rowcount == 1
+        finally:
+            conn.close()
+
+    def complete(
+        self,
+        shard_id: int,
+        worker_id: str,
+        has_more: bool,
+        pages: int,
+        products: int,
+        seconds: float,
+    ) -> bool:
+        """
+        Marks a shard done.
+
+        If the listing continues past an open-ended shard, the next page range
+        is queued; if it ended early, later queued shards of the category are
+        skipped instead of fetching past-the-end pages.
+        """
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if not self._owned(conn, shard_id, worker_id):
+                conn.execute("ROLLBACK")
+                log.warning(f"{worker_id} no longer holds shard {shard_id}.")
+                return False
+            shard = conn.execute(
+                """SELECT shards.*, runs.pages_per_shard FROM shards
+                   JOIN runs ON runs.run_id = shards.run_id WHERE id = ?""",
+                (shard_id,),
+            ).fetchone()
+            now = time.time()
+            conn.execute(
+                """UPDATE shards SET status = ?, pages = ?, products = ?, seconds = ?,
+                                     finished_at = ?
+                   WHERE id = ?""",
+                (DONE, pages, products, seconds, now, shard_id),
+            )
+            if has_more and shard["open_ended"]:
+                conn.execute(
+                    """INSERT INTO shards (run_id, platform, category, url_template,
+                                           first_page, last_page, open_ended, status)
+                       VALUES (?, ?, ?, ?, ?, ?, 1, ?)""",
+                    (
+                        shard["run_id"],
+                        shard["platform"],
+                        shard["category"],
+                        shard["url_template"],
+                        shard["last_page"] + 1,
+                        shard["last_page"] + shard["pages_per_shard"],
+                        QUEUED,
+                    ),
+                )
+            elif not has_more:
+                conn.execute(
+                    """UPDATE shards SET status = ?, finished_at = ?
+                       WHERE run_id = ? AND category = ? AND status = ? AND first_page > ?""",
+                    (
+                        SKIPPED,
+                        now,
+                        shard["run_id"],
+                        shard["category"],
+                        QUEUED,
+                        shard["last_page"],
+                    ),
+                )
+            conn.execute("COMMIT")
+            return True
+        finally:
+            conn.close()
+
+    def fail(self, shard_id: int, worker_id: str, error: str):
+        """Gives a shard back: re-queued while attempts remain, failed otherwise."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if self._owned(conn, shard_id, worker_id):
+                conn.execute(
+                    """UPDATE shards
+                       SET status = CASE WHEN attempts >= ? THEN ? ELSE ? END,
+                           worker = NULL, error = ?, finished_at = ?
+                       WHERE id = ?""",
+                    (self.max_attempts, FAILED, QUEUED, error, time.time(), shard_id),
+                )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def drain_results(
+        self, run_id: str, limit: int = 500
+    ) -> tuple[list[dict[str, Any]], int]:
+        """Removes and returns up to `limit` result batches of a run, flattened."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute(
+                "SELECT id, records FROM results WHERE run_id = ? ORDER BY id LIMIT ?",
+                (run_id, limit),
+            ).fetchall()
+            if rows:
+                conn.execute(
+                    "DELETE FROM results WHERE run_id = ? AND id <= ?",
+                    (run_id, rows[-1]["id"]),
+                )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        records = [record for row in rows for record in json.loads(row["records"])]
+        return records, len(rows)
+
+    def run_status(self, run_id: str) -> dict[str, Any] | None:
+        conn = self._connect()
+        try:
+            run = conn.execute(
+                "SELECT * FROM runs WHERE run_id = ?", (run_id,)
+            ).fetchone()
+            if run is None:
+                return None
+            counts = {
+                row["status"]: row["shards"]
+                for row in conn.execute(
+                    """SELECT status, COUNT(*) AS shards FROM shards
+                       WHERE run_id = ? GROUP BY status""",
+                    (run_id,),
+                )
+            }
+            totals = conn.execute(
+                """SELECT COALESCE(SUM(pages), 0), COALESCE(SUM(products), 0),
+                          COUNT(DISTINCT worker)
+                   FROM shards WHERE run_id = ?""",
+                (run_id,),
+            ).fetchone()
+        finally:
+            conn.close()
+        return {
+            "run_id": run_id,
+            "platform": run["platform"],
+            "created_at": run["created_at"],
+            "shards": counts,
+            "finished": not counts.get(QUEUED) and not counts.get(LEASED),
+            "pages": totals[0],
+            "products": totals[1],
+            "workers": totals[2],
+        }
+
+
+def build_shards(
+    plan: dict[str, Any], pages_per_shard: int = DEFAULT_PAGES_PER_SHARD
+) -> list[dict[str, Any]]:
+    """
+    Splits a crawl plan into page-range shards.
+
+    Categories with history get enough shards to cover their estimated pages;
+    the last shard of every category is open-ended, so a listing that grew (or
+    one never crawled before) is followed up with further shards as needed.
+    """
+    shards = []
+    for category in plan["categories"]:
+        estimate = plan["estimates"].get(category["id"])
+        pages = math.ceil(estimate["pages"]) if estimate else pages_per_shard
+        count = max(1, math.ceil(pages / pages_per_shard))
+        for index in range(count):
+            shards.append(
+                {
+                    "category": category["id"],
+                    "url_template": category["url_template"],
+                    "first_page": index * pages_per_shard + 1,
+                    "last_page": (index + 1) * pages_per_shard,
+                    "open_ended": index == count - 1,
+                }
+            )
+    return shards
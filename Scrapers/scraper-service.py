@@ -1,85 +1,228 @@
+import time
+
+SERVICE_IMPORT_STARTED = time.perf_counter()
+
+import asyncio
 import logging
-from fastapi import FastAPI
 import os
-import time
+import threading
+from contextlib import asynccontextmanager
+
 import requests
-import json
 import urllib3
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import FileResponse, StreamingResponse
+from pydantic import BaseModel, Field
 
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-from twoB.twoB_scraper import scrape_2b_categories
-from jumia import jumia_scraper
-from amazon import amazon_scraper
-from concurrent.futures import ThreadPoolExecutor
-from typing import Dict
+from collections.abc import Callable
+from functools import cache
+from types import ModuleType
+from typing import Any
 
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+from common import events as job_events
+from common.anomalies import anomaly_filter as price_anomaly_filter
+from common.archive import DEFAULT_STATS_DAYS
+from common.archive import archive as price_archive
+from common.brands import get_brand_tagger
+from common.categories import registry as category_registry
+from common.deadlines import CrawlBudget
+from common.discovery import (
+    DEFAULT_REQUEST_INTERVAL,
+    DEFAULT_TREE_DB,
+    DEFAULT_TTL_HOURS,
+    CategoryDiscovery,
+    CategoryTreeCache,
+)
+from common.events import JobEvents, format_sse
+from common.identity import ProductDeduplicator
+from common.imagemanifest import manifest as image_manifest
+from common.jobs import (
+    DEFAULT_DRAIN_SECONDS,
+    DEFAULT_JOBS_DB,
+    DEFAULT_MAX_CONCURRENT_JOBS,
+    JobRunner,
+    JobStore,
+)
+from common.logs import configure_logging
+from common.planner import DEFAULT_HISTORY_DB, CrawlHistory, plan_crawl
+from common.plugins import PluginRegistry
+from common.pricedrops import detector as price_drop_detector
+from common.profiling import PROFILERS, run_profiled
+from common.rawarchive import DEFAULT_RAW_ARCHIVE_DIR, RawPageWriter, list_runs
+from common.refresh import (
+    DEFAULT_MAX_CONCURRENCY,
+    DEFAULT_PER_PLATFORM,
+    ProductRefresher,
+)
+from common.search import DEFAULT_PAGE_SIZE
+from common.search import index as product_index
+from common.sitemaps import DEFAULT_SITEMAP_DB, SitemapCrawler, SitemapStore
+from common.tracing import (
+    ARCHIVE,
+    BRAND_TAG,
+    INGEST,
+    PLUGIN_LOAD,
+    PRICE_CHECK,
+    PRICE_DROPS,
+    SEARCH_INDEX,
+    JobTrace,
+    emit,
+)
+from common.workqueue import (
+    DEFAULT_PAGES_PER_SHARD,
+    DEFAULT_QUEUE_DB,
+    WorkQueue,
+    build_shards,
 )
-app = FastAPI()
+
+configure_logging()
 
 ASP_NET_INGEST_URL = os.getenv(
     "ASPNET_INGEST_URL", "http://localhost:5000/api/DataIngestion/ingest"
 )
 
-twoB_CATEGORY_URLS: Dict[str, Dict[str, str]] = {
-    "laptops": {
-        "url_template": "https://2b.com.eg/en/computers/laptops.html?p={}&product_list_limit=48"
-    },
-    "tvs": {
-        "url_template": "https://2b.com.eg/en/televisions/tvs.html?p={}&product_list_limit=48"
-    },
-    "phones": {
-        "url_template": "https://2b.com.eg/en/mobile-and-tablet/mobiles.html?p={}&product_list_limit=48"
-    },
-    # "storage": {
-    #     "url_template": "https://2b.com.eg/en/computers/storage.html?p={}&product_list_limit=48"
-    # },
-}
-
-
-PRESENTATION_CATEGORIES: Dict[str, Dict[str, str]] = {
-    "phones": {
-        "url_template": "https://2b.com.eg/en/mobile-and-tablet/mobiles.html?p={}&product_list_limit=48"
-    },
-    "tvs": {
-        "url_template": "https://2b.com.eg/en/televisions/tvs.html?p={}&product_list_limit=48"
-    },
-    "laptops": {
-        "url_template": "https://2b.com.eg/en/computers/laptops.html?p={}&product_list_limit=48"
-    },
-}
-
-scraper_statuses = {"amazon": "idle", "2b": "idle", "jumia": "idle"}
-active_scrapes = {"amazon": False, "2b": False, "jumia": False}
-
-
-executor = ThreadPoolExecutor(max_workers=3)
+job_timings: dict[str, dict[str, Any]] = {}
+profile_artifacts: dict[str, str] = {}
+
+PROFILE_DIR = os.path.join(os.path.dirname(__file__), "profiles")
+crawl_history = CrawlHistory(os.getenv("CRAWL_HISTORY_DB", DEFAULT_HISTORY_DB))
+
+# Time budgets (seconds) for single-process jobs; unset means no limit. When a
+# budget runs out the job stops paging and ingests what it already has.
+JOB_DEADLINE_SECONDS = os.getenv("JOB_DEADLINE_SECONDS")
+CATEGORY_DEADLINE_SECONDS = os.getenv("CATEGORY_DEADLINE_SECONDS")
+HEDGE_REQUESTS = os.getenv("HEDGE_REQUESTS", "false").lower() == "true"
+# Memory-bounded mode: caps the process RSS during a job (MB). MEMORY_TRACEMALLOC
+# adds the traced Python heap to the job's memory report, at a parsing cost.
+MEMORY_LIMIT_MB = os.getenv("MEMORY_LIMIT_MB")
+MEMORY_TRACEMALLOC = os.getenv("MEMORY_TRACEMALLOC", "false").lower() == "true"
+
+# Raw listing pages are kept for offline re-extraction only when enabled.
+RAW_HTML_ARCHIVE = os.getenv("RAW_HTML_ARCHIVE", "false").lower() == "true"
+RAW_HTML_DIR = os.getenv("RAW_HTML_DIR", DEFAULT_RAW_ARCHIVE_DIR)
+
+# Distributed mode: runs are split into shards on a queue served by scraper-worker.py.
+work_queue = WorkQueue(os.getenv("WORK_QUEUE_DB", DEFAULT_QUEUE_DB))
+PAGES_PER_SHARD = int(os.getenv("PAGES_PER_SHARD", DEFAULT_PAGES_PER_SHARD))
+RESULT_POLL_SECONDS = 2
+distributed_runs: dict[str, str] = {}
+
+# Watchlist refresh: watched products are re-read from their product pages.
+# With WATCHLIST_REFRESH_SECONDS set, the last submitted watchlist is
+# refreshed again at that interval.
+WATCHLIST_CONCURRENCY = int(os.getenv("WATCHLIST_CONCURRENCY", DEFAULT_MAX_CONCURRENCY))
+WATCHLIST_PER_PLATFORM = int(os.getenv("WATCHLIST_PER_PLATFORM", DEFAULT_PER_PLATFORM))
+WATCHLIST_REFRESH_SECONDS = os.getenv("WATCHLIST_REFRESH_SECONDS")
+WATCHLIST_PRIORITY = 10
+watchlist: list[dict[str, Any]] = []
+
+# Sitemap crawls: a platform's sitemaps are synced into SITEMAP_DB and only
+# new or modified product URLs are fetched, at most SITEMAP_MAX_PRODUCTS per
+# job (the rest stay due for the next one).
+sitemap_store = SitemapStore(os.getenv("SITEMAP_DB", DEFAULT_SITEMAP_DB))
+SITEMAP_MAX_PRODUCTS = int(os.getenv("SITEMAP_MAX_PRODUCTS", 5000))
+
+
+# Jobs run on the service's event loop; triggers beyond MAX_CONCURRENT_JOBS
+# queue. On shutdown running jobs get JOB_DRAIN_SECONDS to wrap up.
+job_runner = JobRunner(
+    ["amazon", "2b", "jumia", "watchlist", "sitemap"],
+    JobStore(os.getenv("JOBS_DB", DEFAULT_JOBS_DB)),
+    int(os.getenv("MAX_CONCURRENT_JOBS", DEFAULT_MAX_CONCURRENT_JOBS)),
+)
+JOB_DRAIN_SECONDS = float(os.getenv("JOB_DRAIN_SECONDS", DEFAULT_DRAIN_SECONDS))
+scraper_statuses = job_runner.statuses
+running_budgets: set[CrawlBudget] = set()
+shutdown_requested = threading.Event()
+
+
+def stop_running_jobs():
+    """Ends running jobs early: crawls stop paging and ingest what they have."""
+    shutdown_requested.set()
+    for budget in list(running_budgets):
+        budget.cancel()
+
+
+job_runner.on_drain(stop_running_jobs)
+
+
+async def refresh_watchlist_periodically(interval: float):
+    while True:
+        await asyncio.sleep(interval)
+        if watchlist and not job_runner.is_active("watchlist"):
+            job_runner.submit(
+                "watchlist",
+                "Watchlist",
+                run_watchlist_refresh_job,
+                list(watchlist),
+                priority=WATCHLIST_PRIORITY,
+                request={"products": len(watchlist), "scheduled": True},
+            )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    job_runner.start()
+    scheduler = None
+    if WATCHLIST_REFRESH_SECONDS:
+        scheduler = asyncio.create_task(
+            refresh_watchlist_periodically(float(WATCHLIST_REFRESH_SECONDS))
+        )
+    yield
+    if scheduler is not None:
+        scheduler.cancel()
+    await job_runner.shutdown(JOB_DRAIN_SECONDS)
+
+
+app = FastAPI(lifespan=lifespan)
+
+# Scraper modules are imported when their first job runs, not at startup.
+scraper_plugins = PluginRegistry()
+scraper_plugins.register("amazon", "Amazon", "amazon.amazon_scraper")
+scraper_plugins.register("jumia", "Jumia", "jumia.jumia_scraper")
+scraper_plugins.register("2b", "2b", "twoB.twoB_scraper")
 
 AMAZON_HEADERS_PATH = os.path.join(os.path.dirname(__file__), "amazon", "headers.json")
 if not os.path.exists(AMAZON_HEADERS_PATH):
     AMAZON_HEADERS_PATH = os.path.join(os.path.dirname(__file__), "headers.json")
 
-amazon_headers = amazon_scraper.load_headers(AMAZON_HEADERS_PATH)
-AMAZON_DEFAULT_CATEGORIES = [
-    {"n%3A21832907031": "laptops"},
-    {"n%3A21832982031": "tvs"},
-    {"n%3A21832958031": "smart_watches"},
-    {"n%3A21833212031": "cpu"},
-    {"n%3A21832883031": "phones"},
-    {"n%3A21833215031": "gpus"},
-    {"n%3A21832907031": "laptops"},
-    # {"n%3A21832887031": "headphones"},
-]
+
+@cache
+def get_amazon_headers() -> dict[str, str]:
+    return scraper_plugins.load("amazon").load_headers(AMAZON_HEADERS_PATH)
+
+
+# Category discovery: a platform's navigation is crawled at most once per
+# CATEGORY_TREE_TTL_HOURS, DISCOVERY_REQUEST_INTERVAL seconds between requests.
+category_discovery = CategoryDiscovery(
+    scraper_plugins.load,
+    CategoryTreeCache(os.getenv("CATEGORY_TREE_DB", DEFAULT_TREE_DB)),
+    category_registry,
+    ttl_seconds=float(os.getenv("CATEGORY_TREE_TTL_HOURS", DEFAULT_TTL_HOURS)) * 3600,
+    request_interval=float(
+        os.getenv("DISCOVERY_REQUEST_INTERVAL", DEFAULT_REQUEST_INTERVAL)
+    ),
+)
 
 
-def send_data_to_backend(products_data: list, scraper_name: str):
+def discover_categories(platform: str, refresh: bool = False) -> dict[str, Any]:
+    if platform == "amazon" and "amazon" not in category_discovery.pipeline_options:
+        category_discovery.pipeline_options["amazon"] = {
+            "headers": get_amazon_headers()
+        }
+    return category_discovery.discover(platform, refresh)
+
+
+def send_data_to_backend(products_data: list, scraper_name: str) -> list:
+    """Posts the records to the backend; returns the ones it accepted."""
     if not products_data:
         logging.info(f"No data from {scraper_name} to send to backend.")
-        return
+        return []
 
     payload = []
+    sent = []
     for item in products_data:
         payload_item = {
             "ProductTitle": item.get("product_title"),
@@ -89,6 +232,7 @@ def send_data_to_backend(products_data: list, scraper_name: str):
             "ProductImageLocalPath": item.get("product_image_local_path"),
             "PlatformName": item.get("platform"),
             "CategoryName": item.get("category"),
+            "BrandName": item.get("brand"),
         }
         if (
             payload_item["ProductTitle"]
@@ -96,6 +240,7 @@ def send_data_to_backend(products_data: list, scraper_name: str):
             and payload_item["PlatformName"]
         ):
             payload.append(payload_item)
+            sent.append(item)
         else:
             logging.warning(
                 f"Skipping item due to missing essential fields: {item.get('product_title')}"
@@ -105,7 +250,7 @@ def send_data_to_backend(products_data: list, scraper_name: str):
         logging.info(
             f"No valid data from {scraper_name} to send to backend after filtering."
         )
-        return
+        return []
 
     try:
         logging.info(
@@ -118,6 +263,7 @@ def send_data_to_backend(products_data: list, scraper_name: str):
         logging.info(
             f"Successfully sent data from {scraper_name} to ASP.NET. Response: {response.text}"
         )
+        return sent
     except requests.exceptions.RequestException as e:
         logging.error(f"Failed to send data from {scraper_name} to ASP.NET: {e}")
         if hasattr(e, "response") and e.response is not None:
@@ -126,138 +272,868 @@ def send_data_to_backend(products_data: list, scraper_name: str):
         logging.error(
             f"An unexpected error occurred while sending data from {scraper_name}: {ex}"
         )
+    return []
 
 
-def run_amazon_scrape_job():
-    if active_scrapes["amazon"]:
-        logging.info("Amazon scrape already running.")
-        return
-    active_scrapes["amazon"] = True
-    scraper_statuses["amazon"] = "running"
+def filter_price_anomalies(products_data: list, scraper_name: str) -> list:
+    """Holds back records with implausible prices; never fails the job."""
     try:
-        logging.info("Starting Amazon scraping job...")
-        scraped_data = amazon_scraper.scrape_categories(
-            categories=AMAZON_DEFAULT_CATEGORIES,
-            headers=amazon_headers,
-            db_path=None,
-            image_dir=os.path.join(os.path.dirname(__file__), "amazon", "images"),
-            max_retries=50,
-            retry_delay=1,
+        return price_anomaly_filter.filter(products_data)
+    except Exception:
+        logging.exception(f"Price anomaly check failed for {scraper_name}")
+        return products_data
+
+
+def archive_records(products_data: list, scraper_name: str):
+    """Appends a run's records to the Parquet price archive; never fails the job."""
+    try:
+        price_archive.append(products_data)
+    except Exception:
+        logging.exception(f"Failed to archive {scraper_name} records")
+
+
+def detect_price_drops(products_data: list, scraper_name: str):
+    """Updates rolling price state for a batch and stores drop events; never fails the job."""
+    try:
+        price_drop_detector.process(products_data)
+    except Exception:
+        logging.exception(f"Price drop detection failed for {scraper_name}")
+
+
+def index_products(products_data: list, scraper_name: str):
+    """Upserts a batch into the local product search index; never fails the job."""
+    try:
+        product_index.upsert(products_data)
+    except Exception:
+        logging.exception(f"Failed to update the search index for {scraper_name}")
+
+
+class ScrapeRequest(BaseModel):
+    """
+    Optional body of `POST /scrape/{scraper}`; an empty body crawls every
+    configured category to the end.
+
+    - `categories`: registry category ids to crawl instead of all of them.
+    - `max_pages`: listing pages crawled per category at most.
+    - `sample_pages`: a quick price snapshot of the first N pages of each
+      category, without image downloads.
+    - `priority`: queued jobs with a higher priority start first.
+    """
+
+    categories: list[str] | None = None
+    max_pages: int | None = Field(None, ge=1)
+    sample_pages: int | None = Field(None, ge=1)
+    priority: int = 0
+
+    @property
+    def page_limit(self) -> int | None:
+        limits = [limit for limit in (self.max_pages, self.sample_pages) if limit]
+        return min(limits) if limits else None
+
+    @property
+    def download_images(self) -> bool:
+        return self.sample_pages is None
+
+
+def ingest_records(
+    records: list[dict[str, Any]], scraper_name: str, trace: JobTrace
+) -> list[dict[str, Any]]:
+    """
+    The ingest path of every job: holds back implausible prices, tags brands,
+    then archives, detects price drops, indexes and sends the accepted
+    records to the backend. Returns the accepted records.
+    """
+    with trace.span(PRICE_CHECK):
+        accepted = filter_price_anomalies(records, scraper_name)
+    trace.add_count("quarantined", len(records) - len(accepted))
+    with trace.span(BRAND_TAG):
+        tagged = get_brand_tagger().tag(accepted)
+    logging.info(f"{scraper_name}: brand recognized for {tagged} products.")
+    with trace.span(ARCHIVE):
+        archive_records(accepted, scraper_name)
+    with trace.span(PRICE_DROPS):
+        detect_price_drops(accepted, scraper_name)
+    with trace.span(SEARCH_INDEX):
+        index_products(accepted, scraper_name)
+    with trace.span(INGEST):
+        delivered = send_data_to_backend(accepted, scraper_name)
+    mark_sitemap_fetched(delivered)
+    emit(trace, job_events.INGEST, products=len(accepted))
+    return accepted
+
+
+def mark_sitemap_fetched(records: list[dict[str, Any]]):
+    """
+    Products any crawl delivered to the backend are no longer due from the
+    sitemaps. Quarantined or undelivered ones stay due for the next crawl.
+    """
+    try:
+        sitemap_store.mark_fetched(
+            record["product_url"] for record in records if record.get("product_url")
         )
-        logging.info(f"Amazon scraping finished. Products found: {len(scraped_data)}")
-        send_data_to_backend(scraped_data, "Amazon")
-        scraper_statuses["amazon"] = "completed"
-    except Exception as e:
-        logging.error(f"Amazon scraping failed: {e}")
-        scraper_statuses["amazon"] = "failed"
-    finally:
-        time.sleep(5)
-        scraper_statuses["amazon"] = "idle"
-        active_scrapes["amazon"] = False
+    except Exception:
+        logging.exception("Could not mark fetched products in the sitemap store")
 
 
-def run_2b_scrape_job():
-    source_category_definitions = twoB_CATEGORY_URLS
-    if os.getenv("PRESENTATION_MODE", "false").lower() == "true":
+def crawl_budget(max_pages: int | None = None) -> CrawlBudget:
+    return CrawlBudget(
+        job_seconds=float(JOB_DEADLINE_SECONDS) if JOB_DEADLINE_SECONDS else None,
+        category_seconds=(
+            float(CATEGORY_DEADLINE_SECONDS) if CATEGORY_DEADLINE_SECONDS else None
+        ),
+        hedge=HEDGE_REQUESTS,
+        memory_limit_mb=float(MEMORY_LIMIT_MB) if MEMORY_LIMIT_MB else None,
+        trace_allocations=MEMORY_TRACEMALLOC,
+        max_pages=max_pages,
+    )
+
+
+def build_crawl_plan(
+    scraper_key: str, category_ids: list[str] | None = None
+) -> dict[str, Any]:
+    """
+    Plans a run from the category registry: dedupes listings and estimates work.
+    `category_ids` narrows the run to those enabled categories, in that order.
+    """
+    if category_ids:
+        by_id = {
+            category["id"]: category
+            for category in category_registry.categories(scraper_key)
+        }
+        categories = [by_id[category_id] for category_id in category_ids]
+    elif (
+        scraper_key == "2b"
+        and os.getenv("PRESENTATION_MODE", "false").lower() == "true"
+    ):
         logging.info("2B: Presentation mode enabled. Using presentation categories.")
-        source_category_definitions = PRESENTATION_CATEGORIES
+        categories = category_registry.categories("2b", tag="presentation")
     else:
-        logging.info("2B: Using default categories.")
+        categories = category_registry.categories(scraper_key)
+    return plan_crawl(scraper_key, categories, crawl_history)
+
+
+def run_traced_job(
+    scraper_key: str,
+    scraper_name: str,
+    scrape: Callable[
+        [ModuleType, JobTrace, RawPageWriter | None, CrawlBudget],
+        list[dict[str, Any]],
+    ],
+    profile: str | None = None,
+    events: JobEvents | None = None,
+    max_pages: int | None = None,
+) -> dict[str, Any]:
+    """
+    Runs scrape + ingest under a job trace, optionally profiled, and keeps the breakdown.
+    Returns the job's counts: products found plus the trace's counters.
+    Progress is published to the job's `events` log.
 
-    category_url_templates_to_scrape: Dict[str, str] = {
-        cat_name: details["url_template"]
-        for cat_name, details in source_category_definitions.items()
+    `scrape` receives the scraper module, loaded on the platform's first job,
+    the raw HTML writer for the run when RAW_HTML_ARCHIVE is enabled, and the
+    job's time/memory/page budget. Page-limited runs are left out of the
+    crawl history, so they don't shrink the estimates of full runs.
+    """
+    trace = JobTrace(scraper_name, events)
+    budget = crawl_budget(max_pages)
+    running_budgets.add(budget)
+    raw_archive = RawPageWriter(RAW_HTML_DIR, scraper_key) if RAW_HTML_ARCHIVE else None
+
+    def job():
+        with trace.span(PLUGIN_LOAD):
+            scraper_module = scraper_plugins.load(scraper_key)
+        scraped_data = scrape(scraper_module, trace, raw_archive, budget)
+        logging.info(
+            f"{scraper_name} scraping finished. Products found: {len(scraped_data)}"
+        )
+        ingest_records(scraped_data, scraper_name, trace)
+        return len(scraped_data)
+
+    try:
+        products, artifact_path = run_profiled(profile, PROFILE_DIR, scraper_key, job)
+    finally:
+        running_budgets.discard(budget)
+        if raw_archive is not None:
+            raw_archive.close()
+        trace.finish()
+        job_timings[scraper_key] = trace.breakdown()
+        if budget.memory is not None:
+            job_timings[scraper_key]["memory"] = budget.memory.stop()
+        scraper_plugins.record_job(
+            scraper_key, job_timings[scraper_key]["wall_seconds"]
+        )
+        trace.log_summary()
+        if max_pages is None:
+            crawl_history.record_job(scraper_key, job_timings[scraper_key])
+    if artifact_path:
+        profile_artifacts[scraper_key] = artifact_path
+    return {"products": products, **job_timings[scraper_key]["counters"]}
+
+
+def run_amazon_scrape_job(
+    profile: str | None = None,
+    request: ScrapeRequest | None = None,
+    events: JobEvents | None = None,
+) -> dict[str, Any]:
+    logging.info("Starting Amazon scraping job...")
+    request = request or ScrapeRequest()
+    plan = build_crawl_plan("amazon", request.categories)
+    return run_traced_job(
+        "amazon",
+        "Amazon",
+        lambda amazon_scraper, trace, raw_archive, budget: amazon_scraper.scrape_categories(
+            categories=[
+                {category["node"]: category["category"]}
+                for category in plan["categories"]
+            ],
+            headers=get_amazon_headers(),
+            db_path=None,
+            image_dir=os.path.join(os.path.dirname(__file__), "amazon", "images"),
+            max_retries=50,
+            retry_delay=1,
+            trace=trace,
+            raw_archive=raw_archive,
+            budget=budget,
+            download_images=request.download_images,
+        ),
+        profile,
+        events,
+        request.page_limit,
+    )
+
+
+def run_2b_scrape_job(
+    profile: str | None = None,
+    request: ScrapeRequest | None = None,
+    events: JobEvents | None = None,
+) -> dict[str, Any]:
+    request = request or ScrapeRequest()
+    plan = build_crawl_plan("2b", request.categories)
+    category_url_templates_to_scrape: dict[str, str] = {
+        category["id"]: category["url_template"] for category in plan["categories"]
     }
 
     if not category_url_templates_to_scrape:
         logging.info("No 2B categories configured to scrape.")
-        scraper_statuses["2b"] = "idle"
-        active_scrapes["2b"] = False
-        return
-
-    if active_scrapes["2b"]:
-        logging.info("2B scrape already running.")
-        return
-    active_scrapes["2b"] = True
-    scraper_statuses["2b"] = "running"
+        return {"products": 0}
+
+    logging.info(
+        f"Starting 2B scraping job for categories: {list(category_url_templates_to_scrape.keys())}"
+    )
+    return run_traced_job(
+        "2b",
+        "2B",
+        lambda twoB_scraper, trace, raw_archive, budget: twoB_scraper.scrape_2b_categories(
+            category_url_templates=category_url_templates_to_scrape,
+            image_dir=os.path.join(os.path.dirname(__file__), "twoB", "images"),
+            trace=trace,
+            raw_archive=raw_archive,
+            budget=budget,
+            download_images=request.download_images,
+        ),
+        profile,
+        events,
+        request.page_limit,
+    )
+
+
+def run_jumia_scrape_job(
+    profile: str | None = None,
+    request: ScrapeRequest | None = None,
+    events: JobEvents | None = None,
+) -> dict[str, Any]:
+    logging.info("Starting Jumia scraping job...")
+    request = request or ScrapeRequest()
+    plan = build_crawl_plan("jumia", request.categories)
+    return run_traced_job(
+        "jumia",
+        "Jumia",
+        lambda jumia_scraper, trace, raw_archive, budget: jumia_scraper.JumiaScraper(
+            image_dir=os.path.join(os.path.dirname(__file__), "jumia", "images"),
+            trace=trace,
+            raw_archive=raw_archive,
+            budget=budget,
+        ).scrape_all(
+            [category["id"] for category in plan["categories"]],
+            download_images=request.download_images,
+        ),
+        profile,
+        events,
+        request.page_limit,
+    )
+
+
+def run_distributed_scrape_job(
+    scraper_key: str, scraper_name: str, events: JobEvents | None = None
+) -> dict[str, Any]:
+    """
+    Coordinates a sharded run: publishes the plan's shards to the work queue,
+    then brand-tags and ingests results as workers stream them back. On
+    service shutdown it ingests what is already queued and stops waiting.
+    """
+    trace = JobTrace(scraper_name, events)
     try:
+        plan = build_crawl_plan(scraper_key)
+        run_id = work_queue.publish_run(
+            scraper_key, build_shards(plan, PAGES_PER_SHARD), PAGES_PER_SHARD
+        )
+        distributed_runs[scraper_key] = run_id
+
+        # Workers dedupe within their shard; this drops repeats across shards.
+        dedupe = ProductDeduplicator()
+        ingested = 0
+        while True:
+            # Read the status first: once it says finished, every result is
+            # already in the queue and the drain below empties it.
+            status = work_queue.run_status(run_id)
+            records, _ = work_queue.drain_results(run_id)
+            if records:
+                unique = dedupe.filter(records)
+                trace.add_count("duplicates", len(records) - len(unique))
+                if unique:
+                    emit(
+                        trace,
+                        job_events.PRODUCTS,
+                        records=[dict(record) for record in unique],
+                    )
+                    ingested += len(ingest_records(unique, scraper_name, trace))
+            elif status["finished"] or shutdown_requested.is_set():
+                break
+            else:
+                shutdown_requested.wait(RESULT_POLL_SECONDS)
+
         logging.info(
-            f"Starting 2B scraping job for categories: {list(category_url_templates_to_scrape.keys())}"
+            f"{scraper_name} distributed run {run_id} finished: {ingested} products, "
+            f"shards {status['shards']}, {status['workers']} workers."
         )
+    finally:
+        trace.finish()
+        job_timings[scraper_key] = trace.breakdown()
+    return {"products": ingested, **job_timings[scraper_key]["counters"]}
 
-        scraped_data = scrape_2b_categories(
-            category_url_templates=category_url_templates_to_scrape,
-            image_dir=os.path.join(os.path.dirname(__file__), "twoB", "images"),
+
+def with_indexed_categories(items: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Fills in a missing category with the one the product was last indexed under."""
+    try:
+        indexed = product_index.lookup(
+            [item["product_url"] for item in items if not item.get("category")]
         )
+    except Exception:
+        logging.exception("Could not look up products in the index")
+        indexed = {}
+    return [
+        {
+            **item,
+            "category": item.get("category")
+            or indexed.get(item["product_url"], {}).get("category"),
+        }
+        for item in items
+    ]
 
-        logging.info(f"2B scraping finished. Products found: {len(scraped_data)}")
-        send_data_to_backend(scraped_data, "2B")
-        scraper_statuses["2b"] = "completed"
-    except Exception as e:
-        logging.error(f"2B scraping failed: {e}")
-        scraper_statuses["2b"] = "failed"
+
+def product_refresher(trace: JobTrace, budget: CrawlBudget) -> ProductRefresher:
+    return ProductRefresher(
+        scraper_plugins.load,
+        WATCHLIST_CONCURRENCY,
+        WATCHLIST_PER_PLATFORM,
+        trace,
+        budget,
+        {
+            "amazon": {
+                "headers": get_amazon_headers(),
+                "image_dir": os.path.join(
+                    os.path.dirname(__file__), "amazon", "images"
+                ),
+            },
+            "jumia": {
+                "image_dir": os.path.join(os.path.dirname(__file__), "jumia", "images")
+            },
+            "2b": {
+                "image_dir": os.path.join(os.path.dirname(__file__), "twoB", "images")
+            },
+        },
+    )
+
+
+def run_watchlist_refresh_job(
+    items: list[dict[str, Any]], events: JobEvents | None = None
+) -> dict[str, Any]:
+    """
+    Refreshes watched products from their product pages and ingests them
+    like any scraped batch. Products sent without a category get the one
+    they were last indexed under.
+    """
+    logging.info(f"Starting watchlist refresh of {len(items)} products...")
+    trace = JobTrace("Watchlist", events)
+    budget = crawl_budget()
+    running_budgets.add(budget)
+    try:
+        refresher = product_refresher(trace, budget)
+        records = refresher.refresh(with_indexed_categories(items))
+        ingest_records(records, "Watchlist", trace)
     finally:
-        time.sleep(5)
-        scraper_statuses["2b"] = "idle"
-        active_scrapes["2b"] = False
+        running_budgets.discard(budget)
+        trace.finish()
+        job_timings["watchlist"] = trace.breakdown()
+        trace.log_summary()
+    return {"products": len(records), **job_timings["watchlist"]["counters"]}
 
 
-def run_jumia_scrape_job():
-    if active_scrapes["jumia"]:
-        logging.info("Jumia scrape already running.")
-        return
-    active_scrapes["jumia"] = True
-    scraper_statuses["jumia"] = "running"
+def run_sitemap_crawl_job(
+    scraper_key: str, max_products: int, events: JobEvents | None = None
+) -> dict[str, Any]:
+    """
+    Syncs the platform's sitemaps, then fetches up to `max_products` of the
+    product URLs that are new or modified since they were last fetched, and
+    ingests them like any scraped batch.
+    """
+    name = scraper_plugins.get(scraper_key).name
+    logging.info(f"Starting {name} sitemap crawl...")
+    trace = JobTrace(f"{name} sitemap", events)
+    budget = crawl_budget()
+    running_budgets.add(budget)
+    records: list[dict[str, Any]] = []
     try:
-        logging.info("Starting Jumia scraping job...")
-        scraper = jumia_scraper.JumiaScraper(
-            image_dir=os.path.join(os.path.dirname(__file__), "jumia", "images")
+        crawler = SitemapCrawler(
+            scraper_plugins.load,
+            sitemap_store,
+            trace,
+            headers=(
+                {"amazon": get_amazon_headers()} if scraper_key == "amazon" else None
+            ),
         )
-        scraped_data = scraper.scrape_all()
-        logging.info(f"Jumia scraping finished. Products found: {len(scraped_data)}")
-        send_data_to_backend(scraped_data, "Jumia")
-        scraper_statuses["jumia"] = "completed"
-    except Exception as e:
-        logging.error(f"Jumia scraping failed: {e}")
-        scraper_statuses["jumia"] = "failed"
+        found = crawler.sync(scraper_key)
+        due = sitemap_store.due(scraper_key, max_products)
+        logging.info(
+            f"{name}: {len(due)} sitemap products due "
+            f"({found.get('new', 0)} new, {found.get('modified', 0)} modified)."
+        )
+        items = [{"product_url": url, "platform": scraper_key} for url in due]
+        records = product_refresher(trace, budget).refresh(
+            with_indexed_categories(items)
+        )
+        ingest_records(records, name, trace)
     finally:
-        time.sleep(5)
-        scraper_statuses["jumia"] = "idle"
-        active_scrapes["jumia"] = False
+        running_budgets.discard(budget)
+        trace.finish()
+        job_timings[f"{scraper_key}_sitemap"] = trace.breakdown()
+        trace.log_summary()
+    return {
+        "products": len(records),
+        **job_timings[f"{scraper_key}_sitemap"]["counters"],
+    }
+
+
+def validate_profiler(profile: str | None):
+    if profile is not None and profile not in PROFILERS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown profiler '{profile}'. Use one of: {', '.join(PROFILERS)}.",
+        )
+
+
+def validate_scrape_request(
+    scraper_key: str, request: ScrapeRequest | None
+) -> ScrapeRequest:
+    if request is None:
+        return ScrapeRequest()
+    if request.categories:
+        known = {
+            category["id"] for category in category_registry.categories(scraper_key)
+        }
+        unknown = [
+            category_id
+            for category_id in request.categories
+            if category_id not in known
+        ]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown or disabled {scraper_key} categories: {', '.join(unknown)}.",
+            )
+    return request
 
 
 @app.post("/scrape/amazon")
-async def trigger_amazon_scrape_endpoint():
+async def trigger_amazon_scrape_endpoint(
+    request: ScrapeRequest | None = None, profile: str | None = None
+):
     logging.info("Received Amazon scrape request via endpoint")
-    if active_scrapes["amazon"]:
+    validate_profiler(profile)
+    request = validate_scrape_request("amazon", request)
+    job = job_runner.submit(
+        "amazon",
+        "Amazon",
+        run_amazon_scrape_job,
+        profile,
+        request,
+        priority=request.priority,
+        request=request.model_dump(exclude_defaults=True),
+    )
+    if job is None:
         return {"message": "Amazon scraping is already running."}
-    executor.submit(run_amazon_scrape_job)
-    return {"message": "Amazon scraping started in background."}
+    return {"message": "Amazon scraping started in background.", "job_id": job.job_id}
 
 
 @app.post("/scrape/2b")
-async def trigger_2b_scrape_endpoint():
+async def trigger_2b_scrape_endpoint(
+    request: ScrapeRequest | None = None, profile: str | None = None
+):
     logging.info("Received 2B scrape request via endpoint")
-    if active_scrapes["2b"]:
+    validate_profiler(profile)
+    request = validate_scrape_request("2b", request)
+    job = job_runner.submit(
+        "2b",
+        "2B",
+        run_2b_scrape_job,
+        profile,
+        request,
+        priority=request.priority,
+        request=request.model_dump(exclude_defaults=True),
+    )
+    if job is None:
         return {"message": "2B scraping is already running."}
-    executor.submit(run_2b_scrape_job)
-    return {"message": "2B scraping started in background."}
+    return {"message": "2B scraping started in background.", "job_id": job.job_id}
 
 
 @app.post("/scrape/jumia")
-async def trigger_jumia_scrape_endpoint():
+async def trigger_jumia_scrape_endpoint(
+    request: ScrapeRequest | None = None, profile: str | None = None
+):
     logging.info("Received Jumia scrape request via endpoint")
-    if active_scrapes["jumia"]:
+    validate_profiler(profile)
+    request = validate_scrape_request("jumia", request)
+    job = job_runner.submit(
+        "jumia",
+        "Jumia",
+        run_jumia_scrape_job,
+        profile,
+        request,
+        priority=request.priority,
+        request=request.model_dump(exclude_defaults=True),
+    )
+    if job is None:
         return {"message": "Jumia scraping is already running."}
-    executor.submit(run_jumia_scrape_job)
-    return {"message": "Jumia scraping started in background."}
+    return {"message": "Jumia scraping started in background.", "job_id": job.job_id}
+
+
+class WatchedProduct(BaseModel):
+    product_url: str
+    platform: str | None = None
+    category: str | None = None
+
+
+class WatchlistRefreshRequest(BaseModel):
+    products: list[WatchedProduct] = Field(..., min_length=1)
+    priority: int = WATCHLIST_PRIORITY
+
+
+@app.post("/refresh/watchlist")
+async def trigger_watchlist_refresh_endpoint(request: WatchlistRefreshRequest):
+    """
+    Refreshes the prices of the given watched products from their product
+    pages, without crawling their categories. The list also becomes the
+    watchlist refreshed every WATCHLIST_REFRESH_SECONDS, when set.
+    """
+    items = [product.model_dump(exclude_none=True) for product in request.products]
+    unknown = [
+        item["platform"]
+        for item in items
+        if item.get("platform") and item["platform"] not in scraper_plugins.keys()
+    ]
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown platforms: {', '.join(set(unknown))}."
+        )
+    watchlist[:] = items
+    logging.info(f"Received watchlist refresh request for {len(items)} products")
+    job = job_runner.submit(
+        "watchlist",
+        "Watchlist",
+        run_watchlist_refresh_job,
+        items,
+        priority=request.priority,
+        request={"products": len(items), "priority": request.priority},
+    )
+    if job is None:
+        return {"message": "A watchlist refresh is already running."}
+    return {"message": "Watchlist refresh started in background.", "job_id": job.job_id}
+
+
+@app.post("/scrape/{scraper_name}/distributed")
+async def trigger_distributed_scrape_endpoint(scraper_name: str):
+    scraper_key = scraper_name.lower()
+    if scraper_key not in scraper_plugins.keys():
+        raise HTTPException(
+            status_code=404, detail=f"Unknown scraper '{scraper_name}'."
+        )
+    logging.info(f"Received distributed {scraper_name} scrape request via endpoint")
+    name = scraper_plugins.get(scraper_key).name
+    job = job_runner.submit(
+        scraper_key, name, run_distributed_scrape_job, scraper_key, name
+    )
+    if job is None:
+        return {"message": f"{scraper_name} scraping is already running."}
+    return {
+        "message": f"{scraper_name} distributed scraping started in background.",
+        "job_id": job.job_id,
+    }
+
+
+@app.post("/scrape/{scraper_name}/sitemap")
+async def trigger_sitemap_crawl_endpoint(
+    scraper_name: str, max_products: int = SITEMAP_MAX_PRODUCTS
+):
+    """
+    Crawls the platform incrementally from its sitemaps: only product URLs
+    that are new, or whose <lastmod> moved since they were last fetched.
+    """
+    scraper_key = scraper_name.lower()
+    if scraper_key not in scraper_plugins.keys():
+        raise HTTPException(
+            status_code=404, detail=f"Unknown scraper '{scraper_name}'."
+        )
+    logging.info(f"Received {scraper_name} sitemap crawl request via endpoint")
+    name = scraper_plugins.get(scraper_key).name
+    job = job_runner.submit(
+        "sitemap",
+        f"{name} sitemap",
+        run_sitemap_crawl_job,
+        scraper_key,
+        max(1, max_products),
+        request={"scraper": scraper_key, "max_products": max_products},
+    )
+    if job is None:
+        return {"message": "A sitemap crawl is already running."}
+    return {
+        "message": f"{scraper_name} sitemap crawl started in background.",
+        "job_id": job.job_id,
+    }
+
+
+@app.get("/scrapers/{scraper_name}/sitemap")
+def get_sitemap_stats_endpoint(scraper_name: str):
+    """How many of the platform's sitemap product URLs are known and due."""
+    scraper_key = scraper_name.lower()
+    if scraper_key not in scraper_plugins.keys():
+        raise HTTPException(
+            status_code=404, detail=f"Unknown scraper '{scraper_name}'."
+        )
+    return sitemap_store.stats(scraper_key)
+
+
+@app.get("/runs/{run_id}")
+async def get_distributed_run_endpoint(run_id: str):
+    status = work_queue.run_status(run_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Unknown run '{run_id}'.")
+    return status
+
+
+@app.get("/scrapers/{scraper_name}/runs/latest")
+async def get_latest_distributed_run_endpoint(scraper_name: str):
+    run_id = distributed_runs.get(scraper_name.lower())
+    if run_id is None:
+        raise HTTPException(
+            status_code=404, detail=f"No distributed run started for '{scraper_name}'."
+        )
+    return work_queue.run_status(run_id)
+
+
+@app.get("/prices/stats")
+def get_price_stats_endpoint(
+    days: int = DEFAULT_STATS_DAYS,
+    platform: str | None = None,
+    product_url: str | None = None,
+    limit: int = 100,
+):
+    return price_archive.price_stats(days, platform, product_url, limit)
+
+
+@app.get("/prices/drops")
+def get_price_drops_endpoint(
+    since_id: int = 0,
+    platform: str | None = None,
+    product_url: str | None = None,
+    limit: int = 100,
+):
+    return price_drop_detector.recent_drops(since_id, platform, product_url, limit)
+
+
+@app.get("/prices/quarantine")
+def get_price_quarantine_endpoint(
+    platform: str | None = None,
+    reason: str | None = None,
+    limit: int = 100,
+):
+    """Records held back for implausible prices, newest first."""
+    return {
+        "mode": price_anomaly_filter.mode,
+        "reasons": price_anomaly_filter.reasons,
+        "records": price_anomaly_filter.quarantined(platform, reason, limit),
+    }
+
+
+@app.get("/products/search")
+def search_products_endpoint(
+    q: str | None = None,
+    platform: str | None = None,
+    category: str | None = None,
+    max_price: float | None = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    offset: int = 0,
+):
+    return product_index.search(q, platform, category, max_price, limit, offset)
+
+
+@app.get("/images/manifest")
+def get_image_manifest_endpoint():
+    return image_manifest.stats()
+
+
+@app.get("/raw-html/runs")
+def list_raw_html_runs_endpoint():
+    return list_runs(RAW_HTML_DIR)
+
+
+@app.post("/archive/compact")
+def compact_archive_endpoint(min_files: int = 2):
+    return price_archive.compact(min_files)
 
 
 @app.get("/scrapers")
 async def list_scrapers_endpoint():
-    return ["Amazon", "Jumia", "2b"]
+    return scraper_plugins.names()
+
+
+@app.get("/scrapers/plugins")
+async def get_scraper_plugins_endpoint():
+    return {
+        "startup_seconds": SERVICE_STARTUP_SECONDS,
+        "plugins": scraper_plugins.stats(),
+    }
 
 
 @app.get("/scrapers/status")
 async def get_scraper_status_endpoint():
     return scraper_statuses
+
+
+@app.get("/jobs")
+def list_jobs_endpoint(scraper: str | None = None, limit: int = 20):
+    """Active jobs, then finished ones (newest first) from the job store."""
+    active = [
+        job.to_dict()
+        for job in job_runner.active.values()
+        if scraper is None or job.key == scraper.lower()
+    ]
+    finished = job_runner.store.recent(scraper.lower() if scraper else None, limit)
+    return {"active": active, "finished": finished}
+
+
+@app.get("/jobs/{job_id}")
+def get_job_endpoint(job_id: str):
+    job = job_runner.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'.")
+    return job
+
+
+@app.get("/jobs/{job_id}/events")
+async def stream_job_events_endpoint(
+    job_id: str,
+    request: Request,
+    products: bool = False,
+    after: int | None = None,
+):
+    """
+    Streams a job's progress as Server-Sent Events until it finishes: queued,
+    started, category_started, page, images_pending, category_finished,
+    ingest and finished. With `products=true` the extracted records follow
+    each page as "products" events. Reconnecting clients resume after their
+    Last-Event-ID (or `after`).
+    """
+    job = job_runner.jobs.get(job_id)
+    if job is None:
+        raise HTTPException(
+            status_code=404, detail=f"No live events for job '{job_id}'."
+        )
+    if after is None:
+        last_event_id = request.headers.get("last-event-id", "")
+        after = int(last_event_id) if last_event_id.isdigit() else -1
+
+    async def stream():
+        async for event in job.events.subscribe(after):
+            if event is not None and event["type"] == job_events.PRODUCTS:
+                if not products:
+                    continue
+            yield format_sse(event)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/scrapers/{scraper_name}/plan")
+async def get_scraper_plan_endpoint(scraper_name: str):
+    scraper_key = scraper_name.lower()
+    if scraper_key not in scraper_plugins.keys():
+        raise HTTPException(
+            status_code=404, detail=f"Unknown scraper '{scraper_name}'."
+        )
+    plan = build_crawl_plan(scraper_key)
+    plan["categories"] = [
+        {
+            "id": category["id"],
+            "category": category["category"],
+            "url_template": category["url_template"],
+        }
+        for category in plan["categories"]
+    ]
+    return plan
+
+
+@app.get("/scrapers/{scraper_name}/categories/discovered")
+def get_discovered_categories_endpoint(scraper_name: str, refresh: bool = False):
+    """
+    The platform's category tree (cached up to CATEGORY_TREE_TTL_HOURS) with
+    the categories not in the registry yet, registry or previously seen
+    categories no longer in the tree, and renamed ones.
+    """
+    scraper_key = scraper_name.lower()
+    if scraper_key not in scraper_plugins.keys():
+        raise HTTPException(
+            status_code=404, detail=f"Unknown scraper '{scraper_name}'."
+        )
+    try:
+        return discover_categories(scraper_key, refresh)
+    except Exception as e:
+        logging.exception(f"Category discovery for {scraper_key} failed")
+        raise HTTPException(
+            status_code=502, detail=f"Category discovery failed: {e}"
+        ) from e
+
+
+@app.get("/scrapers/{scraper_name}/timings")
+async def get_scraper_timings_endpoint(scraper_name: str):
+    timings = job_timings.get(scraper_name.lower())
+    if timings is None:
+        raise HTTPException(
+            status_code=404, detail=f"No finished job recorded for '{scraper_name}'."
+        )
+    return timings
+
+
+@app.get("/scrapers/{scraper_name}/profile")
+async def get_scraper_profile_endpoint(scraper_name: str):
+    artifact_path = profile_artifacts.get(scraper_name.lower())
+    if artifact_path is None or not os.path.exists(artifact_path):
+        raise HTTPException(
+            status_code=404, detail=f"No profile recorded for '{scraper_name}'."
+        )
+    return FileResponse(artifact_path, filename=os.path.basename(artifact_path))
+
+
+SERVICE_STARTUP_SECONDS = round(time.perf_counter() - SERVICE_IMPORT_STARTED, 3)
+logging.info(f"Scraper service ready in {SERVICE_STARTUP_SECONDS:.3f}s")
@@ -0,0 +1,170 @@
+import argparse
+import logging
+import os
+import socket
+import time
+
+from common.deadlines import CrawlBudget
+from common.identity import ProductDeduplicator
+from common.logs import configure_logging
+from common.pipeline import ScrapePipeline
+from common.plugins import PluginRegistry
+from common.workqueue import DEFAULT_LEASE_SECONDS, DEFAULT_QUEUE_DB, WorkQueue
+
+log = logging.getLogger(__name__)
+
+# Same plugin keys as the service; a worker only imports the platforms it is handed.
+scraper_plugins = PluginRegistry()
+scraper_plugins.register("amazon", "Amazon", "amazon.amazon_scraper")
+scraper_plugins.register("jumia", "Jumia", "jumia.jumia_scraper")
+scraper_plugins.register("2b", "2b", "twoB.twoB_scraper")
+
+
+class LeaseLostError(Exception):
+    """Raised inside a shard when another worker has taken it over."""
+
+
+class Worker:
+    """
+    Stateless crawl worker: claims shards from the queue, scrapes their page
+    range and streams each page's records back. Nothing is kept between
+    shards besides the per-platform pipelines, so workers can be started and
+    killed freely on any host that reaches the queue database. Each shard is
+    deduplicated on its own; repeats across shards are dropped by the
+    service. The lease is renewed as pages and downloads make progress, so
+    only a worker that dies or hangs loses its shard.
+    """
+
+    def __init__(
+        self,
+        queue: WorkQueue,
+        worker_id: str,
+        download_images: bool = True,
+        max_workers: int | None = None,
+        memory_limit_mb: float | None = None,
+    ):
+        self.queue = queue
+        self.worker_id = worker_id
+        self.download_images = download_images
+        self.max_workers = max_workers
+        # One budget for the worker's lifetime: no deadlines, only the memory cap.
+        self.budget = CrawlBudget(memory_limit_mb=memory_limit_mb)
+        self._pipelines: dict[str, ScrapePipeline] = {}
+
+    def pipeline(self, platform: str) -> ScrapePipeline:
+        if platform not in self._pipelines:
+            scraper_module = scraper_plugins.load(platform)
+            self._pipelines[platform] = scraper_module.build_pipeline(
+                max_workers=self.max_workers,
+                download_images=self.download_images,
+                budget=self.budget,
+            )
+        return self._pipelines[platform]
+
+    def process(self, shard: dict) -> bool:
+        shard_id = shard["id"]
+        log.info(
+            f"{self.worker_id}: shard {shard_id} {shard['platform']}/{shard['category']} "
+            f"pages {shard['first_page']}-{shard['last_page']} (attempt {shard['attempts']})"
+        )
+        pipeline = self.pipeline(shard["platform"])
+        pages = {"count": 0}
+        renewed = {"at": time.monotonic()}
+
+        def stream(category, records):
+            pages["count"] += 1
+            if not self.queue.add_results(shard_id, self.worker_id, records):
+                raise LeaseLostError(f"shard {shard_id}")
+            renewed["at"] = time.monotonic()
+
+        def heartbeat():
+            # A write per page would contend with the other workers; a few per lease do.
+            if time.monotonic() - renewed["at"] < self.queue.lease_seconds / 4:
+                return
+            if not self.queue.renew(shard_id, self.worker_id):
+                raise LeaseLostError(f"shard {shard_id}")
+            renewed["at"] = time.monotonic()
+
+        pipeline.on_batch = stream
+        pipeline.on_progress = heartbeat
+        # A shard claimed again after its lease expired must see its products anew.
+        pipeline.dedupe = ProductDeduplicator()
+        start = time.perf_counter()
+        try:
+            products, has_more = pipeline.run_range(
+                shard["category"],
+                shard["url_template"],
+                shard["first_page"],
+                shard["last_page"],
+            )
+        except LeaseLostError:
+            log.warning(f"{self.worker_id}: lost the lease on shard {shard_id}.")
+            return False
+        except Exception as e:
+            log.exception(f"{self.worker_id}: shard {shard_id} failed")
+            self.queue.fail(shard_id, self.worker_id, str(e))
+            return False
+        finally:
+            pipeline.on_batch = None
+            pipeline.on_progress = None
+
+        return self.queue.complete(
+            shard_id,
+            self.worker_id,
+            has_more,
+            pages["count"],
+            len(products),
+            time.perf_counter() - start,
+        )
+
+    def run(self, poll_interval: float = 2.0, exit_when_idle: bool = False):
+        log.info(f"Worker {self.worker_id} polling {self.queue.db_path}")
+        while True:
+            shard = self.queue.claim(self.worker_id)
+            if shard is None:
+                if exit_when_idle:
+                    log.info(f"Worker {self.worker_id}: queue empty, exiting.")
+                    return
+                time.sleep(poll_interval)
+                continue
+            self.process(shard)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a distributed crawl worker.")
+    parser.add_argument(
+        "--queue-db", default=os.getenv("WORK_QUEUE_DB", DEFAULT_QUEUE_DB)
+    )
+    parser.add_argument("--worker-id", default=f"{socket.gethostname()}-{os.getpid()}")
+    parser.add_argument("--lease-seconds", type=float, default=DEFAULT_LEASE_SECONDS)
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    parser.add_argument("--max-workers", type=int, default=None)
+    parser.add_argument(
+        "--no-images", action="store_true", help="Skip product image downloads."
+    )
+    parser.add_argument(
+        "--memory-limit-mb",
+        type=float,
+        default=None,
+        help="Run memory-bounded, capping the worker's RSS.",
+    )
+    parser.add_argument(
+        "--exit-when-idle",
+        action="store_true",
+        help="Exit once no shard is available instead of polling.",
+    )
+    args = parser.parse_args()
+
+    configure_logging()
+    worker = Worker(
+        WorkQueue(args.queue_db, lease_seconds=args.lease_seconds),
+        args.worker_id,
+        download_images=not args.no_images,
+        max_workers=args.max_workers,
+        memory_limit_mb=args.memory_limit_mb,
+    )
+    worker.run(args.poll_interval, args.exit_when_idle)
+
+
+if __name__ == "__main__":
+    main()
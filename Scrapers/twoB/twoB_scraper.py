@@ -1,86 +1,87 @@
-import requests
-from bs4 import BeautifulSoup
-import time
+import logging
 import os
 import re
-import logging
-from concurrent.futures import ThreadPoolExecutor
-import concurrent.futures
-from typing import List, Dict, Any, Optional
+import time
+from typing import Any
+from urllib.parse import urldefrag, urljoin
+
+from bs4 import BeautifulSoup
+
+if __package__ in (None, ""):
+    import sys
+
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from common import pipeline
+from common.deadlines import CrawlBudget
+from common.exporters import Exporter
+from common.identity import canonical_product_id
+from common.logs import configure_logging, rate_limit
+from common.parsing import JSON_LD_REGION, extract_json_ld_products
+
+# Helpers shared through the pipeline module; still importable from here.
+from common.pipeline import (
+    ScrapePipeline,
+    StopOnEmptyPage,
+    create_directory_if_not_exists,
+    get_num_workers,  # noqa: F401
+    sanitize_filename,
+)
+from common.rawarchive import RawPageWriter
+from common.tracing import JobTrace
 
-MAX_FILE_LENGTH = 100
 DEFAULT_IMAGE_DIR = os.path.join(os.path.dirname(__file__), "images")
+BASE_URL = "https://2b.com.eg"
+
+# Elements materialized by the partial parser: the Magento product grid items
+# and any embedded JSON-LD; header, mega-menu and footer are skipped.
+PAGE_REGIONS = [
+    ("li", "class", "product-item"),
+    ("li", "class", "pages-item-next"),
+    JSON_LD_REGION,
+]
+
+PAGINATION = StopOnEmptyPage(
+    next_link=lambda soup: soup.find("li", class_="pages-item-next")
+)
+# Regions of a product detail page used by the targeted price refresh.
+PRODUCT_PAGE_REGIONS = [
+    ("h1", "class", "page-title"),
+    ("div", "class", "product-info-price"),
+    ("div", "itemprop", "sku"),
+    ("img", "class", "gallery-placeholder__image"),
+    JSON_LD_REGION,
+]
+# Category discovery reads the Magento mega-menu, which holds the whole tree,
+# and a listing's "Items 1-48 of 523" toolbar for its product count.
+CATEGORY_TREE_URL = BASE_URL + "/en/"
+CATEGORY_TREE_REGIONS = [
+    ("nav", "class", "navigation"),
+    ("p", "id", "toolbar-amount"),
+]
+LISTING_QUERY = "?p={}&product_list_limit=48"
+# Sitemap crawling: Magento's sitemap lists products and categories alike as
+# .html pages; only products carry an <image:image>.
+SITEMAP_INDEX_URL = BASE_URL + "/sitemap.xml"
 
 
 HEADERS = {
     "User-Agent": "Mozilla/5.0 (X11; Linux x86_64; rv:102.0) Gecko/20100101 Firefox/102.0"
 }
 
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
-)
-log = logging.getLogger(__name__)
-
-
-def get_num_workers(max_workers: Optional[int] = None) -> int:
-    if max_workers and max_workers > 0:
-        return max_workers
-    try:
-        cpus = os.cpu_count()
-        return cpus if cpus else 1
-    except NotImplementedError:
-        log.warning("Could not detect number of CPUs, defaulting to 1 worker.")
-        return 1
-
-
-def sanitize_filename(filename: str) -> str:
-    sanitized = re.sub(r'[\\/*?:"<>|]', "", filename)
-    sanitized = re.sub(r"\s+", "_", sanitized)
-    return sanitized[: MAX_FILE_LENGTH - 5]
-
+# Per-product warnings are rate limited.
+MISSING_FIELD_LOGS_PER_SECOND = 5
 
-def create_directory_if_not_exists(dir_path: str):
-    if not os.path.exists(dir_path):
-        try:
-            os.makedirs(dir_path)
-            log.info(f"Created directory: {dir_path}")
-        except OSError as e:
-            log.error(f"Failed to create directory {dir_path}: {e}")
-            raise
+log = logging.getLogger(__name__)
 
 
-def download_image(image_url: str, image_path: str, timeout: int = 20):
-    if not image_url:
-        log.warning(f"Skipping download for empty image URL (path: {image_path})")
-        return
-
-    if os.path.exists(image_path):
-        return
-    try:
-        if not image_url.startswith("http"):
-            log.warning(
-                f"Skipping download for potentially invalid image URL: {image_url}"
-            )
-            return
-        response = requests.get(
-            image_url, headers=HEADERS, timeout=timeout, stream=True
-        )
-        response.raise_for_status()
-        with open(image_path, "wb") as file:
-            for chunk in response.iter_content(chunk_size=8192):
-                file.write(chunk)
-        log.debug(f"Successfully downloaded image {image_url} to {image_path}")
-    except requests.exceptions.RequestException as e:
-        log.warning(f"Failed to download image {image_url}: {e}")
-    except IOError as e:
-        log.error(f"Failed to write image to {image_path}: {e}")
-    except Exception as e:
-        log.error(f"An unexpected error occurred downloading {image_url}: {e}")
+def download_image(image_url: str, image_path: str, timeout: int = 20) -> str | None:
+    return pipeline.download_image(image_url, image_path, timeout, HEADERS)
 
 
 def get_product_details(
     product_li: BeautifulSoup, image_dir: str, category_name: str
-) -> Optional[Dict[str, Any]]:
+) -> dict[str, Any] | None:
     try:
         link_tag = product_li.find("a", {"class": "product-item-link"})
         title = link_tag.get_text(strip=True) if link_tag else "N/A"
@@ -114,143 +115,264 @@ def get_product_details(
             elif "data-src" in img_tag.attrs and img_tag["data-src"]:
                 image_url = img_tag["data-src"]
 
+        # Magento's add-to-cart form carries the SKU.
+        sku_form = product_li.find("form", attrs={"data-product-sku": True})
+        sku = sku_form["data-product-sku"] if sku_form else None
+
         if title == "N/A" or product_url == "N/A":
-            log.warning("Skipping product due to missing title or URL.")
+            log.warning(
+                "Skipping product due to missing title or URL.",
+                extra=rate_limit(MISSING_FIELD_LOGS_PER_SECOND),
+            )
             return None
 
-        sanitized_title = sanitize_filename(title)
-        image_filename = f"{sanitized_title}.jpg"
-        image_local_path = os.path.join(image_dir, image_filename)
-
-        return {
-            "product_title": title,
-            "product_price": price,
-            "product_url": product_url,
-            "product_image_url": image_url,
-            "product_image_local_path": image_local_path,
-            "platform": "2B",
-            "category": category_name,
-        }
+        return build_product_record(
+            title, price, product_url, image_url, image_dir, category_name, sku
+        )
     except Exception as e:
-        log.error(f"Error extracting data from 2B product tag: {e}")
+        log.error(
+            "Error extracting data from 2B product tag: %s",
+            e,
+            extra=rate_limit(MISSING_FIELD_LOGS_PER_SECOND),
+        )
         return None
 
 
-def scrape_page(
-    url: str, image_dir: str, category_name: str, req_timeout: int = 20
-) -> Optional[List[Dict[str, Any]]]:
-    log.debug(f"Scraping 2B page: {url} for category: {category_name}")
-    try:
-        response = requests.get(url, headers=HEADERS, timeout=req_timeout)
-        response.raise_for_status()
-    except requests.exceptions.RequestException as e:
-        log.error(f"HTTP request failed for 2B page {url}: {e}")
-        return None
+def build_product_record(
+    title: str,
+    price: str,
+    product_url: str,
+    image_url: str | None,
+    image_dir: str,
+    category_name: str,
+    sku: str | None = None,
+) -> dict[str, Any]:
+    sanitized_title = sanitize_filename(title)
+    image_filename = f"{sanitized_title}.jpg"
+    image_local_path = os.path.join(image_dir, image_filename)
+
+    return {
+        "product_title": title,
+        "product_price": price,
+        "product_url": product_url,
+        "product_id": canonical_product_id("2B", product_url, sku),
+        "product_image_url": image_url,
+        "product_image_local_path": image_local_path,
+        "platform": "2B",
+        "category": category_name,
+    }
 
-    soup = BeautifulSoup(response.content, "html.parser")
-    product_list_items = soup.find_all("li", {"class": "item product product-item"})
 
-    if not product_list_items:
-        log.info(f"No product list items found on 2B page {url}.")
-        return []
+def extract_page(
+    soup: BeautifulSoup, image_dir: str, category_name: str
+) -> list[dict[str, Any]]:
+    structured_products = extract_json_ld_products(soup)
+    if structured_products:
+        log.info("Found %d JSON-LD products on 2B page.", len(structured_products))
+        return [
+            build_product_record(
+                p["title"],
+                p["price"],
+                urljoin(BASE_URL, p["url"]),
+                p["image_url"],
+                image_dir,
+                category_name,
+                p["sku"],
+            )
+            for p in structured_products
+        ]
 
     page_data = []
-    for item in product_list_items:
+    for item in soup.find_all("li", {"class": "item product product-item"}):
         product_data = get_product_details(item, image_dir, category_name)
         if product_data:
             page_data.append(product_data)
-
-    log.info(f"Found {len(page_data)} products on 2B page {url}")
     return page_data
 
 
-def scrape_2b_categories(
-    category_url_templates: Dict[str, str],
+def extract_product_page(
+    soup: BeautifulSoup,
+    product_url: str,
+    category_name: str,
     image_dir: str = DEFAULT_IMAGE_DIR,
-    max_workers: Optional[int] = None,
+) -> dict[str, Any] | None:
+    """
+    Extracts the record of one product detail page (for a targeted price
+    refresh), JSON-LD first; None when the page shows no price.
+    """
+    structured_products = extract_json_ld_products(soup)
+    if structured_products:
+        p = structured_products[0]
+        return build_product_record(
+            p["title"],
+            p["price"],
+            product_url,
+            p["image_url"],
+            image_dir,
+            category_name,
+            p["sku"],
+        )
+
+    title_tag = soup.find("h1", {"class": "page-title"})
+    # The final (special) price; Magento keeps the plain number in an attribute.
+    price_tag = soup.find("span", attrs={"data-price-type": "finalPrice"})
+    if price_tag and price_tag.get("data-price-amount"):
+        price = price_tag["data-price-amount"]
+    else:
+        price_tag = soup.find("span", {"class": "price"})
+        price = (
+            price_tag.get_text(strip=True).replace("\xa0", "").replace("EGP", "")
+            if price_tag
+            else None
+        )
+    if not title_tag or not price:
+        log.warning(f"No title or price on 2B product page {product_url}.")
+        return None
+    img_tag = soup.find("img", {"class": "gallery-placeholder__image"})
+    sku_tag = soup.find("div", attrs={"itemprop": "sku"})
+    return build_product_record(
+        title_tag.get_text(strip=True),
+        price,
+        product_url,
+        img_tag.get("src") if img_tag else None,
+        image_dir,
+        category_name,
+        sku_tag.get_text(strip=True) if sku_tag else None,
+    )
+
+
+def extract_category_links(soup, page_url: str) -> list[dict[str, Any]]:
+    """Every category of the mega-menu, with its top-level menu entry as parent."""
+    navigation = soup.find("nav", class_="navigation")
+    if navigation is None:
+        return []
+    links = []
+    for item in navigation.find_all("li", class_=re.compile(r"^level\d+$")):
+        link = item.find("a", href=True)
+        name = link.get_text(" ", strip=True) if link else ""
+        if not name:
+            continue
+        top = item.find_parent("li", class_="level0")
+        top_link = top.find("a") if top is not None else None
+        links.append(
+            {
+                "name": name,
+                "url_template": urldefrag(urljoin(page_url, link["href"]))[0].split(
+                    "?"
+                )[0]
+                + LISTING_QUERY,
+                "parent": top_link.get_text(" ", strip=True) if top_link else None,
+            }
+        )
+    return links
+
+
+def is_product_entry(url: str, has_image: bool = False) -> bool:
+    """Whether a sitemap URL is a product page."""
+    return has_image and url.split("?")[0].endswith(".html")
+
+
+def extract_result_count(soup) -> int | None:
+    """The listing's total item count from the Magento toolbar."""
+    toolbar = soup.find("p", id="toolbar-amount")
+    numbers = toolbar.find_all("span", class_="toolbar-number") if toolbar else []
+    try:
+        return (
+            int(numbers[-1].get_text(strip=True).replace(",", "")) if numbers else None
+        )
+    except ValueError:
+        return None
+
+
+def build_pipeline(
+    image_dir: str = DEFAULT_IMAGE_DIR,
+    max_workers: int | None = None,
     req_timeout: int = 20,
     max_retries: int = 3,
     retry_delay: float = 1.0,
-) -> List[Dict[str, Any]]:
-    num_workers = get_num_workers(max_workers)
-    create_directory_if_not_exists(image_dir)
-    log.info(
-        f"Starting 2B scraper. Image directory: {image_dir}, Workers: {num_workers}"
+    partial_parse: bool = True,
+    trace: JobTrace | None = None,
+    download_images: bool = True,
+    raw_archive: RawPageWriter | None = None,
+    budget: CrawlBudget | None = None,
+    exporter: Exporter | None = None,
+) -> ScrapePipeline:
+    return ScrapePipeline(
+        "2B",
+        PAGE_REGIONS,
+        lambda soup, category_name: extract_page(soup, image_dir, category_name),
+        PAGINATION,
+        headers=HEADERS,
+        max_workers=max_workers,
+        req_timeout=req_timeout,
+        max_retries=max_retries,
+        retry_delay=retry_delay,
+        partial_parse=partial_parse,
+        download_images=download_images,
+        trace=trace,
+        raw_archive=raw_archive,
+        budget=budget,
+        on_batch=exporter.on_batch if exporter is not None else None,
     )
 
-    all_scraped_products: List[Dict[str, Any]] = []
-
-    with ThreadPoolExecutor(max_workers=num_workers) as executor:
-        for category_name, base_url_template in category_url_templates.items():
-            log.info(f"--- Processing 2B Category: {category_name} ---")
-
-            page_num = 1
-            category_futures = []
-
-            while True:
-                page_url = base_url_template.format(page_num)
-                log.info(f"Scraping page {page_num} for {category_name}: {page_url}")
-
-                page_data = None
-                for attempt in range(max_retries):
-                    page_data = scrape_page(
-                        page_url, image_dir, category_name, req_timeout
-                    )
-                    if page_data is not None:
-                        break
-                    log.warning(
-                        f"Retrying 2B page {page_url} (Attempt {attempt + 1}/{max_retries}) after delay..."
-                    )
-                    # time.sleep(retry_delay * (attempt + 1))
-                else:
-                    log.error(
-                        f"Max retries reached for 2B page {page_url}. Skipping page for category '{category_name}'."
-                    )
-
-                if page_data is None:
-                    log.error(
-                        f"Failed to fetch data for {category_name} on page {page_num} after max retries. Stopping this category."
-                    )
-                    break
-                if not page_data:
-                    log.info(
-                        f"No more products found for {category_name} on page {page_num}."
-                    )
-                    break
-
-                all_scraped_products.extend(page_data)
-
-                for product in page_data:
-                    if product.get("product_image_url"):
-                        category_futures.append(
-                            executor.submit(
-                                download_image,
-                                product["product_image_url"],
-                                product["product_image_local_path"],
-                                req_timeout,
-                            )
-                        )
-
-                page_num += 1
-
-            log.info(
-                f"Waiting for {len(category_futures)} image downloads for category {category_name}..."
-            )
-            for future in concurrent.futures.as_completed(category_futures):
-                try:
-                    future.result()
-                except Exception as exc:
-                    log.error(f"Image download generated an exception: {exc}")
 
-            log.info(f"Finished processing 2B category: {category_name}")
+def scrape_page(
+    url: str,
+    image_dir: str,
+    category_name: str,
+    req_timeout: int = 20,
+    partial_parse: bool = True,
+    trace: JobTrace | None = None,
+) -> list[dict[str, Any]] | None:
+    log.debug("Scraping 2B page: %s for category: %s", url, category_name)
+    result = build_pipeline(
+        image_dir,
+        req_timeout=req_timeout,
+        max_retries=1,
+        partial_parse=partial_parse,
+        trace=trace,
+    ).scrape_page(url, category_name)
+    return result[1] if result is not None else None
 
-    log.info(
-        f"Finished scraping all 2B categories. Total products found: {len(all_scraped_products)}"
-    )
-    return all_scraped_products
+
+def scrape_2b_categories(
+    category_url_templates: dict[str, str],
+    image_dir: str = DEFAULT_IMAGE_DIR,
+    max_workers: int | None = None,
+    req_timeout: int = 20,
+    max_retries: int = 3,
+    retry_delay: float = 1.0,
+    partial_parse: bool = True,
+    trace: JobTrace | None = None,
+    raw_archive: RawPageWriter | None = None,
+    budget: CrawlBudget | None = None,
+    download_images: bool = True,
+    exporter: Exporter | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Scrapes the 2B categories; `exporter` receives each page's products as
+    they arrive (the caller closes it).
+    """
+    create_directory_if_not_exists(image_dir)
+    log.info(f"Starting 2B scraper. Image directory: {image_dir}")
+
+    return build_pipeline(
+        image_dir,
+        max_workers,
+        req_timeout,
+        max_retries,
+        retry_delay,
+        partial_parse,
+        trace,
+        download_images,
+        raw_archive=raw_archive,
+        budget=budget,
+        exporter=exporter,
+    ).run(category_url_templates.items())
 
 
 if __name__ == "__main__":
+    configure_logging()
     log.info("Running 2B scraper script directly...")
     start_time = time.time()
 
@@ -281,4 +403,3 @@ if __name__ == "__main__":
             log.info(f"  Platform: {item['platform']}")
     else:
         log.info("No products were scraped from 2B.")
-